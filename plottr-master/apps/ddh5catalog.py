@@ -0,0 +1,39 @@
+import sys
+import os
+import argparse
+
+from plottr.data.ddh5_catalog import DDH5Catalog
+
+
+def main(path, update=True, name=None, field=None):
+    with DDH5Catalog(path) as catalog:
+        if update:
+            new, removed = catalog.update()
+            print(f'{len(new)} new, {len(removed)} removed files.',
+                  file=sys.stderr)
+
+        for filepath, groupname in catalog.find(name=name, field=field):
+            data = catalog.structure(filepath)[groupname]
+            fields = ', '.join(f"{k}{tuple(data.meta_val('shape', k))}"
+                               for k, _ in data.data_items())
+            print(f'{filepath} [{groupname}]: {fields}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Find data in the catalog of .ddh5 files in a directory.'
+    )
+    parser.add_argument("path", help="root directory of the data")
+    parser.add_argument("--name", default=None,
+                        help="dataset name to look for (wildcards allowed)")
+    parser.add_argument("--field", default=None,
+                        help="field the data must contain (wildcards allowed)")
+    parser.add_argument("--no-update", action="store_true",
+                        help="query the catalog without updating it first")
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.path)
+    if not os.path.isdir(path):
+        print('Invalid path.')
+        sys.exit()
+    main(path, update=not args.no_update, name=args.name, field=args.field)
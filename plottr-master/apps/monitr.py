@@ -8,9 +8,9 @@ from plottr.apps.monitr import Monitr
 QtWidgets = QtGui
 
 
-def main(path, refresh_interval):
+def main(path, refresh_interval, use_catalog=True):
     app = QtWidgets.QApplication([])
-    win = Monitr(path, refresh_interval)
+    win = Monitr(path, refresh_interval, useCatalog=use_catalog)
     win.show()
     return app.exec_()
 
@@ -21,6 +21,9 @@ if __name__ == '__main__':
     parser.add_argument("-r", "--refresh_interval", default=2,
                         help="interval at which to look for changes in the "
                              "monitored path (in seconds)")
+    parser.add_argument("--no-catalog", action="store_true",
+                        help="don't use (or create) the catalog of the data "
+                             "files in the monitored path")
     args = parser.parse_args()
 
     path = os.path.abspath(args.path)
@@ -28,4 +31,5 @@ if __name__ == '__main__':
         print('Invalid path.')
         sys.exit()
     else:
-        main(path=os.path.abspath(args.path), refresh_interval=args.refresh_interval)
+        main(path=os.path.abspath(args.path), refresh_interval=args.refresh_interval,
+             use_catalog=not args.no_catalog)
@@ -5,7 +5,7 @@ plottr/apps/autoplot.py : tools for simple automatic plotting.
 import logging
 import os
 import time
-from typing import Union, Tuple
+from typing import Union, Tuple, List, Dict
 
 from .. import QtGui, QtCore, Flowchart, Signal, Slot
 from .. import log as plottrlog
@@ -138,6 +138,21 @@ class AutoPlotMainWindow(PlotWindow):
         else:
             self.loaderNode = None
 
+        # let the loader only load what is selected for plotting.
+        if self.loaderNode is not None and \
+                hasattr(self.loaderNode, 'projection') and \
+                'Data selection' in fc.nodes():
+            self.loaderNode.projection = []
+            fc.nodes()['Data selection'].selectedDataChanged.connect(
+                self.setLoaderProjection)
+
+        # load pyramid levels that match what the plot shows.
+        viewLimitsChanged = getattr(self.plotWidget, 'viewLimitsChanged', None)
+        if self.loaderNode is not None and \
+                hasattr(self.loaderNode, 'region') and \
+                viewLimitsChanged is not None:
+            viewLimitsChanged.connect(self.setLoaderRegion)
+
         # a flag we use to set reasonable defaults when the first data
         # is processed
         self._initialized = False
@@ -159,6 +174,12 @@ class AutoPlotMainWindow(PlotWindow):
             refreshAction.triggered.connect(self.refreshData)
             self.fileMenu.addAction(refreshAction)
 
+        if hasattr(self.loaderNode, 'previewPoints'):
+            fullResAction = QtGui.QAction('Load &full resolution', self)
+            fullResAction.setShortcut('F')
+            fullResAction.triggered.connect(self.loadFullResolution)
+            self.fileMenu.addAction(fullResAction)
+
         # add monitor if needed
         if monitor:
             self.monitorToolBar = UpdateToolBar('Monitor data')
@@ -173,6 +194,29 @@ class AutoPlotMainWindow(PlotWindow):
         if self.monitorToolBar is not None:
             self.monitorToolBar.setMonitorInterval(val)
 
+    @Slot()
+    def loadFullResolution(self):
+        """
+        Replace a decimated preview by the data at full resolution.
+        """
+        if self.loaderNode.previewPoints is not None:
+            self.loaderNode.previewPoints = None
+            self.showTime()
+
+    @Slot(list)
+    def setLoaderProjection(self, selected: List[str]):
+        """
+        Load only the selected data (and its axes) in the loader node.
+        """
+        self.loaderNode.projection = selected
+
+    @Slot(dict)
+    def setLoaderRegion(self, region: Dict[str, Tuple[float, float]]):
+        """
+        Tell the loader node which region of the data is shown.
+        """
+        self.loaderNode.region = region
+
     def closeEvent(self, event):
         """
         When closing the inspectr window, do some house keeping:
@@ -305,8 +349,25 @@ def autoplotQcodesDataset(log: bool = False,
     return fc, win
 
 
-def autoplotDDH5(filepath: str = '', groupname: str = 'data') \
+def autoplotDDH5(filepath: str = '', groupname: str = 'data',
+                 preview_points: Union[int, None] = 100000,
+                 refine: bool = True,
+                 resolution: Union[int, None] = 1000) \
         -> (Flowchart, AutoPlotMainWindow):
+    """
+    Sets up a flowchart and autoplot window for data from a DDH5 file.
+
+    :param filepath: path of the file.
+    :param groupname: group that contains the data.
+    :param preview_points: if not ``None``, large data is first shown as a
+        decimated preview with this many points at most.
+    :param refine: if ``True``, load the full resolution right after the
+        preview is shown. Otherwise, it can be loaded from the menu.
+    :param resolution: if not ``None``, and the file contains a pyramid of
+        the data (see :func:`.write_pyramid`), load the coarsest level that
+        has this many points along each axis in the plotted region.
+    :returns: the flowchart object and the mainwindow widget
+    """
 
     fc = linearFlowchart(
         ('Data loader', DDH5Loader),
@@ -321,9 +382,14 @@ def autoplotDDH5(filepath: str = '', groupname: str = 'data') \
                              monitorInterval=2)
     win.show()
 
+    fc.nodes()['Data loader'].previewPoints = preview_points
+    fc.nodes()['Data loader'].resolution = resolution
     fc.nodes()['Data loader'].filepath = filepath
     fc.nodes()['Data loader'].groupname = groupname
     win.refreshData()
     win.setMonitorInterval(2)
 
+    if preview_points is not None and refine:
+        QtCore.QTimer.singleShot(0, win.loadFullResolution)
+
     return fc, win
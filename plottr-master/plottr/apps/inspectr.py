@@ -14,12 +14,15 @@ data. it relies on the public qcodes API to get its information.
 
 import os
 import time
+from typing import Optional
 
+import pandas as pd
 from pyqtgraph.Qt import QtGui, QtCore
 
 from .. import log as plottrlog
-from ..data.qcodes_dataset import (get_runs_from_db_as_dataframe,
-                                   get_ds_structure, load_dataset_from)
+from ..data.qcodes_dataset import (update_runs_dataframe,
+                                   get_ds_structure, load_dataset_from,
+                                   connection_pool)
 from plottr.gui.widgets import MonitorIntervalInput, FormLayoutWrapper, dictToTreeWidgetItems
 
 from .autoplot import autoplotQcodesDataset
@@ -208,16 +211,21 @@ class LoadDBProcess(QtCore.QObject):
     Worker object for getting a qcodes db overview as pandas dataframe.
     It's good to have this in a separate thread because it can be a bit slow
     for large databases.
+    If a previous overview is given, only new and incomplete runs are read.
     """
     dbdfLoaded = QtCore.pyqtSignal(object)
     pathSet = QtCore.pyqtSignal()
 
-    def setPath(self, path: str):
+    def setPath(self, path: str, dbdf: Optional[pd.DataFrame] = None):
         self.path = path
+        self.dbdf = dbdf
         self.pathSet.emit()
 
     def loadDB(self):
-        dbdf = get_runs_from_db_as_dataframe(self.path)
+        dbdf = update_runs_dataframe(self.path, self.dbdf)
+        # the worker thread ends after loading, so its connections would
+        # not be used again.
+        connection_pool.release(self.path)
         self.dbdfLoaded.emit(dbdf)
 
 
@@ -392,7 +400,10 @@ class QCodesDBInspector(QtGui.QMainWindow):
 
         if self.filepath is not None:
             if not self.loadDBThread.isRunning():
-                self.loadDBProcess.setPath(self.filepath)
+                # when refreshing, only runs that are new or were not
+                # completed yet need to be read.
+                dbdf = self.dbdf if self.latestRunId is not None else None
+                self.loadDBProcess.setPath(self.filepath, dbdf)
 
     
     def DBLoaded(self, dbdf):
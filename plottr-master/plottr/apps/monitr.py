@@ -2,20 +2,63 @@
 """
 import os
 import time
+import sqlite3
 from typing import Dict, Any, Optional, List
 from types import MethodType
-from functools import partial, partialmethod
+from functools import partialmethod
 
 import h5py
 
 from .. import QtCore, QtWidgets, Signal, Slot
 from ..data.datadict import DataDict
 from ..data.datadict_storage import datadict_from_hdf5, all_datadicts_from_hdf5
+from ..data.ddh5_catalog import DDH5Catalog
 from ..apps.autoplot import autoplotDDH5
 
 from .ui.Monitr_UI import Ui_MainWindow
 
 
+class RefreshFileProcess(QtCore.QObject):
+    """
+    Worker object for bringing the catalog, and catalog entries of files, up
+    to date. Listing the data directories and reading the structure of a
+    large (or remote) file can take a while, so this runs in a separate
+    thread. SQLite connections cannot be shared between threads; the worker
+    therefore opens the catalog itself.
+    """
+
+    #: Signal(str, bool) -- emitted when the entry of a file has been
+    #: refreshed. Arguments: path of the file, and whether the entry changed.
+    fileRefreshed = Signal(str, bool)
+
+    #: Signal() -- emitted when the catalog has been updated.
+    catalogUpdated = Signal()
+
+    def __init__(self, root: str, dbpath: str):
+        super().__init__()
+        self.root = root
+        self.dbpath = dbpath
+
+    @Slot(str)
+    def refreshFile(self, filePath: str):
+        changed = False
+        try:
+            with DDH5Catalog(self.root, self.dbpath) as catalog:
+                changed = catalog.refresh_file(filePath)
+        except (sqlite3.Error, OSError):
+            pass
+        self.fileRefreshed.emit(filePath, changed)
+
+    @Slot()
+    def updateCatalog(self):
+        try:
+            with DDH5Catalog(self.root, self.dbpath) as catalog:
+                catalog.update(check_files=False)
+        except (sqlite3.Error, OSError):
+            pass
+        self.catalogUpdated.emit()
+
+
 class Monitr(QtWidgets.QMainWindow):
 
     #: Signal(object) -- emitted when a valid data file is selected.
@@ -23,8 +66,16 @@ class Monitr(QtWidgets.QMainWindow):
     #:  - a dictionary containing the datadicts found in the file (as top-level groups)
     dataFileSelected = Signal(object)
 
+    #: Signal(str) -- emitted to request a refresh of the catalog entry of
+    #: a file in the background.
+    fileRefreshRequested = Signal(str)
+
+    #: Signal() -- emitted to request an update of the catalog in the
+    #: background.
+    catalogUpdateRequested = Signal()
+
     def __init__(self, monitorPath: str = '.', refreshInterval: int = 1,
-                 parent=None):
+                 useCatalog: bool = True, parent=None):
 
         super().__init__(parent=parent)
         self.ui = Ui_MainWindow()
@@ -36,19 +87,94 @@ class Monitr(QtWidgets.QMainWindow):
 
         self.monitorPath = os.path.abspath(monitorPath)
         self.refreshInterval = refreshInterval
-        self.refreshFiles = partial(self.ui.fileList.loadFromPath, self.monitorPath,
-                                    emitNew=True)
+
+        # files and their structure are taken from the catalog of the data,
+        # if we can open (or create) it.
+        self.catalog = None
+        if useCatalog:
+            try:
+                self.catalog = DDH5Catalog(self.monitorPath)
+            except sqlite3.Error:
+                pass
+        self.ui.fileList.catalog = self.catalog
+
+        # the catalog, and entries of selected files, are updated in the
+        # background, such that the file list and the selection show what the
+        # catalog has right away.
+        self.refreshThread = None
+        self._refreshing: Dict[str, bool] = {}
+        self._updatingCatalog = False
+        self._catalogUpdated = False
+        if self.catalog is not None:
+            self.refreshProcess = RefreshFileProcess(self.catalog.root,
+                                                     self.catalog.dbpath)
+            self.refreshThread = QtCore.QThread()
+            self.refreshProcess.moveToThread(self.refreshThread)
+            self.fileRefreshRequested.connect(self.refreshProcess.refreshFile)
+            self.refreshProcess.fileRefreshed.connect(self.onFileRefreshed)
+            self.catalogUpdateRequested.connect(
+                self.refreshProcess.updateCatalog)
+            self.refreshProcess.catalogUpdated.connect(self.onCatalogUpdated)
+            self.refreshThread.start()
+
         self.ui.fileList.loadFromPath(self.monitorPath, emitNew=False)
+        self.refreshFiles()
 
         self.monitor = QtCore.QTimer()
         self.monitor.timeout.connect(self.refreshFiles)
         self.monitor.timeout.connect(self.plotQueuedFiles)
         self.monitor.start(self.refreshInterval * 1000)
 
+    @Slot()
+    def refreshFiles(self):
+        """Update the file list. With a catalog, the catalog is updated in
+        the background first (see :meth:`onCatalogUpdated`)."""
+        if self.catalog is None:
+            self.ui.fileList.loadFromPath(self.monitorPath, emitNew=True)
+        elif not self._updatingCatalog:
+            self._updatingCatalog = True
+            self.catalogUpdateRequested.emit()
+
+    @Slot()
+    def onCatalogUpdated(self):
+        self._updatingCatalog = False
+        # files found by the first update are already there at startup.
+        self.ui.fileList.loadFromPath(self.monitorPath,
+                                      emitNew=self._catalogUpdated)
+        self._catalogUpdated = True
+
+    def closeEvent(self, event):
+        if self.refreshThread is not None:
+            self.refreshThread.quit()
+            self.refreshThread.wait()
+        super().closeEvent(event)
+
+    def fileStructure(self, filePath: str) -> Dict[str, DataDict]:
+        """Get the structure of the data in a file, from the catalog if we
+        have one. The catalog entry of the file is then refreshed in the
+        background (see :meth:`onFileRefreshed`)."""
+        if self.catalog is not None:
+            # while a refresh is running, only note that another is needed.
+            if filePath in self._refreshing:
+                self._refreshing[filePath] = True
+            else:
+                self._refreshing[filePath] = False
+                self.fileRefreshRequested.emit(filePath)
+            return self.catalog.structure(filePath)
+        return all_datadicts_from_hdf5(filePath, structure_only=True)
+
+    @Slot(str, bool)
+    def onFileRefreshed(self, filePath: str, changed: bool):
+        if self._refreshing.pop(filePath, False):
+            self._refreshing[filePath] = False
+            self.fileRefreshRequested.emit(filePath)
+        if changed and filePath == self.selectedFile:
+            self.dataFileSelected.emit(self.catalog.structure(filePath))
+
     @Slot(str)
     def processFileSelection(self, filePath: str):
         self.selectedFile = filePath
-        groups = all_datadicts_from_hdf5(filePath, structure_only=True)
+        groups = self.fileStructure(filePath)
         self.dataFileSelected.emit(groups)
 
     @Slot(list)
@@ -66,7 +192,7 @@ class Monitr(QtWidgets.QMainWindow):
         removeFiles = []
         for f in self.newFiles:
             try:
-                contents = all_datadicts_from_hdf5(f, structure_only=True)
+                contents = self.fileStructure(f)
             except OSError:
                 contents = {}
 
@@ -97,6 +223,8 @@ class Monitr(QtWidgets.QMainWindow):
         win.show()
 
     def onPlotClose(self, plotId: float):
+        # release the file, the loader keeps it open for reading.
+        self.plotDialogs[plotId]['flowchart'].nodes()['Data loader'].closeFile()
         self.plotDialogs[plotId]['flowchart'].deleteLater()
         self.plotDialogs[plotId]['window'].deleteLater()
         self.plotDialogs.pop(plotId, None)
@@ -114,6 +114,11 @@ class DataFileList(QtWidgets.QTreeWidget):
         self.files = []
         self.path = None
 
+        #: if set to a :class:`.DDH5Catalog` of the path, files are looked up
+        #: in the catalog instead of the file system. The catalog is not
+        #: updated here; that is up to the owner of the catalog.
+        self.catalog = None
+
     @staticmethod
     def find(parent, name):
         if isinstance(parent, DataFileList):
@@ -192,7 +197,10 @@ class DataFileList(QtWidgets.QTreeWidget):
 
     def loadFromPath(self, path: str, emitNew: bool = False):
         self.path = path
-        files = findFilesByExtension(path, self.fileExtensions)
+        if self.catalog is not None and self.catalog.root == path:
+            files = self.catalog.files()
+        else:
+            files = findFilesByExtension(path, self.fileExtensions)
         newFiles = [f for f in files if f not in self.files]
         removedFiles = [f for f in self.files if f not in files]
 
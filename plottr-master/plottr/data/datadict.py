@@ -3,12 +3,15 @@ datadict.py :
 
 Data classes we use throughout the plottr package, and tools to work on them.
 """
+import abc
 import warnings
+import weakref
 import copy as cp
 
 import numpy as np
-from functools import reduce
-from typing import List, Tuple, Dict, Sequence, Union, Any, Iterator
+from functools import reduce, wraps
+from typing import List, Tuple, Dict, Sequence, Union, Any, Iterator, \
+    Callable, Optional, TypeVar
 
 from plottr.utils import num, misc
 
@@ -41,16 +44,275 @@ def meta_name_to_key(name):
     return '__' + name + '__'
 
 
+#: meta data of data fields that describes their values (the limits written
+#: by ``datadict_storage.DDH5Writer``). It is removed when the values of a
+#: field are replaced, since it is not valid for new values anymore.
+VALUE_META_KEYS = ('__limits__', '__limits_count__')
+
+
+class LazyArray(np.lib.mixins.NDArrayOperatorsMixin, abc.ABC):
+    """
+    Base class for array-like data values that are only read when needed.
+
+    A lazy array is a handle to data that lives elsewhere (a file, a database).
+    Shape and dtype are known without reading any data. Indexing reads only
+    the selected part (as far as the source allows), and conversion to a
+    numpy array (e.g., through ``np.asarray``) reads everything. So do
+    arithmetic and numpy functions (ufuncs), which return numpy arrays.
+
+    Lazy arrays are read-only handles; ``copy.deepcopy`` returns the same
+    handle. :meth:`DataDictBase.data_vals` replaces the lazy values of a field
+    with a numpy array when they are accessed, and
+    :meth:`DataDictBase.materialize` does this for all fields.
+
+    Inheriting classes need to implement :meth:`_read`.
+
+    :param shape: shape of the data.
+    :param dtype: dtype of the data.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype: Any):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+    @abc.abstractmethod
+    def _read(self, key: Any) -> np.ndarray:
+        """Read the data selected by the index `key` from the source."""
+
+    @property
+    def ndim(self) -> int:
+        return len(self.shape)
+
+    @property
+    def size(self) -> int:
+        return int(np.prod(self.shape))
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        return self._read(key)
+
+    def __array__(self, dtype: Any = None) -> np.ndarray:
+        arr = np.asarray(self._read(slice(None)))
+        if dtype is not None:
+            arr = arr.astype(dtype)
+        return arr
+
+    def __array_ufunc__(self, ufunc: np.ufunc, method: str,
+                        *inputs: Any, **kwargs: Any) -> Any:
+        inputs = tuple(np.asarray(x) if isinstance(x, LazyArray) else x
+                       for x in inputs)
+        return getattr(ufunc, method)(*inputs, **kwargs)
+
+    def astype(self, dtype: Any) -> np.ndarray:
+        return self.__array__(dtype)
+
+    def __deepcopy__(self, memo: Dict) -> 'LazyArray':
+        return self
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} shape={self.shape} " \
+               f"dtype={self.dtype}>"
+
+
+class _DataField(dict):
+    """
+    Dictionary holding a data field of a datadict (values, axes, unit, meta).
+
+    Any change of the field is reported to the datadicts it belongs to, such
+    that they can drop their cached structure index. When the values are
+    replaced, meta data describing them (see :data:`VALUE_META_KEYS`) is
+    removed, unless it is given in the same update.
+
+    ``_shared`` is set while the values are shared with copies of a datadict
+    (see :meth:`DataDictBase.copy`).
+    """
+
+    def __init__(self, *arg, **kw):
+        super().__init__(*arg, **kw)
+        self._owners: List[weakref.ref] = []
+        self._shared = False
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def _add_owner(self, owner: 'DataDictBase'):
+        owners = [r for r in self._owners if r() is not None]
+        if not any(r() is owner for r in owners):
+            owners.append(weakref.ref(owner))
+        self._owners = owners
+
+    def _changed(self, values: bool = False):
+        if values:
+            self._shared = False
+            for k in VALUE_META_KEYS:
+                super().pop(k, None)
+        for r in self._owners:
+            owner = r()
+            if owner is not None:
+                owner._index = None
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed(values=key == 'values')
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def __or__(self, other: Any) -> Dict[Any, Any]:
+        ret = dict(self)
+        ret.update(other)
+        return ret
+
+    def __ior__(self, other: Any) -> '_DataField':
+        self.update(other)
+        return self
+
+    def pop(self, *arg):
+        ret = super().pop(*arg)
+        self._changed()
+        return ret
+
+    def popitem(self):
+        ret = super().popitem()
+        self._changed()
+        return ret
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def update(self, *arg, **kw):
+        new = dict(*arg, **kw)
+        super().update(new)
+        if 'values' in new:
+            self._shared = False
+        self._changed(values='values' in new and not any(
+            k in new for k in VALUE_META_KEYS))
+
+    def setdefault(self, key, default=None):
+        ret = super().setdefault(key, default)
+        self._changed()
+        return ret
+
+
+def _cached_validation(validate: Callable) -> Callable:
+    """
+    Decorator for the ``validate`` methods of datadict classes.
+
+    Validation is skipped if the datadict has not been changed since it
+    has last been validated successfully. The outcome is only recorded
+    by the ``validate`` of the class of the datadict (not by those of base
+    classes called through ``super()``).
+    """
+    @wraps(validate)
+    def cached(self) -> bool:
+        if self._index is not None and self._index.get('valid', False):
+            return True
+        ret = validate(self)
+        if ret and type(self).validate is cached:
+            self._cached('valid', lambda: True)
+        return ret
+    return cached
+
+
+_DataDictType = TypeVar('_DataDictType', bound='DataDictBase')
+
+
 class DataDictBase(dict):
     """
     Simple data storage class that is based on a regular dictionary.
 
     This base class does not make assumptions about the structure of the
     values. This is implemented in inheriting classes.
+
+    Structure information (validity, axes, dependents, shapes) is cached,
+    and the cache is dropped whenever fields, or entries of fields (like
+    ``values``), are assigned or removed. Data fields are therefore stored
+    as instances of a ``dict`` subclass that reports changes; changing the
+    values or axes arrays/lists in place is not detected.
     """
 
+    #: cache of structure information; ``None`` if it needs to be rebuilt.
+    _index: Optional[Dict[Any, Any]] = None
+
     def __init__(self, **kw):
         super().__init__(self, **kw)
+        for k, v in self.items():
+            if self._is_field_key(k) and isinstance(v, dict):
+                dict.__setitem__(self, k, self._adopt_field(v))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_index', None)
+        return state
+
+    # Tracking of changes
+
+    def _is_field_key(self, key) -> bool:
+        return isinstance(key, str) and not self._is_meta_key(key)
+
+    def _adopt_field(self, field: Dict[str, Any]) -> _DataField:
+        if not isinstance(field, _DataField):
+            field = _DataField(field)
+        field._add_owner(self)
+        return field
+
+    def _cached(self, key: Any, get: Callable[[], Any]) -> Any:
+        """
+        Return the cached structure information ``key``; if not cached,
+        obtain it with ``get``.
+        """
+        index = self._index
+        if index is None:
+            index = self._index = {}
+        if key not in index:
+            index[key] = get()
+        return index[key]
+
+    def __setitem__(self, key, value):
+        if self._is_field_key(key) and isinstance(value, dict):
+            value = self._adopt_field(value)
+        super().__setitem__(key, value)
+        self._index = None
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._index = None
+
+    def __or__(self, other: Any) -> Dict[Any, Any]:
+        ret = dict(self)
+        ret.update(other)
+        return ret
+
+    def __ior__(self, other: Any) -> 'DataDictBase':
+        self.update(other)
+        return self
+
+    def pop(self, *arg):
+        ret = super().pop(*arg)
+        self._index = None
+        return ret
+
+    def popitem(self):
+        ret = super().popitem()
+        self._index = None
+        return ret
+
+    def clear(self):
+        super().clear()
+        self._index = None
+
+    def update(self, *arg, **kw):
+        for k, v in dict(*arg, **kw).items():
+            self[k] = v
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
 
     def __eq__(self, other: 'DataDictBase'):
         """Check for content equality of two datadicts."""
@@ -174,14 +436,20 @@ class DataDictBase(dict):
         """
         Return the data values of field ``key``.
 
-        Equivalent to ``DataDict['key'].values``.
+        Equivalent to ``DataDict['key'].values``. Lazily loaded values (see
+        :class:`LazyArray`) are read, and replace the lazy values in the field.
 
         :param key: name of the data field
         :return: values of the data field
         """
         if self._is_meta_key(key):
             raise ValueError(f"{key} is a meta key.")
-        return self[key].get('values', np.array([]))
+        vals = self[key].get('values', np.array([]))
+        if isinstance(vals, LazyArray):
+            vals = np.asarray(vals)
+            # same values: no need to drop cached info and limits.
+            dict.__setitem__(self[key], 'values', vals)
+        return vals
 
     def has_meta(self, key: str) -> bool:
         """Check whether meta field exists in the dataset."""
@@ -275,8 +543,9 @@ class DataDictBase(dict):
         :param data: data field or list of data fields to be extracted
         :param include_meta: if ``True``, include the global meta data.
                              data meta will always be included.
-        :param copy: if ``True``, data fields will be deep copies of the
-                     original.
+        :param copy: if ``True``, data fields will be copies of the
+                     original (values are shared copy-on-write, see
+                     :meth:`copy` with ``shared=True``).
         :param sanitize: if ``True``, will run DataDictBase.sanitize before
                          returning.
         :return: new DataDictBase containing only requested fields.
@@ -294,7 +563,7 @@ class DataDictBase(dict):
         ret = self.__class__()
         for d in data:
             if copy:
-                ret[d] = cp.deepcopy(self[d])
+                ret[d] = self._share_field(d)
             else:
                 ret[d] = self[d]
 
@@ -430,23 +699,22 @@ class DataDictBase(dict):
                      otherwise only the axes of the dependent ``data``.
         :return: the list of axes
         """
-        lst = []
-        if data is None:
-            for k, v in self.data_items():
-                if 'axes' in v:
-                    for n in v['axes']:
-                        if n not in lst and self[n].get('axes', []) == []:
-                            lst.append(n)
-        else:
-            if isinstance(data, str):
-                data = [data]
-            for n in data:
-                if 'axes' not in self[n]:
-                    continue
-                for m in self[n]['axes']:
-                    if m not in lst and self[m].get('axes', []) == []:
-                        lst.append(m)
+        names: Union[Tuple[str, ...], None] = None
+        if isinstance(data, str):
+            names = (data,)
+        elif data is not None:
+            names = tuple(data)
+        return list(self._cached(('axes', names), lambda: self._axes(names)))
 
+    def _axes(self, names: Union[Tuple[str, ...], None]) -> List[str]:
+        fields = [k for k, _ in self.data_items()] if names is None else names
+        lst = []
+        found = set()
+        for n in fields:
+            for m in self[n].get('axes', []):
+                if m not in found and self[m].get('axes', []) == []:
+                    lst.append(m)
+                    found.add(m)
         return lst
 
     def dependents(self) -> List[str]:
@@ -455,11 +723,8 @@ class DataDictBase(dict):
 
         :return: a list of the names of dependents (data fields that have axes)
         """
-        ret = []
-        for n, v in self.data_items():
-            if len(v.get('axes', [])) != 0:
-                ret.append(n)
-        return ret
+        return list(self._cached('dependents', lambda: [
+            n for n, v in self.data_items() if len(v.get('axes', [])) != 0]))
 
     def shapes(self) -> Dict[str, Tuple[int, ...]]:
         """
@@ -469,14 +734,12 @@ class DataDictBase(dict):
                  np.shape-tuple of the data with name ``key``.
 
         """
-        shapes = {}
-        for k, v in self.data_items():
-            shapes[k] = np.array(self.data_vals(k)).shape
-
-        return shapes
+        return dict(self._cached('shapes', lambda: {
+            k: np.shape(v.get('values', [])) for k, v in self.data_items()}))
 
     # validation and sanitizing
 
+    @_cached_validation
     def validate(self):
         """
         Check the validity of the dataset.
@@ -512,9 +775,9 @@ class DataDictBase(dict):
                 v['unit'] = ''
 
             vals = v.get('values', [])
-            if type(vals) not in [np.ndarray, np.ma.core.MaskedArray]:
-                vals = np.array(vals)
-            v['values'] = vals
+            if not isinstance(vals, (np.ndarray, LazyArray)) \
+                    or 'values' not in v:
+                v['values'] = np.array(vals)
 
         if msg != '\n':
             raise ValueError(msg)
@@ -529,7 +792,7 @@ class DataDictBase(dict):
         """
         dependents = self.dependents()
         unused = []
-        ret = self.copy()
+        ret = self.copy(shared=True)
 
         for n, v in self.data_items():
             used = False
@@ -591,7 +854,7 @@ class DataDictBase(dict):
         if isinstance(data_names, str):
             data_names = [data_names]
 
-        ret = self.copy()
+        ret = self.copy(shared=True)
         for n in data_names:
             neworder, newaxes = self.reorder_axes_indices(n, **pos)
             ret[n]['axes'] = newaxes
@@ -599,13 +862,88 @@ class DataDictBase(dict):
         ret.validate()
         return ret
 
-    def copy(self) -> 'DataDictBase':
+    def copy(self: _DataDictType, shared: bool = False) -> _DataDictType:
         """
         Make a copy of the dataset.
 
+        :param shared: if ``False`` (default), make a deep copy. If ``True``,
+            value arrays are not copied (copy-on-write): the copy holds
+            read-only views of the values of the original. Values can be
+            replaced in either one without affecting the other; to change
+            values in place, use :meth:`writeable_vals`, which copies the
+            values of a field first if they are shared. Everything else
+            (structure, meta data) is copied. The values of the original stay
+            writeable, but changing them in place without
+            :meth:`writeable_vals` also changes them in the copy.
+            This is meant for nodes and other transformations that replace
+            values rather than change them.
         :return: A copy of the dataset.
         """
-        return cp.deepcopy(self)
+        if not shared:
+            return cp.deepcopy(self)
+
+        ret = self.__class__()
+        for k, v in self.items():
+            if self._is_field_key(k) and isinstance(v, dict):
+                ret[k] = self._share_field(k)
+            else:
+                ret[k] = cp.deepcopy(v)
+        return ret
+
+    def _share_field(self, name: str) -> Dict[str, Any]:
+        """
+        Copy of the data field ``name`` with values shared (as a read-only
+        view) with this dataset.
+        """
+        field = {}
+        for k, v in self[name].items():
+            if k == 'values' and type(v) is np.ndarray:
+                if v.flags.writeable:
+                    v = v.view()
+                    v.flags.writeable = False
+                    self[name]._shared = True
+                field[k] = v
+            else:
+                field[k] = cp.deepcopy(v)
+        return field
+
+    def writeable_vals(self, key: str) -> np.ndarray:
+        """
+        Return the values of field ``key`` such that they can be changed in
+        place. Values that are shared with copies of the dataset (see
+        :meth:`copy` with ``shared=True``) are copied first.
+
+        :param key: name of the data field
+        :return: values of the data field
+        """
+        vals = self.data_vals(key)
+        if not isinstance(vals, np.ndarray):
+            vals = np.array(vals)
+            self[key]['values'] = vals
+        elif not vals.flags.writeable or self[key]._shared:
+            vals = vals.copy()
+            self[key]['values'] = vals
+        return vals
+
+    def is_lazy(self) -> bool:
+        """
+        :return: ``True`` if any data values are not loaded yet
+                 (see :class:`LazyArray`).
+        """
+        return any(isinstance(v['values'], LazyArray)
+                   for _, v in self.data_items())
+
+    def materialize(self) -> 'DataDictBase':
+        """
+        Read all lazily loaded data values (see :class:`LazyArray`), and
+        replace them with numpy arrays.
+
+        :return: the dataset itself (the operation is performed in place).
+        """
+        for _, v in self.data_items():
+            if isinstance(v['values'], LazyArray):
+                v['values'] = np.asarray(v['values'])
+        return self
 
     def astype(self, dtype) -> 'DataDictBase':
         """
@@ -614,10 +952,10 @@ class DataDictBase(dict):
         :param dtype: np dtype.
         :return: copy of the dataset, with values as given type.
         """
-        ret = self.copy()
+        ret = self.copy(shared=True)
         for k, v in ret.data_items():
             vals = v['values']
-            if type(v['values']) not in [np.ndarray, np.ma.core.MaskedArray]:
+            if not isinstance(v['values'], np.ndarray):
                 vals = np.array(v['values'])
             ret[k]['values'] = vals.astype(dtype)
 
@@ -628,15 +966,18 @@ class DataDictBase(dict):
         Mask all invalid data in all values.
         :return: copy of the dataset with invalid entries (nan/None) masked.
         """
-        ret = self.copy()
+        ret = self.copy(shared=True)
         for d, _ in self.data_items():
-            arr = self.data_vals(d)
-            vals = np.ma.masked_where(num.is_invalid(arr), arr, copy=True)
+            # masking the (read-only) shared values does not copy them.
+            arr = ret.data_vals(d)
+            vals = np.ma.masked_where(num.is_invalid(arr), arr, copy=False)
             try:
                 vals.fill_value = np.nan
             except TypeError:
                 vals.fill_value = -9999
-            ret[d]['values'] = vals
+            # masking does not change the limits of the values.
+            ret[d].update(values=vals, **{m: ret[d][m] for m in VALUE_META_KEYS
+                                          if m in ret[d]})
 
         return ret
 
@@ -651,7 +992,9 @@ class DataDict(DataDictBase):
 
     The class further implements simple appending of datadicts through the
     ``DataDict.append`` method, as well as allowing addition of DataDict
-    instances.
+    instances. Appended values are kept in buffers with spare capacity
+    (see ``num.append_amortized``), such that adding data record by record
+    takes time linear in the number of records.
     """
 
     def __add__(self, newdata: 'DataDict') -> 'DataDict':
@@ -670,13 +1013,8 @@ class DataDict(DataDictBase):
         s = self.structure(add_shape=False)
         if DataDictBase.same_structure(self, newdata):
             for k, v in self.data_items():
-                val0 = self[k]['values']
-                val1 = newdata[k]['values']
-                s[k]['values'] = np.append(
-                    self[k]['values'],
-                    newdata[k]['values'],
-                    axis=0
-                )
+                s[k]['values'] = num.append_amortized(
+                    self[k]['values'], newdata[k]['values'])
             return s
         else:
             raise ValueError('Incompatible data structures.')
@@ -697,11 +1035,8 @@ class DataDict(DataDictBase):
                     v['values'], list):
                 newvals[k] = self[k]['values'] + v['values']
             else:
-                newvals[k] = np.append(
-                    self[k]['values'],
-                    v['values'],
-                    axis=0
-                )
+                newvals[k] = num.append_amortized(self[k]['values'],
+                                                  v['values'])
 
         # only actually
         for k, v in newvals.items():
@@ -816,6 +1151,7 @@ class DataDict(DataDictBase):
 
     # validation and sanitizing
 
+    @_cached_validation
     def validate(self) -> bool:
         """
         Check dataset validity.
@@ -832,8 +1168,7 @@ class DataDict(DataDictBase):
             msg = '\n'
 
             for n, v in self.data_items():
-                if type(v['values']) not in [np.ndarray,
-                                             np.ma.core.MaskedArray]:
+                if not isinstance(v['values'], (np.ndarray, LazyArray)):
                     self[n]['values'] = np.array(v['values'])
 
                 if nvals is None:
@@ -871,7 +1206,7 @@ class DataDict(DataDictBase):
         ishp = self._inner_shapes()
         idxs = []
 
-        ret = self.copy()
+        ret = self.copy(shared=True)
 
         # collect rows that are completely invalid
         for d in self.dependents():
@@ -907,8 +1242,15 @@ class DataDict(DataDictBase):
         if len(idxs) > 0:
             remove_idxs = reduce(np.intersect1d,
                                  tuple(np.array(idxs).astype(int)))
-            for k, v in ret.data_items():
-                v['values'] = np.delete(v['values'], remove_idxs, axis=0)
+            if len(remove_idxs) > 0:
+                deps = self.dependents()
+                for k, v in ret.data_items():
+                    # only invalid entries of dependents are removed, so
+                    # their limits remain.
+                    meta = {m: v[m] for m in VALUE_META_KEYS
+                            if m in v and k in deps}
+                    v.update(values=np.delete(v['values'], remove_idxs,
+                                              axis=0), **meta)
 
         return ret
 
@@ -967,10 +1309,11 @@ class MeshgridDataDict(DataDictBase):
 
         :returns: the shape as tuple. None if no data in the set.
         """
-        for d, _ in self.data_items():
-            return np.array(self.data_vals(d)).shape
+        for _, v in self.data_items():
+            return np.shape(v.get('values', []))
         return None
 
+    @_cached_validation
     def validate(self):
         """
         Validation of the dataset.
@@ -1000,7 +1343,7 @@ class MeshgridDataDict(DataDictBase):
         shp = None
         shpsrc = ''
         for n, v in self.data_items():
-            if type(v['values']) not in [np.ndarray, np.ma.core.MaskedArray]:
+            if not isinstance(v['values'], (np.ndarray, LazyArray)):
                 self[n]['values'] = np.array(v['values'])
 
             if shp is None:
@@ -1026,23 +1369,108 @@ class MeshgridDataDict(DataDictBase):
         :param pos: new axes position in the form ``axis_name = new_position``.
                     non-specified axes positions are adjusted automatically.
 
-        :return: Dataset with re-ordered axes.
+        :return: Dataset with re-ordered axes. Values are transposed views of
+                 the values of this dataset; they are only made contiguous
+                 by consumers that need it.
         """
         transposed = []
-        ret = self.copy()
+        ret = self.copy(shared=True)
 
         for n in self.dependents():
             neworder, newaxes = self.reorder_axes_indices(n, **pos)
             ret[n]['axes'] = newaxes
-            ret[n]['values'] = self[n]['values'].transpose(neworder)
-            for ax in self.axes(n):
-                if ax not in transposed:
-                    ret[ax]['values'] = self[ax]['values'].transpose(neworder)
-                    transposed.append(ax)
+            for k in [n] + [ax for ax in self.axes(n) if ax not in transposed]:
+                # transposing does not change the limits of the values.
+                ret[k].update(values=self[k]['values'].transpose(neworder),
+                              **{m: ret[k][m] for m in VALUE_META_KEYS
+                                 if m in ret[k]})
+            transposed += self.axes(n)
 
         ret.validate()
         return ret
 
+    def _grid_axes(self) -> List[str]:
+        deps = self.dependents()
+        return self.axes(deps[0]) if len(deps) > 0 else []
+
+    def isel(self, **indexers: Union[int, slice]) -> 'MeshgridDataDict':
+        """
+        Select a part of the grid by index along axes.
+
+        Like for numpy arrays, an integer index removes the axis (and its
+        data field), a slice keeps it. The values of the result are views of
+        the values of this dataset, i.e., no data is copied (values are
+        shared read-only, see :meth:`copy` with ``shared=True``).
+
+        :param indexers: index or slice per axis, in the form
+                         ``axis_name = index``.
+        :return: dataset on the selected part of the grid.
+        :raises: ``ValueError`` if an axis is not present.
+        """
+        self.validate()
+        axes = self._grid_axes()
+        missing = [a for a in indexers if a not in axes]
+        if len(missing) > 0:
+            raise ValueError(f"Axes {missing} are not present.")
+
+        idx = tuple(indexers.get(a, slice(None)) for a in axes)
+        removed = [a for a in axes if a in indexers
+                   and not isinstance(indexers[a], slice)]
+        ret = self.copy(shared=True)
+        deps = ret.dependents()
+        for n, v in ret.data_items():
+            v['values'] = v['values'][idx]
+        for n in deps:
+            ret[n]['axes'] = [a for a in ret[n]['axes'] if a not in removed]
+        for a in removed:
+            del ret[a]
+
+        ret.validate()
+        return ret
+
+    def sel(self, **coords: Any) -> 'MeshgridDataDict':
+        """
+        Select a part of the grid by coordinate values along axes
+        (see :meth:`isel`).
+
+        A value selects the grid point closest to it; a slice
+        ``slice(start, stop)`` selects all points with coordinates between
+        ``start`` and ``stop`` (inclusive, ``None`` for no limit).
+        The coordinates of an axis are taken along its dimension of the grid,
+        i.e., the grid is assumed to be rectilinear.
+
+        :param coords: value or slice per axis, in the form
+                       ``axis_name = value``.
+        :return: dataset on the selected part of the grid.
+        :raises: ``ValueError`` if an axis is not present.
+        """
+        self.validate()
+        axes = self._grid_axes()
+        indexers: Dict[str, Union[int, slice]] = {}
+        for a, c in coords.items():
+            if a not in axes:
+                raise ValueError(f"Axis {a} is not present.")
+            i = axes.index(a)
+            line = tuple(slice(None) if j == i else 0
+                         for j in range(len(axes)))
+            vals = np.asarray(self.data_vals(a))[line]
+
+            if isinstance(c, slice):
+                inside = np.ones(vals.shape, dtype=bool)
+                if c.start is not None:
+                    inside &= vals >= c.start
+                if c.stop is not None:
+                    inside &= vals <= c.stop
+                found = np.nonzero(inside)[0]
+                if found.size == 0:
+                    indexers[a] = slice(0, 0)
+                else:
+                    indexers[a] = slice(found[0], found[-1] + 1, c.step)
+            else:
+                indexers[a] = int(np.nanargmin(np.abs(vals - c)))
+
+        return self.isel(**indexers)
+
 
 # Tools for converting between different data types
 
@@ -1065,6 +1493,32 @@ def guess_shape_from_datadict(data: DataDict) -> \
     return shapes
 
 
+def declared_grid(data: DataDictBase) -> \
+        Union[None, Tuple[List[str], Tuple[int, ...]]]:
+    """
+    Get the grid declared in the meta data of a dataset.
+
+    A grid can be declared through the meta data entries ``grid_order`` (names
+    of the axes, slowest first) and ``grid_shape``, for instance by a
+    pre-allocating writer.
+
+    :param data: dataset to examine.
+    :return: axis order and shape of the grid. ``None`` if no grid is declared,
+             or if the declared grid does not match the axes of the dependents.
+    """
+    if not (data.has_meta('grid_shape') and data.has_meta('grid_order')):
+        return None
+
+    order = [str(a) for a in data.meta_val('grid_order')]
+    shape = tuple(int(i) for i in data.meta_val('grid_shape'))
+    if len(order) != len(shape):
+        return None
+    for d in data.dependents():
+        if sorted(data.axes(d)) != sorted(order):
+            return None
+    return order, shape
+
+
 def datadict_to_meshgrid(data: DataDict,
                          target_shape: Union[Tuple[int, ...], None] = None,
                          inner_axis_order: Union[None, List[str]] = None,
@@ -1074,7 +1528,9 @@ def datadict_to_meshgrid(data: DataDict,
     Try to make a meshgrid from a dataset.
 
     :param data: input DataDict.
-    :param target_shape: target shape. if ``None`` we use
+    :param target_shape: target shape. if ``None``, we use the grid declared
+        in the meta data (``grid_shape`` and ``grid_order``), if present and
+        matching the axes of the data. Otherwise we use
         ``guess_shape_from_datadict`` to infer.
     :param inner_axis_order: if axes of the datadict are not specified in the
         'C' order (1st the slowest, last the fastest axis) then the
@@ -1102,6 +1558,12 @@ def datadict_to_meshgrid(data: DataDict,
     elif use_existing_shape:
         target_shape = data.dependents()[0].shape
 
+    # use the declared grid, if there is one.
+    if target_shape is None and inner_axis_order is None:
+        declared = declared_grid(data)
+        if declared is not None:
+            inner_axis_order, target_shape = declared
+
     # guess what the shape likely is.
     if target_shape is None:
         shp_specs = guess_shape_from_datadict(data)
@@ -1130,7 +1592,10 @@ def datadict_to_meshgrid(data: DataDict,
                 inner_axis_order, axlist)
             vals = vals.transpose(transpose_idxs)
 
-        newdata[k]['values'] = vals
+        # gridding only rearranges the values (and pads them with invalid
+        # entries), so meta data describing them remains valid.
+        newdata[k].update(values=vals, **{
+            m: v[m] for m in VALUE_META_KEYS if m in v})
 
     newdata = newdata.sanitize()
     newdata.validate()
@@ -1197,7 +1662,7 @@ def combine_datadicts(*dicts: DataDict) -> Union[DataDictBase, DataDict]:
     #   axes in the return can be separated even if they match (caused
     #   by earlier mismatches)
 
-    ret = None
+    ret: Optional[DataDictBase] = None
     rettype = None
 
     for d in dicts:
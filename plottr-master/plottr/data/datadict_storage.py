@@ -13,11 +13,26 @@ Global meta data of the DataDict are attributes of the group; field meta data
 are attributes of the dataset (incl., the `unit` and `axes` values). The meta
 data keys are given exactly like in the DataDict, i.e., incl the double
 underscore pre- and suffix.
+
+Block-averaged versions of gridded data (a multi-resolution pyramid, see
+:func:`write_pyramid`) can be stored in the subgroup ``__pyramid__`` of the
+data group.
+
+:class:`DDH5Writer` keeps track of the minimum and maximum of each real
+numerical field while writing. Readers provide them as field meta data
+``limits`` (and ``limits_count``, the number of finite values), whenever all
+rows of the field are loaded.
 """
 import os
 import time
+import queue
+import threading
+import weakref
+import itertools
+import warnings
 from enum import Enum
-from typing import Any, Union, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Union, Optional, List, Dict, Tuple, Callable
 
 import numpy as np
 import h5py
@@ -29,7 +44,9 @@ from ..node import (
     emitGuiUpdate,
 )
 
-from .datadict import DataDict, is_meta_key
+from .datadict import DataDict, DataDictBase, LazyArray, is_meta_key, \
+    declared_grid, VALUE_META_KEYS
+from ..utils import num
 
 __author__ = 'Wolfgang Pfaff'
 __license__ = 'MIT'
@@ -37,6 +54,19 @@ __license__ = 'MIT'
 DATAFILEXT = '.ddh5'
 TIMESTRFORMAT = "%Y-%m-%d %H:%M:%S"
 
+#: default size (in bytes) targeted by automatically determined chunk shapes
+CHUNKBYTES = 256 * 1024
+
+#: maximum size (in bytes) of blocks read at once when loading decimated data
+READBYTES = 64 * CHUNKBYTES
+
+#: when loading decimated data, selected rows that are less than this many
+#: bytes apart are read together with the rows in between
+GAPBYTES = 64 * 1024
+
+#: type for specifying dataset chunking (see :func:`write_data_to_file`)
+ChunkSpecType = Union[None, str, int, Tuple[int, ...], Dict[str, Tuple[int, ...]]]
+
 
 class AppendMode(Enum):
     """How/Whether to append data to existing data."""
@@ -100,14 +130,31 @@ def set_attr(h5obj: Any, name: str, val: Any):
 
 def add_cur_time_attr(h5obj: Any, name: str = 'creation',
                       prefix: str = '__', suffix: str = '__'):
-    """Add current time information to the given HDF5 object."""
+    """Add current time information to the given HDF5 object.
+
+    Existing time attributes are overwritten in place; re-creating attributes
+    is not safe while the file is in SWMR mode.
+    """
 
-    t = time.localtime()
-    tsec = time.mktime(t)
+    tsec = time.time()
+    t = time.localtime(tsec)
     tstr = time.strftime(TIMESTRFORMAT, t)
 
-    set_attr(h5obj, prefix + name + '_time_sec' + suffix, tsec)
-    set_attr(h5obj, prefix + name + '_time_str' + suffix, tstr)
+    for attr, val in [(prefix + name + '_time_sec' + suffix, tsec),
+                      (prefix + name + '_time_str' + suffix, tstr)]:
+        if attr in h5obj.attrs:
+            h5obj.attrs.modify(attr, val)
+        else:
+            set_attr(h5obj, attr, val)
+
+
+def _filepath(basepath: str) -> str:
+    """Full file path from a path with or without the file extension."""
+    if len(basepath) > len(DATAFILEXT) and \
+            basepath[-len(DATAFILEXT):] == DATAFILEXT:
+        return basepath
+    else:
+        return basepath + DATAFILEXT
 
 
 def init_path(filepath: str):
@@ -126,11 +173,70 @@ def init_path(filepath: str):
     #         pass
 
 
+def auto_chunk_shape(shape: Tuple[int, ...], dtype: Any,
+                     nbytes: int = CHUNKBYTES) -> Tuple[int, ...]:
+    """Determine a chunk shape for a dataset that grows along its first axis.
+
+    Data is appended and read in blocks of rows, so chunks span the complete
+    inner shape, and as many rows as fit into `nbytes`. If a single row is
+    larger than that, the chunk contains one row, and the largest inner
+    dimensions are halved until the chunk fits.
+
+    :param shape: shape of the dataset (the number of rows is ignored).
+    :param dtype: dtype of the dataset.
+    :param nbytes: targeted chunk size in bytes.
+    :return: chunk shape.
+    """
+    itemsize = np.dtype(dtype).itemsize
+    inner = list(shape[1:])
+    rowbytes = itemsize * int(np.prod(inner))
+    if rowbytes <= nbytes:
+        return tuple([max(1, nbytes // max(rowbytes, 1))] + inner)
+
+    while itemsize * int(np.prod(inner)) > nbytes and max(inner, default=1) > 1:
+        i = int(np.argmax(inner))
+        inner[i] = (inner[i] + 1) // 2
+    return tuple([1] + inner)
+
+
+def _storage_kwargs(name: str, shape: Tuple[int, ...], dtype: Any,
+                    chunks: ChunkSpecType = 'auto',
+                    compression: Optional[str] = None,
+                    compression_opts: Any = None,
+                    shuffle: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for ``create_dataset`` of field `name`, from the
+    chunking and filter options (see :func:`write_data_to_file`)."""
+    if isinstance(chunks, dict):
+        chunks = chunks.get(name, 'auto')
+    if isinstance(chunks, str):
+        if chunks != 'auto':
+            raise ValueError(f"Invalid chunk specification: '{chunks}'.")
+        chunks = auto_chunk_shape(shape, dtype)
+    elif chunks is False:
+        if compression is not None or shuffle:
+            raise ValueError('Filters require chunked datasets.')
+        return dict()
+    elif chunks is None or chunks is True:
+        chunks = True
+    elif isinstance(chunks, (int, np.integer)):
+        chunks = auto_chunk_shape(shape, dtype, nbytes=int(chunks))
+
+    ret: Dict[str, Any] = dict(chunks=chunks)
+    if compression is not None:
+        ret['compression'] = compression
+        if compression_opts is not None:
+            ret['compression_opts'] = compression_opts
+    if shuffle:
+        ret['shuffle'] = True
+    return ret
+
+
 def datadict_to_hdf5(datadict: DataDict,
                      basepath: str = None,
                      groupname: str = 'data',
                      append_mode: AppendMode = AppendMode.new,
-                     swmr_mode: bool = True):
+                     swmr_mode: bool = True,
+                     **storage_options: Any):
     """Write a DataDict to DDH5
 
     Note: meta data is only written during initial writing of the dataset.
@@ -147,21 +253,20 @@ def datadict_to_hdf5(datadict: DataDict,
             Note: we're not checking for content, only length!
         - `AppendMode.all` : append all data in datadict to file data sets
     :param swmr_mode: use HDF5 SWMR mode on the file when appending.
+    :param storage_options: chunking and filter options for newly created
+        datasets, see :func:`write_data_to_file`.
     """
 
-    if len(basepath) > len(DATAFILEXT) and \
-            basepath[-len(DATAFILEXT):] == DATAFILEXT:
-        filepath = basepath
-    else:
-        filepath = basepath + DATAFILEXT
-
+    filepath = _filepath(basepath)
     if not os.path.exists(filepath):
         init_path(filepath)
 
+    DDH5Reader.close_sessions(filepath)
     with h5py.File(filepath, mode='a', libver='latest') as f:
         if append_mode is AppendMode.none:
             init_file(f, groupname)
-        write_data_to_file(datadict, f, groupname, append_mode, swmr_mode)
+        write_data_to_file(datadict, f, groupname, append_mode, swmr_mode,
+                           **storage_options)
 
 
 def init_file(f: h5py.File,
@@ -179,12 +284,105 @@ def init_file(f: h5py.File,
         f.flush()
 
 
-def write_data_to_file(datadict: DataDict,
+def _set_field_attrs(ds: h5py.Dataset, datadict: DataDictBase, name: str):
+    """Add creation time, axes, unit and meta data of field `name` to its
+    dataset."""
+    add_cur_time_attr(ds)
+
+    v = datadict[name]
+    if v.get('axes', []) != []:
+        set_attr(ds, 'axes', v['axes'])
+    if v.get('unit', "") != "":
+        set_attr(ds, 'unit', v['unit'])
+
+    for kk, vv in datadict.meta_items(name, clean_keys=False):
+        set_attr(ds, kk, vv)
+
+
+def preallocate_datasets(datadict: DataDict,
+                         f: h5py.File,
+                         nrows: int,
+                         groupname: str = 'data',
+                         **storage_options: Any):
+    """Create fixed-size datasets for all fields of a DataDict.
+
+    The datasets have `nrows` rows and are filled with ``nan``. The dataset
+    attribute ``filled_rows`` is set to zero; writers filling the datasets
+    row by row should update it, readers only consider the filled rows.
+    (It is an attribute of the datasets and not of the group, because SWMR
+    readers only see attribute changes of datasets they refresh.)
+    Top-level meta data of the DataDict is written to the group.
+
+    :param datadict: DataDict containing the structure of the data. If values
+        are present, their inner shape and float or complex dtype is used for
+        the datasets. Fields of other dtypes (e.g., integers) are stored as
+        float, since they need to hold ``nan`` in rows that are not filled yet.
+        Without values, fields are scalar and float.
+    :param f: open HDF5 file.
+    :param nrows: number of rows to allocate.
+    :param groupname: name of the (existing) group to create the datasets in.
+    :param storage_options: chunking and filter options, see
+        :func:`write_data_to_file`.
+    """
+    if groupname not in f:
+        raise RuntimeError('Group does not exist, initialize file first.')
+    grp = f[groupname]
+
+    for k, v in datadict.meta_items(clean_keys=False):
+        set_attr(grp, k, v)
+
+    for k, v in datadict.data_items():
+        vals = np.asanyarray(v.get('values', []))
+        if np.issubdtype(vals.dtype, np.inexact):
+            dtype = vals.dtype
+        else:
+            dtype = np.dtype(float)
+        shp = (nrows,) + vals.shape[1:]
+        kw = _storage_kwargs(k, shp, dtype, **storage_options)
+        if isinstance(kw.get('chunks'), tuple):
+            kw['chunks'] = (min(kw['chunks'][0], max(nrows, 1)),) \
+                + kw['chunks'][1:]
+        ds = grp.create_dataset(k, shape=shp, dtype=dtype,
+                                fillvalue=np.nan, **kw)
+        _set_field_attrs(ds, datadict, k)
+        ds.attrs['filled_rows'] = 0
+
+    f.flush()
+
+
+def write_data_to_file(datadict: DataDictBase,
                        f: h5py.File,
                        groupname: str = 'data',
                        append_mode: AppendMode = AppendMode.new,
-                       swmr_mode: bool = True):
-
+                       swmr_mode: bool = True,
+                       chunks: ChunkSpecType = 'auto',
+                       compression: Optional[str] = None,
+                       compression_opts: Any = None,
+                       shuffle: bool = False):
+    """Write a DataDict to a group in an open HDF5 file.
+
+    See :func:`datadict_to_hdf5` for the meaning of `append_mode` and
+    `swmr_mode`. The remaining options determine the storage of datasets that
+    are created; existing datasets are not affected.
+
+    :param chunks: chunk shape of the datasets. One of:
+
+        - ``'auto'``: determined by :func:`auto_chunk_shape`, chunks of
+          :data:`CHUNKBYTES` bytes spanning complete rows.
+        - an integer: like ``'auto'``, with that chunk size in bytes.
+        - a tuple: the chunk shape used for all fields.
+        - a dictionary: chunk specification per field (``'auto'``, if missing).
+        - ``None``: chunk shape chosen by h5py.
+        - ``False``: contiguous (not chunked) datasets. These cannot be resized,
+          i.e., no data can be appended later, and no filters can be used. But
+          they can be memory-mapped when reading (see :func:`datadict_from_hdf5`).
+
+    :param compression: compression filter, e.g., ``'lzf'`` or ``'gzip'``.
+    :param compression_opts: options of the compression filter, e.g., the
+        gzip level.
+    :param shuffle: if ``True``, apply the shuffle filter (improves
+        compression of numerical data).
+    """
     if groupname not in f:
         raise RuntimeError('Group does not exist, initialize file first.')
     grp = f[groupname]
@@ -211,20 +409,15 @@ def write_data_to_file(datadict: DataDict,
 
         # create new dataset, add axes and unit metadata
         if k not in grp:
-            maxshp = tuple([None] + list(shp[1:]))
-            ds = grp.create_dataset(k, maxshape=maxshp, data=data)
-
-            # add meta data
-            add_cur_time_attr(ds)
-
-            if v.get('axes', []) != []:
-                set_attr(ds, 'axes', v['axes'])
-            if v.get('unit', "") != "":
-                set_attr(ds, 'unit', v['unit'])
-
-            for kk, vv in datadict.meta_items(k, clean_keys=False):
-                set_attr(ds, kk, vv)
-
+            kw = _storage_kwargs(k, shp, data.dtype, chunks=chunks,
+                                 compression=compression,
+                                 compression_opts=compression_opts,
+                                 shuffle=shuffle)
+            # only chunked datasets can be resized.
+            if 'chunks' in kw:
+                kw['maxshape'] = tuple([None] + list(shp[1:]))
+            ds = grp.create_dataset(k, data=data, **kw)
+            _set_field_attrs(ds, datadict, k)
             ds.flush()
 
         # if the dataset already exits, append data according to
@@ -246,25 +439,667 @@ def write_data_to_file(datadict: DataDict,
     f.flush()
 
 
+def open_for_reading(filepath: str,
+                     swmr_mode: bool = True,
+                     n_retries: int = 5,
+                     retry_delay: float = 0.01,
+                     max_retry_delay: float = 1.) -> h5py.File:
+    """Open an HDF5 file for reading.
+
+    Opening can fail temporarily while a writer holds the file. We then retry,
+    with delays that start at `retry_delay` and double on each retry, up to
+    `max_retry_delay`.
+
+    :param filepath: path of the file.
+    :param swmr_mode: if ``True``, open the file in SWMR mode.
+    :param n_retries: number of retries before giving up.
+    :param retry_delay: delay before the first retry, in seconds.
+    :param max_retry_delay: maximum delay between retries, in seconds.
+    :return: the open file.
+    :raises: ``OSError`` if the file could not be opened.
+    """
+    delay = retry_delay
+    cur_try = 0
+    while True:
+        try:
+            return h5py.File(filepath, mode='r', libver='latest',
+                             swmr=swmr_mode)
+        except OSError:
+            if cur_try >= n_retries:
+                raise
+            cur_try += 1
+            time.sleep(delay)
+            delay = min(2 * delay, max_retry_delay)
+
+
 def file_is_readable(filepath: str,
                      swmr_mode=True,
                      n_retries: int = 5,
                      retry_delay: float = 0.01) -> bool:
+    """Check that a file can be opened for reading, see
+    :func:`open_for_reading`."""
+    with open_for_reading(filepath, swmr_mode=swmr_mode, n_retries=n_retries,
+                          retry_delay=retry_delay):
+        pass
+    return True
 
-    cur_try = 0
+
+def filled_rows(ds: h5py.Dataset) -> int:
+    """Number of rows of a dataset that contain data. Smaller than the number
+    of rows only for pre-allocated datasets (see
+    :func:`preallocate_datasets`)."""
+    return min(ds.shape[0], int(ds.attrs.get('filled_rows', ds.shape[0])))
+
+
+def _write_limits(ds: h5py.Dataset, limits: Tuple[float, float, int],
+                  rows: int, create: bool = False):
+    """Store the running limits of a dataset in its ``limits`` attribute.
+
+    The limits are the minimum and maximum of all finite values written so
+    far, and their number. They are stored together with the number of rows
+    they cover as one attribute, ``[min, max, count, rows]``; readers only use
+    the limits if the rows match those of the dataset (see
+    :func:`_field_entry`).
+
+    The attribute has to be created before the file is in SWMR mode;
+    afterwards it is only modified.
+
+    :param ds: the dataset.
+    :param limits: minimum, maximum and number of the finite values.
+    :param rows: number of rows of the dataset that are covered.
+    :param create: if ``True``, create the attribute.
+    """
+    state = np.array(list(limits) + [rows], dtype=float)
+    if create:
+        ds.attrs['limits'] = state
+    else:
+        ds.attrs.modify('limits', state)
+
+
+class DDH5Reader(object):
+    """A session for reading repeatedly from a DDH5 file.
+
+    The file is kept open (in SWMR mode, by default) between reads. :meth:`group`
+    refreshes the datasets of a group, which picks up rows that a writer has
+    added since, instead of opening the file again. Note that SWMR does not
+    refresh attributes of groups, only those of datasets.
+
+    The file is opened again if the refresh fails, if the group does not exist,
+    or if the file has been replaced. Opening is retried with growing delays,
+    see :func:`open_for_reading`.
+
+    HDF5 does not allow a file to be opened for writing while it is open for
+    reading in the same process. Writers of this module therefore close all
+    sessions on their file first (see :meth:`close_sessions`); sessions open
+    the file again on their next read.
+
+    Example usage::
+        >>> with DDH5Reader('./data.ddh5') as reader:
+        ...     grp = reader.group('data')
+        ...     nrows = grp['x'].shape[0]
+
+    :param filepath: path of the file.
+    :param swmr_mode: if ``True``, open the file in SWMR mode.
+    :param n_retries: number of retries when opening the file.
+    :param retry_delay: delay before the first retry, in seconds.
+    :param max_retry_delay: maximum delay between retries, in seconds.
+    """
+
+    _sessions: 'weakref.WeakSet[DDH5Reader]' = weakref.WeakSet()
+
+    def __init__(self, filepath: str,
+                 swmr_mode: bool = True,
+                 n_retries: int = 5,
+                 retry_delay: float = 0.01,
+                 max_retry_delay: float = 1.):
+        """Constructor for :class:`.DDH5Reader`"""
+        self.filepath = filepath
+        self.swmr_mode = swmr_mode
+        self.n_retries = n_retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.file: Optional[h5py.File] = None
+        self._fileId: Optional[Tuple[int, int]] = None
+
+        DDH5Reader._sessions.add(self)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def _file_id(self) -> Tuple[int, int]:
+        st = os.stat(self.filepath)
+        return st.st_dev, st.st_ino
+
+    def open(self) -> h5py.File:
+        """Open the file, if it is not open yet.
+
+        :return: the open file.
+        """
+        if self.file is not None and self.file:
+            return self.file
+
+        self.file = open_for_reading(self.filepath, swmr_mode=self.swmr_mode,
+                                     n_retries=self.n_retries,
+                                     retry_delay=self.retry_delay,
+                                     max_retry_delay=self.max_retry_delay)
+        self._fileId = self._file_id()
+        return self.file
+
+    def close(self):
+        """Close the file. It is opened again on the next read."""
+        if self.file is not None:
+            if self.file:
+                self.file.close()
+            self.file = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.file is not None and bool(self.file)
+
+    def group(self, groupname: str = 'data') -> h5py.Group:
+        """Get a group of the file, with all datasets up to date.
+
+        :param groupname: name of the group.
+        :return: the group.
+        :raises: ``ValueError`` if the group does not exist.
+        """
+        if self.is_open and self._file_id() != self._fileId:
+            self.close()
+
+        f = self.file
+        if f is not None and f and self.swmr_mode:
+            try:
+                grp = f[groupname]
+                for k in _field_names(grp):
+                    grp[k].refresh()
+                return grp
+            except (KeyError, OSError, RuntimeError):
+                pass
+
+        self.close()
+        f = self.open()
+        if groupname not in f:
+            raise ValueError('Group does not exist.')
+        return f[groupname]
+
+    @classmethod
+    def close_sessions(cls, filepath: str):
+        """Close all reading sessions of this process on the given file."""
+        path = os.path.abspath(filepath)
+        for session in list(cls._sessions):
+            if os.path.abspath(session.filepath) == path:
+                session.close()
+
+
+def _field_names(grp: h5py.Group) -> List[str]:
+    """Names of the datasets in a group, i.e., of the data fields.
+    Subgroups (like the :data:`PYRAMID_GROUP`) are not included."""
+    return [k for k in grp.keys()
+            if grp.get(k, getclass=True) is h5py.Dataset]
+
+
+def _field_entry(ds: h5py.Dataset) -> Dict[str, Any]:
+    """Make the DataDict entry of a field from its dataset.
+
+    Only meta data of the dataset (attributes, shape, dtype) is accessed, no
+    values are read. The values of the returned entry are an empty array of
+    the stored dtype and inner shape.
+    """
+    entry: Dict[str, Any] = dict(
+        values=np.empty((0,) + ds.shape[1:], dtype=ds.dtype), )
+
+    if 'axes' in ds.attrs:
+        entry['axes'] = deh5ify(ds.attrs['axes']).tolist()
+    else:
+        entry['axes'] = []
+
+    if 'unit' in ds.attrs:
+        entry['unit'] = deh5ify(ds.attrs['unit'])
+
+    entry['__shape__'] = ds.shape
+
+    for attr in ds.attrs:
+        if is_meta_key(attr):
+            entry[attr] = deh5ify(ds.attrs[attr])
+
+    # limits are only meaningful if they cover all rows.
+    _drop_limits(entry)
+    limits = ds.attrs.get('limits')
+    if limits is not None and int(limits[3]) == filled_rows(ds):
+        entry['__limits__'] = (float(limits[0]), float(limits[1]))
+        entry['__limits_count__'] = int(limits[2])
+
+    return entry
+
+
+def _drop_limits(entry: Dict[str, Any]):
+    """Remove the limits (see :func:`_write_limits`) from a field entry,
+    when not all rows of the dataset are loaded."""
+    for k in VALUE_META_KEYS:
+        entry.pop(k, None)
+
+
+def _structure_from_group(grp: h5py.Group) -> Dict[str, Any]:
+    """Get the structure of the DataDict stored in a group, without reading
+    any data values. See :func:`_field_entry`."""
+    res = {}
+    for attr in grp.attrs:
+        if is_meta_key(attr):
+            res[attr] = deh5ify(grp.attrs[attr])
+
+    for k in _field_names(grp):
+        res[k] = _field_entry(grp[k])
+
+    return res
+
+
+class HDF5Values(LazyArray):
+    """Lazy values of a field in a DDH5 file.
+
+    Data is read from the dataset only when indexed or converted to an array.
+    The file is opened for each read (see :func:`open_for_reading`), so the
+    handle stays valid independent of any open files.
+
+    :param filepath: path of the file.
+    :param dsname: full name of the dataset in the file.
+    :param shape: shape of the values, i.e., of the rows that are used.
+    :param dtype: dtype of the dataset.
+    :param startidx: first row of the dataset that is used.
+    :param swmr_mode: if ``True``, open the file in SWMR mode.
+    :param slabs: if given, the values are the rows selected by these
+        hyperslabs (see :func:`grid_hyperslabs`) instead of consecutive rows
+        from `startidx`. All selected rows are read on every access then.
+    """
+
+    def __init__(self, filepath: str, dsname: str, shape: Tuple[int, ...],
+                 dtype: Any, startidx: int = 0, swmr_mode: bool = True,
+                 slabs: Optional[List['HyperslabType']] = None):
+        super().__init__(shape, dtype)
+        self.filepath = filepath
+        self.dsname = dsname
+        self.startidx = startidx
+        self.swmr_mode = swmr_mode
+        self.slabs = slabs
+
+    def _read(self, key: Any) -> np.ndarray:
+        if self.slabs is not None:
+            with open_for_reading(self.filepath,
+                                  swmr_mode=self.swmr_mode) as f:
+                return read_hyperslabs(f[self.dsname], self.slabs)[key]
+
+        if not isinstance(key, tuple):
+            key = (key,)
+        rows = key[0] if len(key) > 0 else slice(None)
+        rest = key[1:]
+        allrows = range(self.startidx, self.startidx + self.shape[0])
+
+        # translate row selections to rows of the dataset; everything else
+        # is applied after reading all rows.
+        post = None
+        if isinstance(rows, slice) and (rows.step is None or rows.step > 0):
+            r = allrows[rows]
+            sel = (slice(r.start, r.stop, r.step),) + rest
+        elif isinstance(rows, (int, np.integer)):
+            sel = (allrows[rows],) + rest
+        else:
+            sel = (slice(allrows.start, allrows.stop),)
+            post = key
+
+        with open_for_reading(self.filepath, swmr_mode=self.swmr_mode) as f:
+            data = f[self.dsname][sel]
+        if post is not None:
+            data = data[post]
+        return data
+
+
+def memmap_rows(ds: h5py.Dataset, startidx: int, stopidx: int) \
+        -> Optional[np.memmap]:
+    """Memory-map rows of a dataset, without reading them.
+
+    This is only possible for contiguous datasets (no chunks, no filters) of
+    fixed-size dtypes, whose data has already been allocated in the file.
+
+    :param ds: the dataset.
+    :param startidx: first row.
+    :param stopidx: last row + 1.
+    :return: read-only memory map of the rows. ``None``, if the dataset cannot
+        be mapped.
+    """
+    if ds.chunks is not None or ds.external is not None \
+            or ds.dtype.hasobject or h5py.check_vlen_dtype(ds.dtype) is not None:
+        return None
+    offset = ds.id.get_offset()
+    if offset is None:
+        return None
+
+    shape = (max(stopidx - startidx, 0),) + ds.shape[1:]
+    if shape[0] == 0:
+        return None
+    rowbytes = ds.dtype.itemsize * int(np.prod(ds.shape[1:]))
+    return np.memmap(ds.file.filename, dtype=ds.dtype, mode='r',
+                     offset=offset + startidx * rowbytes, shape=shape)
+
+
+#: maximum number of rows of the axes that are read to guess the grid of a
+#: dataset when loading a decimated preview.
+GRID_PROBE_ROWS = 1000000
+
+#: a hyperslab along the first axis of a dataset, in HDF5 terms:
+#: (start, count, stride, block), i.e., ``count`` blocks of ``block`` rows,
+#: starting every ``stride`` rows.
+HyperslabType = Tuple[int, int, int, int]
+
+
+def decimation_strides(shape: Tuple[int, ...],
+                       max_points: int) -> Tuple[int, ...]:
+    """Find strides that decimate a grid to at most a given number of points.
+
+    The stride of the dimension with the most remaining points is doubled
+    until the number of points is small enough; all dimensions thus keep a
+    similar resolution.
+
+    :param shape: shape of the grid.
+    :param max_points: maximum number of points after decimation.
+    :return: one stride per dimension.
+    """
+    strides = [1] * len(shape)
+    counts = list(shape)
+    while int(np.prod(counts)) > max_points and max(counts) > 1:
+        i = int(np.argmax(counts))
+        strides[i] *= 2
+        counts[i] = -(-shape[i] // strides[i])
+    return tuple(strides)
+
+
+def _merge_hyperslab(slabs: List[HyperslabType], new: HyperslabType) -> None:
+    """Append a hyperslab to a list, merging it with the last one if the
+    combination is a single hyperslab again."""
+    if len(slabs) > 0:
+        start, count, stride, block = slabs[-1]
+        nstart, ncount, nstride, nblock = new
+        # the new slab continues the last one.
+        # the stride of a single block is arbitrary.
+        if count == 1 and ncount == 1:
+            stride = nstride = max(nstart - start, block)
+        elif count == 1:
+            stride = nstride
+        elif ncount == 1:
+            nstride = stride
+        if block == nblock and stride == nstride \
+                and nstart == start + count * stride:
+            slabs[-1] = (start, count + ncount, stride, block)
+            return
+    slabs.append(new)
+
+
+def grid_hyperslabs(shape: Tuple[int, ...], strides: Tuple[int, ...],
+                    startidx: int = 0,
+                    stopidx: Optional[int] = None) -> List[HyperslabType]:
+    """Select a decimated grid from flattened grid data.
+
+    The rows of the data are assumed to be the points of a grid of the given
+    shape, in C order (the last dimension is the fastest). The selection
+    keeps every ``strides[i]``-th point along each dimension ``i``, such
+    that the result is again a (smaller) grid.
+
+    :param shape: shape of the grid.
+    :param strides: strides along the dimensions of the grid.
+    :param startidx: first row that may be selected.
+    :param stopidx: end row + 1 that may be selected. If ``None``, use the
+        size of the grid.
+    :return: hyperslabs along the rows that make up the selection, in
+        ascending order. Regular patterns are merged into as few hyperslabs
+        as possible.
+    """
+    size = int(np.prod(shape))
+    if stopidx is None or stopidx > size:
+        stopidx = size
+
+    weights = [int(np.prod(shape[i+1:])) for i in range(len(shape))]
+    inner, step = shape[-1], strides[-1]
+    outer = [range(0, n, s) for n, s in zip(shape[:-1], strides[:-1])]
+
+    slabs: List[HyperslabType] = []
+    for idx in itertools.product(*outer):
+        base = sum(i * w for i, w in zip(idx, weights))
+        if base >= stopidx:
+            break
+        start = base
+        if start < startidx:
+            start += -(-(startidx - start) // step) * step
+        stop = min(base + inner, stopidx)
+        if start >= stop:
+            continue
+        count = -(-(stop - start) // step)
+        if step == 1 or count == 1:
+            _merge_hyperslab(slabs, (start, 1, count, count))
+        else:
+            _merge_hyperslab(slabs, (start, count, step, 1))
+    return slabs
+
+
+def hyperslab_rows(slabs: List[HyperslabType]) -> np.ndarray:
+    """Get the indices of all rows selected by hyperslabs.
+
+    :param slabs: hyperslabs as returned by :func:`grid_hyperslabs`.
+    :return: row indices.
+    """
+    rows = [start + (np.arange(count) * stride)[:, None] + np.arange(block)
+            for start, count, stride, block in slabs]
+    return np.concatenate([r.reshape(-1) for r in rows]
+                          + [np.zeros(0, dtype=int)])
+
+
+def _split_hyperslabs(slabs: List[HyperslabType],
+                      maxrows: int) -> List[HyperslabType]:
+    """Split hyperslabs such that none spans more than ``maxrows`` rows
+    (unless a single block is larger)."""
+    ret = []
+    for start, count, stride, block in slabs:
+        n = max(1, (maxrows - block) // stride + 1)
+        for i in range(0, count, n):
+            ret.append((start + i * stride, min(n, count - i), stride, block))
+    return ret
+
+
+def read_hyperslabs(ds: h5py.Dataset,
+                    slabs: List[HyperslabType]) -> np.ndarray:
+    """Read the rows selected by hyperslabs from a dataset.
+
+    Each read from the file has a considerable overhead, and strided reads
+    are slow per element when the stride is small. Hyperslabs (and gaps
+    between them) that are small compared to :data:`GAPBYTES` are therefore
+    read as contiguous blocks (of up to :data:`READBYTES` bytes) that are
+    decimated in memory. Sparse hyperslabs are read with strided selections.
+
+    :param ds: the dataset.
+    :param slabs: hyperslabs as returned by :func:`grid_hyperslabs`.
+    :return: the selected rows.
+    """
+    inner = ds.shape[1:]
+    rowbytes = max(1, ds.dtype.itemsize * int(np.prod(inner)))
+    gap = max(1, GAPBYTES // rowbytes)
+    maxrows = max(1, READBYTES // rowbytes)
+
+    def read(start: int, count: int, stride: int, block: int) -> np.ndarray:
+        if ds.dtype.kind == 'O':
+            return ds[start:start + count * stride][
+                hyperslab_rows([(0, count, stride, block)])]
+        vals = np.empty((count * block,) + inner, dtype=ds.dtype)
+        if vals.size > 0:
+            ones = (1,) * len(inner)
+            fspace = ds.id.get_space()
+            fspace.select_hyperslab((start,) + (0,) * len(inner),
+                                    (count,) + ones, (stride,) + ones,
+                                    (block,) + inner)
+            mspace = h5py.h5s.create_simple(vals.shape)
+            ds.id.read(mspace, fspace, vals)
+        return vals
+
+    parts = [np.empty((0,) + inner, dtype=ds.dtype)]
+    group: List[HyperslabType] = []
+    lo = hi = 0
+
+    def read_group():
+        if len(group) > 0:
+            vals = read(lo, 1, hi - lo, hi - lo)
+            parts.append(vals[hyperslab_rows(group) - lo])
+        group.clear()
+
+    for slab in _split_hyperslabs(slabs, maxrows):
+        start, count, stride, block = slab
+        end = start + (count - 1) * stride + block
+        if count > 1 and stride >= 8 * block and end - start > gap:
+            read_group()
+            parts.append(read(*slab))
+        elif len(group) > 0 and end - hi <= gap and end - lo <= maxrows:
+            group.append(slab)
+            hi = end
+        else:
+            read_group()
+            group.append(slab)
+            lo, hi = start, end
+    read_group()
+
+    return np.concatenate(parts)
+
+
+def _preview_grid(grp: h5py.Group, structure: Dict[str, Any], nrows: int) \
+        -> Optional[Tuple[List[str], Tuple[int, ...]]]:
+    """Find the grid of the data in a group, for decimating it.
+
+    Uses the grid declared in the meta data, if there is one. Otherwise, the
+    grid is guessed from the first rows of the axes; the number of points
+    along the slowest axis is then inferred from the number of rows.
+    The guess is only accepted if the rows used contain at least two steps of
+    the slowest axis; otherwise, ten times more rows are used, up to
+    :data:`GRID_PROBE_ROWS`.
+    """
+    data = DataDictBase(**structure)
+    declared = declared_grid(data)
+    if declared is not None:
+        return declared
+
+    deps = data.dependents()
+    if len(deps) == 0 or not data.axes_are_compatible() or nrows < 2:
+        return None
+    axes = data.axes(deps[0])
+    if len(axes) == 0 or any(grp[a].ndim != 1 for a in axes):
+        return None
+
+    nprobe = min(nrows, 10000)
     while True:
         try:
-            with h5py.File(filepath, mode='r',
-                           libver='latest', swmr=swmr_mode) as f:
-                pass
-            return True
-        except OSError:
-            cur_try += 1
-            if cur_try <= n_retries:
-                time.sleep(retry_delay)
-                cur_try += 1
+            guess = num.guess_grid_from_sweep_direction(
+                **{a: grp[a][:nprobe] for a in axes})
+        except ValueError:
+            return None
+
+        if guess is not None:
+            order, shape = guess
+            inner = int(np.prod(shape[1:]))
+            if nprobe // inner >= 2 or nprobe == nrows:
+                return order, (-(-nrows // inner),) + tuple(shape[1:])
+
+        if nprobe >= min(nrows, GRID_PROBE_ROWS):
+            return None
+        nprobe = min(nrows, GRID_PROBE_ROWS, 10 * nprobe)
+
+
+def datadict_from_group(grp: h5py.Group,
+                        startidx: Union[int, None] = None,
+                        stopidx: Union[int, None] = None,
+                        structure_only: bool = False,
+                        ignore_unequal_lengths: bool = True,
+                        memmap: bool = False,
+                        lazy: bool = False,
+                        stride: Union[None, int, Tuple[int, ...]] = None,
+                        max_points: Optional[int] = None,
+                        projection: Optional[List[str]] = None) -> DataDict:
+    """Load a DataDict from a group of an open file.
+
+    See :func:`datadict_from_hdf5` for the parameters.
+
+    :return: validated DataDict.
+    """
+    if startidx is None:
+        startidx = 0
+
+    res = _structure_from_group(grp)
+    keys = _field_names(grp)
+    lens = [filled_rows(grp[k]) for k in keys]
+
+    if len(set(lens)) > 1:
+        if not ignore_unequal_lengths:
+            raise RuntimeError('Unequal lengths in the datasets.')
+
+    nrows = min(lens, default=0)
+    if stopidx is None or stopidx > nrows:
+        stopidx = nrows
+
+    projected = keys
+    if projection is not None:
+        projected = [k for k in projection if k in res]
+        projected += [a for k in projected for a in res[k].get('axes', [])]
+
+    if not structure_only and (stride is not None or max_points is not None):
+        grid = _preview_grid(grp, res, stopidx)
+        shape = (stopidx,) if grid is None else grid[1]
+        if max_points is not None:
+            strides = decimation_strides(shape, max_points)
+        elif isinstance(stride, int):
+            strides = (stride,) * len(shape)
+        elif stride is not None and len(stride) == len(shape):
+            strides = tuple(stride)
+        else:
+            raise ValueError(f'Strides {stride} do not match the '
+                             f'grid shape {shape}.')
+
+        slabs = grid_hyperslabs(shape, strides, startidx, stopidx)
+        nselected = sum(count * block for _, count, _, block in slabs)
+        for k in keys:
+            ds = grp[k]
+            if lazy or k not in projected:
+                res[k]['values'] = HDF5Values(
+                    ds.file.filename, ds.name, (nselected,) + ds.shape[1:],
+                    ds.dtype, slabs=slabs)
             else:
-                raise
+                res[k]['values'] = read_hyperslabs(ds, slabs)
+            _drop_limits(res[k])
+
+        res['__preview_strides__'] = strides
+        if grid is not None and startidx == 0:
+            res['__grid_order__'] = grid[0]
+            res['__grid_shape__'] = tuple(-(-n // s)
+                                          for n, s in zip(shape, strides))
+
+    elif not structure_only:
+        for k, n in zip(keys, lens):
+            if startidx > 0 or stopidx < n:
+                _drop_limits(res[k])
+            vals: Union[None, np.ndarray, HDF5Values] = None
+            if lazy or k not in projected:
+                ds = grp[k]
+                vals = HDF5Values(ds.file.filename, ds.name,
+                                  (max(stopidx - startidx, 0),) + ds.shape[1:],
+                                  ds.dtype, startidx=startidx)
+            elif memmap:
+                vals = memmap_rows(grp[k], startidx, stopidx)
+            if vals is None:
+                vals = grp[k][startidx:stopidx]
+            res[k]['values'] = vals
+
+    dd = DataDict(**res)
+    dd.validate()
+    return dd
 
 
 def datadict_from_hdf5(basepath: str,
@@ -275,109 +1110,326 @@ def datadict_from_hdf5(basepath: str,
                        ignore_unequal_lengths: bool = True,
                        swmr_mode: bool = True,
                        n_retries: int = 5,
-                       retry_delay: float = 0.01) -> DataDict:
+                       retry_delay: float = 0.01,
+                       memmap: bool = False,
+                       lazy: bool = False,
+                       stride: Union[None, int, Tuple[int, ...]] = None,
+                       max_points: Optional[int] = None,
+                       projection: Optional[List[str]] = None) -> DataDict:
     """Load a DataDict from file.
 
     :param basepath: full filepath without the file extension
     :param groupname: name of hdf5 group
     :param startidx: start row
     :param stopidx: end row + 1
-    :param structure_only: if `True`, don't load the data values
+    :param structure_only: if `True`, don't load the data values. Only the
+        meta data of the datasets is accessed then, the full shapes of the
+        fields are given in the `__shape__` meta entries.
     :param ignore_unequal_lengths: if `True`, don't fail when the rows have
         unequal length; will return the longest consistent DataDict possible.
     :param swmr_mode: if `True`, open HDF5 file in SWMR mode.
+    :param memmap: if `True`, values of contiguous datasets are returned as
+        read-only memory maps of the file instead of being read into memory.
+        Other datasets (chunked, compressed) are read normally.
+    :param lazy: if `True`, don't read any values now. The values are
+        :class:`HDF5Values` instead, that read from the file when needed.
+    :param stride: if given, load a decimated preview, with every
+        `stride`-th point along each dimension of the data grid (can also be
+        a tuple with one stride per dimension). The grid is taken from the
+        meta data, or guessed from the first rows of the axes. If no grid is
+        found, every `stride`-th row is loaded. The strides used are in the
+        `preview_strides` meta data, the decimated grid in `grid_shape` and
+        `grid_order`. Previews are never memory-mapped; lazy values of
+        previews read the decimated rows only.
+    :param max_points: if given, load a decimated preview (as with `stride`)
+        with at most `max_points` rows. Takes precedence over `stride`.
+    :param projection: if given, only the values of these fields and their
+        axes are read; the values of all other fields are lazy.
     :return: validated DataDict.
     """
-
-    if len(basepath) > len(DATAFILEXT) and \
-            basepath[-len(DATAFILEXT):] == DATAFILEXT:
-        filepath = basepath
-    else:
-        filepath = basepath + DATAFILEXT
-
+    filepath = _filepath(basepath)
     if not os.path.exists(filepath):
         raise ValueError("Specified file does not exist.")
 
-    if startidx is None:
-        startidx = 0
-
-    if file_is_readable(filepath, swmr_mode=swmr_mode,
-                        n_retries=n_retries, retry_delay=retry_delay):
-        pass
-
-    res = {}
-    with h5py.File(filepath, 'r', libver='latest', swmr=swmr_mode) as f:
+    with open_for_reading(filepath, swmr_mode=swmr_mode,
+                          n_retries=n_retries, retry_delay=retry_delay) as f:
         if groupname not in f:
             raise ValueError('Group does not exist.')
 
-        grp = f[groupname]
-        keys = list(grp.keys())
-        lens = [len(grp[k][:]) for k in keys]
+        return datadict_from_group(
+            f[groupname], startidx=startidx, stopidx=stopidx,
+            structure_only=structure_only,
+            ignore_unequal_lengths=ignore_unequal_lengths, memmap=memmap,
+            lazy=lazy, stride=stride, max_points=max_points,
+            projection=projection)
 
-        if len(set(lens)) > 1:
-            if not ignore_unequal_lengths:
-                raise RuntimeError('Unequal lengths in the datasets.')
 
-            if stopidx is None or stopidx > min(lens):
-                stopidx = min(lens)
-        else:
-            if stopidx is None or stopidx > lens[0]:
-                stopidx = lens[0]
+def all_datadicts_from_hdf5(basepath: str,
+                            groups: Union[None, List[str],
+                                          Callable[[str], bool]] = None,
+                            max_workers: int = 1,
+                            swmr_mode: bool = True,
+                            n_retries: int = 5,
+                            retry_delay: float = 0.01,
+                            **kwargs: Any) -> Dict[str, DataDict]:
+    """Load the DataDicts from all (or selected) groups of a file.
 
-        for attr in grp.attrs:
-            if is_meta_key(attr):
-                res[attr] = deh5ify(grp.attrs[attr])
+    The file is opened only once for reading all groups.
 
-        for k in keys:
-            ds = grp[k]
-            entry = dict(values=np.array([]), )
+    :param basepath: full filepath without the file extension
+    :param groups: which groups to load. Either a list of group names (missing
+        groups are ignored), or a function that returns ``True`` for the names
+        of groups to load. If ``None``, all groups are loaded.
+    :param max_workers: if larger than 1, load the groups concurrently with a
+        pool of that many threads. Note that h5py serializes all calls into the
+        HDF5 library, so only the work done outside of it (conversion to
+        DataDicts, validation) runs in parallel.
+    :param swmr_mode: if `True`, open HDF5 file in SWMR mode.
+    :param kwargs: passed on to :func:`datadict_from_group`.
+    :return: dictionary with group names as keys and DataDicts as values.
+    """
+    filepath = _filepath(basepath)
+    if not os.path.exists(filepath):
+        raise ValueError("Specified file does not exist.")
 
-            if 'axes' in ds.attrs:
-                entry['axes'] = deh5ify(ds.attrs['axes']).tolist()
-            else:
-                entry['axes'] = []
+    with open_for_reading(filepath, swmr_mode=swmr_mode,
+                          n_retries=n_retries, retry_delay=retry_delay) as f:
+        keys = [k for k in f.keys() if isinstance(f[k], h5py.Group)]
+        if callable(groups):
+            keys = [k for k in keys if groups(k)]
+        elif groups is not None:
+            keys = [k for k in keys if k in groups]
+
+        def load(k: str) -> DataDict:
+            return datadict_from_group(f[k], **kwargs)
+
+        if max_workers > 1 and len(keys) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                ret = dict(zip(keys, pool.map(load, keys)))
+        else:
+            ret = {k: load(k) for k in keys}
 
-            if 'unit' in ds.attrs:
-                entry['unit'] = deh5ify(ds.attrs['unit'])
+    return ret
 
-            if not structure_only:
-                entry['values'] = ds[startidx:stopidx]
 
-            entry['__shape__'] = ds[:].shape
+# Multi-resolution pyramids #
 
-            # and now the meta data
-            for attr in ds.attrs:
-                if is_meta_key(attr):
-                    _val = deh5ify(ds.attrs[attr])
-                    entry[attr] = deh5ify(ds.attrs[attr])
+#: name of the subgroup of a data group that holds its pyramid levels
+PYRAMID_GROUP = '__pyramid__'
 
-            res[k] = entry
 
-    dd = DataDict(**res)
-    dd.validate()
-    return dd
+def pyramid_blocks(shape: Tuple[int, ...], min_points: int = 256,
+                   factor: int = 2) -> List[Tuple[int, ...]]:
+    """Block sizes of the levels of a pyramid.
 
+    Each level reduces every dimension of the previous level by `factor`, as
+    long as that leaves at least `min_points` points along it. There are no
+    more levels once no dimension can be reduced.
 
-def all_datadicts_from_hdf5(basepath: str, *args, **kwargs):
-    if len(basepath) > len(DATAFILEXT) and \
-            basepath[-len(DATAFILEXT):] == DATAFILEXT:
-        filepath = basepath
-    else:
-        filepath = basepath + DATAFILEXT
+    :param shape: shape of the full-resolution grid.
+    :param min_points: minimum number of points along a reduced dimension.
+    :param factor: reduction factor from one level to the next.
+    :return: for each level, the block size relative to the previous level.
+    """
+    ret: List[Tuple[int, ...]] = []
+    shape = tuple(shape)
+    while True:
+        blocks = tuple(factor if -(-n // factor) >= min_points else 1
+                       for n in shape)
+        if all(b == 1 for b in blocks):
+            return ret
+        ret.append(blocks)
+        shape = tuple(-(-n // b) for n, b in zip(shape, blocks))
 
-    if not os.path.exists(filepath):
-        raise ValueError("Specified file does not exist.")
 
-    ret = {}
-    if file_is_readable(filepath, swmr_mode=kwargs.get('swmr_mode', True)):
-        with h5py.File(filepath, mode='r', libver='latest',
-                       swmr=kwargs.get('swmr_mode', True)) as f:
-            keys = [k for k in f.keys()]
+def block_mean(vals: np.ndarray, blocks: Tuple[int, ...]) -> np.ndarray:
+    """Average an array over blocks of its leading dimensions.
 
-        for k in keys:
-            ret[k] = datadict_from_hdf5(basepath, groupname=k, *args, **kwargs)
+    Dimensions that are not a multiple of the block size are padded with
+    ``nan``; ``nan`` values are ignored in the averages (blocks with only
+    ``nan`` give ``nan``).
 
-    return ret
+    :param vals: float or complex array.
+    :param blocks: block size along each of the leading dimensions.
+    :return: the averaged array.
+    """
+    ndim = len(blocks)
+    pad = [(0, -n % b) for n, b in zip(vals.shape, blocks)]
+    if any(p for _, p in pad):
+        vals = np.pad(vals, pad + [(0, 0)] * (vals.ndim - ndim),
+                      constant_values=np.nan)
+    shape = []
+    for n, b in zip(vals.shape, blocks):
+        shape += [n // b, b]
+    vals = vals.reshape(tuple(shape) + vals.shape[ndim:])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanmean(vals, axis=tuple(range(1, 2 * ndim, 2)))
+
+
+def write_pyramid(basepath: str, groupname: str = 'data',
+                  min_points: int = 256, factor: int = 2) \
+        -> List[Tuple[int, ...]]:
+    """Store block-averaged copies of gridded data next to the data.
+
+    The levels of the pyramid are written to the subgroups ``1``, ``2``, ...
+    of the :data:`PYRAMID_GROUP` of the data group (an existing pyramid is
+    replaced). Each level is a DataDict group with the fields of the data,
+    averaged over blocks of the previous level (see :func:`pyramid_blocks`);
+    axes are averaged as well. The grid of a level is given in its meta data
+    (``grid_shape``, ``grid_order``), together with the total block size
+    relative to the full data (``pyramid_blocks``). A level can be loaded like
+    any other group, e.g., with ``groupname='data/__pyramid__/2'``.
+
+    The grid of the data is taken from the meta data, or guessed from the
+    axes (see :func:`datadict_from_hdf5`). Incomplete grids are padded with
+    ``nan``. The pyramid is only valid for the number of rows present when
+    it was written; readers ignore it once more rows are added.
+
+    Each field is read into memory completely, one at a time. The file must
+    not be open for writing elsewhere.
+
+    :param basepath: full filepath without the file extension.
+    :param groupname: name of the group that contains the data.
+    :param min_points: minimum number of points along reduced dimensions.
+    :param factor: reduction factor from one level to the next.
+    :return: shapes of the levels, from fine to coarse. Empty if the data is
+        not numerical data on a grid, or too small for any level.
+    """
+    filepath = _filepath(basepath)
+    DDH5Reader.close_sessions(filepath)
+
+    with h5py.File(filepath, mode='a', libver='latest') as f:
+        if groupname not in f:
+            raise ValueError('Group does not exist.')
+        grp = f[groupname]
+        if PYRAMID_GROUP in grp:
+            del grp[PYRAMID_GROUP]
+
+        res = _structure_from_group(grp)
+        keys = _field_names(grp)
+        nrows = min([filled_rows(grp[k]) for k in keys], default=0)
+        if nrows == 0 or any(grp[k].dtype.kind not in 'iufc' for k in keys):
+            return []
+        grid = _preview_grid(grp, res, nrows)
+        if grid is None:
+            return []
+        order, shape = grid
+        npoints = int(np.prod(shape))
+        steps = pyramid_blocks(shape, min_points, factor)
+        if len(steps) == 0 or npoints < nrows:
+            return []
+
+        fields = DataDictBase(**{
+            k: {kk: vv for kk, vv in res[k].items()
+                if kk not in ['values', '__shape__', '__limits__',
+                              '__limits_count__']} for k in keys})
+        pgrp = grp.create_group(PYRAMID_GROUP)
+        set_attr(pgrp, '__source_rows__', nrows)
+        set_attr(pgrp, '__grid_order__', list(order))
+        set_attr(pgrp, '__grid_shape__', tuple(shape))
+
+        shapes = []
+        total = (1,) * len(shape)
+        for i, blocks in enumerate(steps):
+            total = tuple(t * b for t, b in zip(total, blocks))
+            lshape = tuple(-(-n // t) for n, t in zip(shape, total))
+            lgrp = pgrp.create_group(str(i + 1))
+            set_attr(lgrp, '__grid_order__', list(order))
+            set_attr(lgrp, '__grid_shape__', lshape)
+            set_attr(lgrp, '__pyramid_blocks__', total)
+            shapes.append(lshape)
+
+        ranges = []
+        for k in keys:
+            ds = grp[k]
+            vals = ds[:nrows]
+            if vals.dtype.kind not in 'fc':
+                vals = vals.astype(float)
+            if k in order:
+                ranges.append((order.index(k),
+                               float(np.nanmin(vals.real)),
+                               float(np.nanmax(vals.real))))
+            vals = np.pad(vals, [(0, npoints - nrows)]
+                          + [(0, 0)] * (vals.ndim - 1),
+                          constant_values=np.nan)
+            vals = vals.reshape(tuple(shape) + ds.shape[1:])
+            for i, blocks in enumerate(steps):
+                vals = block_mean(vals, blocks)
+                lds = pgrp[str(i + 1)].create_dataset(
+                    k, data=vals.reshape((-1,) + ds.shape[1:]))
+                _set_field_attrs(lds, fields, k)
+
+        set_attr(pgrp, '__axes_range__',
+                 [[lo, hi] for _, lo, hi in sorted(ranges)])
+
+    return shapes
+
+
+def pyramid_levels(grp: h5py.Group) -> List[h5py.Group]:
+    """Get the pyramid levels of a data group (see :func:`write_pyramid`).
+
+    :param grp: the data group.
+    :return: the level groups, from fine to coarse. Empty if there is no
+        pyramid, or if it is outdated (i.e., the number of rows of the data
+        has changed since it was written).
+    """
+    if PYRAMID_GROUP not in grp:
+        return []
+    pgrp = grp[PYRAMID_GROUP]
+    keys = _field_names(grp)
+    nrows = min([filled_rows(grp[k]) for k in keys], default=0)
+    if deh5ify(pgrp.attrs.get('__source_rows__')) != nrows:
+        return []
+    return [pgrp[k] for k in sorted(pgrp.keys(), key=int)]
+
+
+def select_pyramid_level(grp: h5py.Group,
+                         resolution: Union[int, Tuple[int, ...]],
+                         region: Optional[Dict[str, Tuple[float, float]]]
+                         = None) -> Optional[h5py.Group]:
+    """Select the coarsest pyramid level that matches a display resolution.
+
+    Along each dimension of the grid, a level needs at least `resolution`
+    points within the region that is shown, or all points of the full data,
+    if there are fewer.
+
+    :param grp: the data group.
+    :param resolution: number of points needed along each dimension (or a
+        tuple, with one number per dimension of the grid).
+    :param region: the visible range of axes, as ``{name: (min, max)}``.
+        Axes that are not given are shown completely.
+    :return: the group of the level. ``None`` if the full data should be
+        used (also, if there is no valid pyramid).
+    """
+    levels = pyramid_levels(grp)
+    if len(levels) == 0:
+        return None
+
+    pgrp = grp[PYRAMID_GROUP]
+    order = list(deh5ify(pgrp.attrs['__grid_order__']))
+    shape = tuple(pgrp.attrs['__grid_shape__'])
+    ranges = pgrp.attrs['__axes_range__']
+    if isinstance(resolution, int):
+        resolution = (resolution,) * len(shape)
+    if region is None:
+        region = {}
+
+    needed = []
+    for name, n, res, (lo, hi) in zip(order, shape, resolution, ranges):
+        frac = 1.
+        if name in region and hi > lo:
+            vlo, vhi = sorted(region[name])
+            visible = min(vhi, hi) - max(vlo, lo)
+            if visible > 0:
+                frac = visible / (hi - lo)
+        needed.append(min(n, int(np.ceil(res / frac))))
+
+    for lvl in levels[::-1]:
+        lshape = tuple(lvl.attrs['__grid_shape__'])
+        if all(l >= m for l, m in zip(lshape, needed)):
+            return lvl
+    return None
 
 
 # Node for monitoring #
@@ -420,6 +1472,39 @@ class DDH5LoaderWidget(NodeWidget):
 
 
 class DDH5Loader(Node):
+    """Node that loads a DataDict from a DDH5 file.
+
+    The file is read through a :class:`DDH5Reader` session that stays open
+    between updates; on each update the datasets are refreshed to pick up new
+    data.
+
+    Data is loaded incrementally: the node remembers how many rows it has read
+    already, and on each update only reads rows that have been appended to the
+    file since. These are kept in buffers that grow with the data. If the
+    shapes (and filled rows) of the datasets have not changed, no values are
+    read at all. Any change of the data structure in the file (different fields,
+    re-created group, fewer rows than before) results in loading everything
+    again.
+
+    If ``lazy`` is set, no values are read by the node; the output data
+    contains :class:`HDF5Values` that are only read when they are used (for
+    instance, only the fields selected in a data selector).
+
+    If ``projection`` is set to a list of dependents, only those and their
+    axes are loaded by the node; all other fields are :class:`HDF5Values`.
+    When the projection changes, only fields that have not been loaded yet
+    are read.
+
+    If ``previewPoints`` is set, files with more rows than that are loaded as
+    a decimated preview (see ``max_points`` in :func:`datadict_from_hdf5`).
+    Setting it to ``None`` again loads the data at full resolution.
+
+    If ``resolution`` is set and the data has a pyramid (see
+    :func:`write_pyramid`), the coarsest level that has this many points in
+    the visible ``region`` is loaded instead of the full data (see
+    :func:`select_pyramid_level`). When zooming in far enough, the full data
+    is loaded again. This takes precedence over ``previewPoints``.
+    """
     nodeName = 'DDH5Loader'
     uiClass = DDH5LoaderWidget
     useUi = True
@@ -427,8 +1512,19 @@ class DDH5Loader(Node):
     retryDelay = 0.01
 
     def __init__(self, name: str):
-        self._filepath = None
-        self._groupname = None
+        self._filepath: Optional[str] = None
+        self._groupname: Optional[str] = None
+        self._lazy = False
+        self._projection = None
+        self._previewPoints = None
+        self._resolution = None
+        self._region = None
+
+        self._reader: Optional[DDH5Reader] = None
+        self._data: Optional[DataDict] = None
+        self._buffers: Dict[str, np.ndarray] = {}
+        self._dataStamp: Optional[Tuple[Any, ...]] = None
+        self._groupStamp: Optional[Tuple[Any, List[str]]] = None
 
         super().__init__(name)
 
@@ -443,6 +1539,8 @@ class DDH5Loader(Node):
     @updateOption('filepath')
     def filepath(self, val):
         self._filepath = val
+        self.closeFile()
+        self.clearCache()
 
     @property
     def groupname(self):
@@ -452,9 +1550,146 @@ class DDH5Loader(Node):
     @updateOption('groupname')
     def groupname(self, val):
         self._groupname = val
+        self.clearCache()
+
+    @property
+    def lazy(self):
+        return self._lazy
+
+    @lazy.setter
+    @updateOption('lazy')
+    def lazy(self, val):
+        self._lazy = val
+        self.clearCache()
+
+    @property
+    def projection(self):
+        return self._projection
+
+    @projection.setter
+    @updateOption('projection')
+    def projection(self, val):
+        if isinstance(val, str):
+            val = [val]
+        self._projection = val
+        self._data = None
+
+    @property
+    def previewPoints(self):
+        return self._previewPoints
+
+    @previewPoints.setter
+    @updateOption('previewPoints')
+    def previewPoints(self, val):
+        self._previewPoints = val
+        self._data = None
+
+    @property
+    def resolution(self):
+        return self._resolution
+
+    @resolution.setter
+    @updateOption('resolution')
+    def resolution(self, val):
+        self._resolution = val
+
+    @property
+    def region(self):
+        return self._region
+
+    @region.setter
+    @updateOption('region')
+    def region(self, val):
+        self._region = val
 
     # Data processing #
 
+    def clearCache(self):
+        """Forget all loaded data; the next update loads the full file."""
+        self._data = None
+        self._buffers = {}
+        self._dataStamp = None
+        self._groupStamp = None
+        self.nLoadedRecords = 0
+
+    def closeFile(self):
+        """Close the reading session; the next update opens the file again."""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _loadData(self) -> DataDict:
+        filepath, groupname = self._filepath, self._groupname
+        if filepath is None or groupname is None:
+            raise ValueError('File path and group name need to be set.')
+        if self._reader is None:
+            self._reader = DDH5Reader(filepath, n_retries=self.nRetries,
+                                      retry_delay=self.retryDelay)
+        grp = self._reader.group(groupname)
+
+        keys = _field_names(grp)
+        groupStamp = (deh5ify(grp.attrs.get('__creation_time_sec__')), keys)
+        lens = [filled_rows(grp[k]) for k in keys]
+        level = None
+        if self._resolution is not None:
+            level = select_pyramid_level(grp, self._resolution, self._region)
+        dataStamp = groupStamp + (lens, [grp[k].shape for k in keys],
+                                  None if level is None else level.name)
+        if self._data is not None and dataStamp == self._dataStamp:
+            return self._data
+
+        nrows = min(lens, default=0)
+        if level is not None or (self._previewPoints is not None
+                                 and nrows > self._previewPoints):
+            if level is not None:
+                data = datadict_from_group(level)
+            else:
+                data = datadict_from_group(grp,
+                                           max_points=self._previewPoints,
+                                           lazy=self._lazy,
+                                           projection=self._projection)
+            self._buffers = {}
+            self._data = data
+            self._dataStamp = dataStamp
+            self._groupStamp = groupStamp
+            self.nLoadedRecords = nrows
+            return data
+
+        nloaded = self.nLoadedRecords
+        if groupStamp != self._groupStamp or nrows < nloaded:
+            self._buffers = {}
+            nloaded = 0
+
+        res = _structure_from_group(grp)
+        projected = keys
+        if self._projection is not None:
+            projected = [k for k in self._projection if k in res]
+            projected += [a for k in projected for a in res[k].get('axes', [])]
+
+        for k, n in zip(keys, lens):
+            if n > nrows:
+                _drop_limits(res[k])
+            if self._lazy or k not in projected:
+                ds = grp[k]
+                res[k]['values'] = HDF5Values(
+                    filepath, ds.name, (nrows,) + ds.shape[1:], ds.dtype)
+                self._buffers.pop(k, None)
+                continue
+            start = nloaded if k in self._buffers else 0
+            if k not in self._buffers or start < nrows:
+                self._buffers[k] = num.append_rows(
+                    self._buffers.get(k), start, grp[k][start:nrows])
+            res[k]['values'] = self._buffers[k][:nrows]
+
+        data = DataDict(**res)
+        data.validate()
+
+        self._data = data
+        self._dataStamp = dataStamp
+        self._groupStamp = groupStamp
+        self.nLoadedRecords = nrows
+        return data
+
     def process(self, dataIn=None):
         if self._filepath is None or self._groupname is None:
             return None
@@ -462,17 +1697,13 @@ class DDH5Loader(Node):
             return None
 
         try:
-            data = datadict_from_hdf5(self._filepath,
-                                      groupname=self.groupname,
-                                      n_retries=self.nRetries,
-                                      retry_delay=self.retryDelay)
+            data = self._loadData()
         except OSError:
             # TODO needs logging
             return None
 
         title = f"{self.filepath}"
         data.add_meta('title', title)
-        self.nLoadedRecords = data.nrecords()
 
         if super().process(dataIn=data) is None:
             return None
@@ -494,6 +1725,10 @@ class DDH5Writer(object):
         ...         writer.add_data(x=x, y=x**2)
         Data location: ./data/2020-06-05/2020-06-05_0001_Example/2020-06-05_0001_Test.ddh5
 
+    While writing, the minimum and maximum of each real numerical field are
+    updated with every write, such that readers get the ``limits`` of the data
+    without going through all values.
+
     :param basedir: The root directory in which data is stored.
         :meth:`.create_file_structure` is creating the structure inside this root and
         determines the file name of the data. The default structure implemented here is
@@ -506,19 +1741,60 @@ class DDH5Writer(object):
     :param groupname: name of the top-level group in the file container. An existing
         group of that name will be deleted.
     :param name: name of this dataset. Used in path/file creation and added as meta data.
+    :param keep_in_memory: if ``True`` (default), all data added is also kept in
+        :attr:`datadict`. If ``False``, the writer operates in streaming mode:
+        added rows are written directly to the datasets in the file, and
+        :attr:`datadict` only retains the structure of the data. Memory usage then
+        does not grow with the size of the dataset.
+    :param grid_shape: if given, the shape of the sweep grid. The writer then
+        pre-allocates datasets with ``prod(grid_shape)`` rows (filled with ``nan``)
+        in the file, and :meth:`add_data` fills them in place. The grid is recorded
+        in the meta data (``grid_shape`` and ``grid_order``), such that readers can
+        put the data on a grid without guessing the shape.
+    :param grid_order: names of the axes in the order of `grid_shape`, i.e., the
+        first the slowest, the last the fastest. If ``None``, the axes of the
+        first dependent are used. Only used if `grid_shape` is given.
+    :param flush_rows: pending rows are written to the file once there are at least
+        this many. ``None`` disables writing based on the number of rows.
+    :param flush_interval: if given, pending rows are written to the file when
+        :meth:`add_data` is called at least this many seconds after the last write.
+        Pending rows are always written when leaving the context.
+    :param chunks: chunk shape of the datasets, see :func:`write_data_to_file`.
+    :param compression: compression filter of the datasets (e.g., ``'lzf'``).
+    :param compression_opts: options of the compression filter.
+    :param shuffle: if ``True``, apply the shuffle filter to the datasets.
+    :param background: if ``True``, rows are written to the file by a separate
+        thread, such that :meth:`add_data` does not wait for the disk. Each flush
+        puts the pending rows into a queue that the thread works through.
+    :param queue_size: maximum number of flushes waiting in the queue of the
+        background thread. If the queue is full, :meth:`add_data` blocks until
+        there is space again.
+    :param pyramid: if ``True``, write a multi-resolution pyramid of the data
+        after closing the file (see :func:`write_pyramid`). Nothing is written
+        if the data is not on a grid.
     """
 
-    # TODO: need an operation mode for not keeping data in memory.
-    # TODO: a mode for working with pre-allocated data
-
     def __init__(self, basedir: str,
                  datadict: DataDict,
                  groupname: str = 'data',
-                 name: Optional[str] = None):
+                 name: Optional[str] = None,
+                 keep_in_memory: bool = True,
+                 grid_shape: Optional[Tuple[int, ...]] = None,
+                 grid_order: Optional[List[str]] = None,
+                 flush_rows: Optional[int] = 1,
+                 flush_interval: Optional[float] = None,
+                 chunks: ChunkSpecType = 'auto',
+                 compression: Optional[str] = None,
+                 compression_opts: Any = None,
+                 shuffle: bool = False,
+                 background: bool = False,
+                 queue_size: int = 100,
+                 pyramid: bool = False):
         """Constructor for :class:`.DDH5Writer`"""
 
         self.basedir = basedir
         self.datadict = datadict
+        self.keep_in_memory = keep_in_memory
         self.inserted_rows = 0
         self.name = name
         self.groupname = groupname
@@ -529,26 +1805,103 @@ class DDH5Writer(object):
 
         self.datadict.add_meta('dataset.name', name)
 
+        self.storage_options = dict(chunks=chunks, compression=compression,
+                                    compression_opts=compression_opts,
+                                    shuffle=shuffle)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.pending_rows = 0
+        self._pending: Dict[str, List[np.ndarray]] = {
+            k: [] for k, _ in self.datadict.data_items()}
+        self._last_flush = time.time()
+        self._row_specs: Dict[str, Tuple[Tuple[int, ...], np.dtype]] = {}
+        self._limits: Dict[str, Tuple[float, float, int]] = {}
+
+        self.background = background
+        self.queue_size = queue_size
+        self.pyramid = pyramid
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+        self._structure: Optional[DataDict] = None
+
+        self.allocated_rows: Optional[int] = None
+        if grid_shape is not None:
+            if grid_order is None:
+                grid_order = self.datadict.axes(self.datadict.dependents()[0])
+            if len(grid_order) != len(grid_shape):
+                raise ValueError('Grid order and shape must have the same length.')
+            self.allocated_rows = int(np.prod(grid_shape))
+            self.datadict.add_meta('grid_shape', tuple(grid_shape))
+            self.datadict.add_meta('grid_order', list(grid_order))
+
     def __enter__(self):
         self.file_base = self.create_file_structure()
         self.file_path = self.file_base + f"{DATAFILEXT}"
         print('Data location: ', self.file_path)
 
+        DDH5Reader.close_sessions(self.file_path)
         self.file = h5py.File(self.file_path, mode='a', libver='latest')
         init_file(self.file, self.groupname)
         add_cur_time_attr(self.file, name='last_change')
         add_cur_time_attr(self.file[self.groupname], name='last_change')
 
-        if self.datadict.nrecords() > 0:
+        if self.allocated_rows is not None:
+            preallocate_datasets(self.datadict, self.file, self.allocated_rows,
+                                 groupname=self.groupname,
+                                 **self.storage_options)
+            for k, _ in self.datadict.data_items():
+                ds = self.file[self.groupname][k]
+                self._update_limits(ds, k, [], 0)
+                self._row_specs[k] = (ds.shape[1:], ds.dtype)
+            self.file.swmr_mode = True
+            if self.datadict.nrecords() > 0:
+                self._fill_rows({k: v['values']
+                                 for k, v in self.datadict.data_items()})
+                if not self.keep_in_memory:
+                    self._clear_values()
+
+        elif self.datadict.nrecords() > 0:
             write_data_to_file(self.datadict, self.file, groupname=self.groupname,
-                               append_mode=AppendMode.none)
+                               append_mode=AppendMode.none,
+                               **self.storage_options)
             self.inserted_rows = self.datadict.nrecords()
+            for k, v in self.datadict.data_items():
+                ds = self.file[self.groupname][k]
+                self._update_limits(ds, k, v['values'], self.inserted_rows)
+                self._row_specs[k] = (ds.shape[1:], ds.dtype)
+            # all datasets exist now, so readers can follow in SWMR mode.
+            self.file.swmr_mode = True
+            if not self.keep_in_memory:
+                self._clear_values()
+
+        self._structure = self.datadict.structure(same_type=True)
+        if self.background:
+            self._error = None
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._thread = threading.Thread(target=self._run_writer,
+                                            name='DDH5Writer', daemon=True)
+            self._thread.start()
 
         return self
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
-        add_cur_time_attr(self.file[self.groupname], name='close')
-        self.file.close()
+        try:
+            if self._error is None:
+                self.flush()
+        finally:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+                self._queue = None
+            add_cur_time_attr(self.file[self.groupname], name='close')
+            self.file.close()
+
+        if exc_type is None:
+            self._raise_writer_error()
+            if self.pyramid:
+                write_pyramid(self.file_path, self.groupname)
 
     def create_file_structure(self) -> str:
         """Determine the filepath and create all subfolders.
@@ -585,19 +1938,196 @@ class DDH5Writer(object):
         If some data is scalar and others are not, then the data should be reshaped
         to (1, ) for the scalar data, and (1, ...) for the others; in other words,
         an outer dimension with length 1 is added for all.
+
+        The rows are collected in a pending buffer, which is written to the file
+        according to the flush policy (see `flush_rows` and `flush_interval`).
+        In streaming mode (``keep_in_memory=False``) the new rows are only
+        written to the file, and not added to the internal `DataDict`.
+        With a pre-allocated grid, the rows are written into the next unfilled rows
+        of the datasets.
+
+        The inner shape of the rows of each field must be the same as for the
+        data written before, and their dtype must be castable to it (e.g.,
+        integers can be added to a float field, but not vice versa). Otherwise
+        a ``ValueError`` is raised, and nothing is added.
         """
-        self.datadict.add_data(**kwargs)
+        rows = {}
+        for k, v in kwargs.items():
+            if k not in self._pending:
+                raise ValueError(f"'{k}' is not a field of the data.")
+            if isinstance(v, list):
+                v = np.array(v)
+            elif not isinstance(v, np.ndarray) or v.ndim == 0:
+                v = np.array([v])
+            rows[k] = v
+
+        if len(rows) != len(self._pending):
+            raise ValueError('Data for all fields is required.')
+        nrows = {len(v) for v in rows.values()}
+        if len(nrows) > 1:
+            raise ValueError('All fields need to have the same number of rows.')
+
+        if len(self._row_specs) > 0:
+            for k, v in rows.items():
+                shape, dtype = self._row_specs[k]
+                if v.shape[1:] != shape:
+                    raise ValueError(f"Rows of '{k}' have inner shape "
+                                     f"{v.shape[1:]}, expected {shape}.")
+                if not np.can_cast(v.dtype, dtype, casting='same_kind'):
+                    raise ValueError(f"Rows of '{k}' have dtype {v.dtype}, "
+                                     f"which cannot be stored as {dtype}.")
+        else:
+            self._row_specs = {k: (v.shape[1:], v.dtype)
+                               for k, v in rows.items()}
+
+        for k, v in rows.items():
+            self._pending[k].append(v)
+        self.pending_rows += nrows.pop()
 
-        if self.inserted_rows > 0:
-            mode = AppendMode.new
+        if self.flush_rows is not None and self.pending_rows >= self.flush_rows:
+            self.flush()
+        elif self.flush_interval is not None and \
+                time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write all pending rows to the file.
+
+        In background mode, the rows are handed to the writer thread; this
+        blocks only if its queue is full. If writing in the background has
+        failed, a ``RuntimeError`` is raised.
+        """
+        self._raise_writer_error()
+        self._last_flush = time.time()
+        if self.pending_rows == 0:
+            return
+
+        rows = {k: (v[0] if len(v) == 1 else np.concatenate(v, axis=0))
+                for k, v in self._pending.items()}
+        for v in self._pending.values():
+            v.clear()
+        self.pending_rows = 0
+
+        if self._queue is not None:
+            self._queue.put(rows)
         else:
-            mode = AppendMode.none
+            self._write_rows(rows)
 
-        if self.datadict.nrecords() > 0:
-            write_data_to_file(self.datadict,
-                               self.file,
-                               groupname=self.groupname,
-                               append_mode=mode)
-            self.inserted_rows = self.datadict.nrecords()
-            add_cur_time_attr(self.file, name='last_change')
-            add_cur_time_attr(self.file[self.groupname], name='last_change')
+        if self.keep_in_memory:
+            self.datadict.add_data(**rows)
+
+    def _write_rows(self, rows: Dict[str, np.ndarray]):
+        if self.allocated_rows is not None:
+            self._fill_rows(rows)
+        else:
+            self._append_rows(rows)
+
+    def _run_writer(self):
+        """Target of the background thread: write rows from the queue until
+        we get ``None``. After an error, remaining rows are discarded."""
+        while True:
+            rows = self._queue.get()
+            if rows is None:
+                return
+            if self._error is None:
+                try:
+                    self._write_rows(rows)
+                except BaseException as e:
+                    self._error = e
+
+    def _raise_writer_error(self):
+        if self._error is not None:
+            raise RuntimeError('Writing data in the background failed.') \
+                from self._error
+
+    def _append_rows(self, rows: Dict[str, np.ndarray]):
+        """Append rows to the datasets in the file.
+
+        The datasets (and all meta data) are created on the first write; after
+        that, we only resize the datasets and set the new values.
+        """
+        f = self._open_file()
+        grp = f[self.groupname]
+        if not all(k in grp for k in rows):
+            structure = self._structure if self._structure is not None \
+                else self.datadict
+            data = structure.structure(same_type=True)
+            for k, v in rows.items():
+                data[k]['values'] = v
+            write_data_to_file(data, f, groupname=self.groupname,
+                               append_mode=AppendMode.all,
+                               **self.storage_options)
+            for k, v in rows.items():
+                self._update_limits(grp[k], k, v, grp[k].shape[0])
+        else:
+            for k, v in rows.items():
+                ds = grp[k]
+                dslen = ds.shape[0]
+                ds.resize(dslen + len(v), axis=0)
+                ds[dslen:] = v
+                self._update_limits(ds, k, v, dslen + len(v))
+
+        # all datasets exist now, so readers can follow in SWMR mode.
+        if not f.swmr_mode:
+            f.swmr_mode = True
+
+        self.inserted_rows += len(next(iter(rows.values())))
+        add_cur_time_attr(f, name='last_change')
+        add_cur_time_attr(grp, name='last_change')
+        f.flush()
+
+    def _fill_rows(self, rows: Dict[str, np.ndarray]):
+        """Write rows into the pre-allocated datasets."""
+        nrows = len(next(iter(rows.values()), []))
+        if nrows == 0:
+            return
+        if self.allocated_rows is None:
+            raise RuntimeError('No grid has been pre-allocated.')
+        if self.inserted_rows + nrows > self.allocated_rows:
+            raise ValueError('Data exceeds the pre-allocated grid.')
+
+        f = self._open_file()
+        grp = f[self.groupname]
+        start, stop = self.inserted_rows, self.inserted_rows + nrows
+        for k, v in rows.items():
+            grp[k][start:stop] = v
+            self._update_limits(grp[k], k, v, stop)
+
+        self.inserted_rows = stop
+        for k in rows:
+            grp[k].attrs.modify('filled_rows', stop)
+        add_cur_time_attr(f, name='last_change')
+        add_cur_time_attr(grp, name='last_change')
+        f.flush()
+
+    def _update_limits(self, ds: h5py.Dataset, name: str, vals: Any,
+                       rows: int):
+        """Include new values of field `name` in its running limits, and write
+        them to the file (see :func:`_write_limits`). Only real numerical
+        fields have limits."""
+        if ds.dtype.kind not in 'iuf':
+            return
+
+        vals = np.asarray(vals)
+        vals = vals[np.isfinite(vals)]
+        create = name not in self._limits
+        lo, hi, count = self._limits.get(name, (np.nan, np.nan, 0))
+        if vals.size > 0:
+            lo = vals.min() if count == 0 else min(lo, vals.min())
+            hi = vals.max() if count == 0 else max(hi, vals.max())
+            count += vals.size
+        self._limits[name] = (lo, hi, count)
+        _write_limits(ds, self._limits[name], rows, create=create)
+
+    def _open_file(self) -> h5py.File:
+        if self.file is None:
+            raise RuntimeError('No file is open; use the writer as a '
+                               'context manager.')
+        return self.file
+
+    def _clear_values(self):
+        """Replace all values in :attr:`datadict` by empty arrays of the same
+        dtype and inner shape, such that only the structure remains."""
+        for k, v in self.datadict.data_items():
+            vals = np.asanyarray(v['values'])
+            v['values'] = np.empty((0,) + vals.shape[1:], dtype=vals.dtype)
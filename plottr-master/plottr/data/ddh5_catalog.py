@@ -0,0 +1,372 @@
+"""plottr.data.ddh5_catalog
+
+A persistent catalog of the DDH5 files in a directory tree.
+
+The catalog is an SQLite database (by default in :data:`CATALOG_DIR`, outside
+of the tree, such that writing to it does not change the tree) that holds, for each data file, its modification time and size, and the structure
+of the DataDicts stored in it: groups, fields (with axes, units and shapes),
+and meta data (as strings, for display). Tools like the monitr can query the
+catalog instead of walking the file system and opening every file.
+
+The catalog is updated incrementally: only directories whose modification
+time has changed are listed again, and only files that are new or have
+changed are opened.
+"""
+import os
+import json
+import hashlib
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .datadict import DataDict
+from .datadict_storage import DATAFILEXT, all_datadicts_from_hdf5
+
+__license__ = 'MIT'
+
+#: directory of the catalog databases, if no database path is given.
+CATALOG_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join('~', '.cache')),
+    'plottr', 'ddh5_catalogs')
+
+#: version of the database layout; catalogs with a different version are
+#: rebuilt.
+CATALOG_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime INTEGER
+);
+CREATE INDEX dirs_parent ON dirs (parent);
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    dir TEXT,
+    mtime INTEGER,
+    size INTEGER,
+    readable INTEGER
+);
+CREATE INDEX files_dir ON files (dir);
+CREATE TABLE groups (
+    path TEXT,
+    groupname TEXT,
+    name TEXT,
+    nrecords INTEGER,
+    meta TEXT,
+    PRIMARY KEY (path, groupname)
+);
+CREATE TABLE fields (
+    path TEXT,
+    groupname TEXT,
+    field TEXT,
+    axes TEXT,
+    unit TEXT,
+    shape TEXT,
+    meta TEXT,
+    PRIMARY KEY (path, groupname, field)
+);
+"""
+
+
+def default_dbpath(root: str) -> str:
+    """Path of the catalog database of a root directory, if none is given:
+    a file in :data:`CATALOG_DIR` named by a hash of the absolute path of the
+    root."""
+    root = os.path.abspath(root)
+    name = hashlib.sha1(root.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(os.path.expanduser(CATALOG_DIR),
+                        f'{os.path.basename(root)}_{name}.db')
+
+
+class DDH5Catalog(object):
+    """Catalog of the DDH5 files below a root directory.
+
+    Paths returned by the catalog are absolute; in the database they are
+    stored relative to the root, so the catalog stays valid when the tree is
+    moved (if its database is given explicitly).
+
+    The database should not be inside the tree: SQLite creates and deletes
+    its journal next to the database, which would change the modification
+    time of the directory, and make every update list it again.
+
+    :param root: root directory of the data.
+    :param dbpath: path of the database file. By default, a file in
+        :data:`CATALOG_DIR`, named by the root directory (see
+        :func:`default_dbpath`).
+    :param timeout: time (in seconds) to wait for other processes that
+        update the same catalog.
+    :raises: ``sqlite3.Error`` if the database cannot be opened or created.
+    """
+
+    fileExtensions = [DATAFILEXT]
+
+    def __init__(self, root: str, dbpath: Optional[str] = None,
+                 timeout: float = 10.):
+        self.root = os.path.abspath(root)
+        if dbpath is None:
+            dbpath = default_dbpath(self.root)
+            os.makedirs(os.path.dirname(dbpath), exist_ok=True)
+        self.dbpath = dbpath
+        self.conn = sqlite3.connect(dbpath, timeout=timeout)
+
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != CATALOG_VERSION:
+            with self.conn:
+                for table in ['dirs', 'files', 'groups', 'fields']:
+                    self.conn.execute(f'DROP TABLE IF EXISTS {table}')
+                self.conn.executescript(_SCHEMA)
+                self.conn.execute(f'PRAGMA user_version = {CATALOG_VERSION}')
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def _abspath(self, relpath: str) -> str:
+        return os.path.join(self.root, relpath)
+
+    def _relpath(self, path: str) -> str:
+        relpath = os.path.relpath(os.path.abspath(path), self.root)
+        return '' if relpath == os.curdir else relpath
+
+    # Updating #
+
+    def update(self, check_files: bool = True) -> Tuple[List[str], List[str]]:
+        """Bring the catalog up to date with the file system.
+
+        :param check_files: if ``True``, compare modification time and size
+            of all known files with the file system, and read the structure of
+            changed files again. Otherwise, only directories are checked (new
+            and removed files are always found). Files that could not be read
+            before are tried again in any case, if they have changed since.
+        :return: absolute paths of the files that are new, and of the files
+            that have been removed.
+        """
+        new: List[str] = []
+        removed: List[str] = []
+
+        with self.conn:
+            stack = ['']
+            while len(stack) > 0:
+                stack += self._updateDir(stack.pop(), new, removed)
+
+            if check_files:
+                rows = self.conn.execute(
+                    'SELECT path, mtime, size, readable FROM files').fetchall()
+            else:
+                rows = self.conn.execute(
+                    'SELECT path, mtime, size, readable FROM files '
+                    'WHERE readable = 0').fetchall()
+            for relpath, mtime, size, readable in rows:
+                self._updateFile(relpath, mtime, size, readable)
+
+        return sorted(new), sorted(removed)
+
+    def refresh_file(self, path: str) -> bool:
+        """Bring the entry of a single file up to date.
+
+        A file that could not be read before is tried again, also if it has
+        not changed.
+
+        :param path: path of the file (must be below the root).
+        :return: ``True`` if the entry has changed.
+        """
+        relpath = self._relpath(path)
+        row = self.conn.execute(
+            'SELECT mtime, size, readable FROM files WHERE path = ?',
+            (relpath,)).fetchone()
+        if row is None:
+            row = (None, None, 0)
+        mtime, size, readable = row
+        with self.conn:
+            return self._updateFile(relpath, mtime, size, readable,
+                                    retry=True)
+
+    def _updateDir(self, relpath: str, new: List[str],
+                   removed: List[str]) -> List[str]:
+        """Update the entries of a directory, if it has changed.
+        Returns the subdirectories."""
+        try:
+            mtime = os.stat(self._abspath(relpath)).st_mtime_ns
+        except OSError:
+            self._removeDir(relpath, removed)
+            return []
+
+        row = self.conn.execute('SELECT mtime FROM dirs WHERE path = ?',
+                                (relpath,)).fetchone()
+        if row is not None and row[0] == mtime:
+            return [r[0] for r in self.conn.execute(
+                'SELECT path FROM dirs WHERE parent = ?', (relpath,))]
+
+        subdirs, files = [], []
+        for entry in os.scandir(self._abspath(relpath)):
+            if entry.is_dir():
+                subdirs.append(os.path.join(relpath, entry.name))
+            elif os.path.splitext(entry.name)[-1] in self.fileExtensions:
+                files.append(os.path.join(relpath, entry.name))
+
+        knownDirs = {r[0] for r in self.conn.execute(
+            'SELECT path FROM dirs WHERE parent = ?', (relpath,))}
+        for d in knownDirs.difference(subdirs):
+            self._removeDir(d, removed)
+
+        knownFiles = {r[0] for r in self.conn.execute(
+            'SELECT path FROM files WHERE dir = ?', (relpath,))}
+        for f in knownFiles.difference(files):
+            self._removeFile(f)
+            removed.append(self._abspath(f))
+        for f in set(files).difference(knownFiles):
+            self.conn.execute(
+                'INSERT INTO files (path, dir, readable) VALUES (?, ?, 0)',
+                (f, relpath))
+            new.append(self._abspath(f))
+
+        self.conn.execute(
+            'INSERT OR REPLACE INTO dirs (path, parent, mtime) VALUES (?, ?, ?)',
+            (relpath, None if relpath == '' else os.path.dirname(relpath),
+             mtime))
+        return subdirs
+
+    def _removeDir(self, relpath: str, removed: List[str]):
+        """Remove a directory and everything below it from the catalog."""
+        prefix = os.path.join(relpath, '')
+        below = 'substr(path, 1, ?) = ?'
+        args = (len(prefix), prefix)
+        for r in self.conn.execute(f'SELECT path FROM files WHERE {below}',
+                                   args):
+            removed.append(self._abspath(r[0]))
+        for table in ['files', 'groups', 'fields']:
+            self.conn.execute(f'DELETE FROM {table} WHERE {below}', args)
+        self.conn.execute(f'DELETE FROM dirs WHERE path = ? OR {below}',
+                          (relpath,) + args)
+
+    def _removeFile(self, relpath: str):
+        for table in ['files', 'groups', 'fields']:
+            self.conn.execute(f'DELETE FROM {table} WHERE path = ?',
+                              (relpath,))
+
+    def _updateFile(self, relpath: str, mtime: Optional[int],
+                    size: Optional[int], readable: int,
+                    retry: bool = False) -> bool:
+        """Read the structure of a file again if it has changed (or, with
+        `retry`, if it could not be read before). Opening files that cannot
+        be read is slow (reading is retried a few times), so by default they
+        are only tried again once they change.
+        Returns ``True`` if the entry has changed."""
+        try:
+            st = os.stat(self._abspath(relpath))
+        except OSError:
+            return False
+        if (st.st_mtime_ns, st.st_size) == (mtime, size) \
+                and (readable or not retry):
+            return False
+
+        try:
+            contents = all_datadicts_from_hdf5(self._abspath(relpath),
+                                               structure_only=True)
+        except (OSError, ValueError, RuntimeError, KeyError):
+            contents = None
+
+        self.conn.execute('DELETE FROM groups WHERE path = ?', (relpath,))
+        self.conn.execute('DELETE FROM fields WHERE path = ?', (relpath,))
+        self.conn.execute(
+            'INSERT OR REPLACE INTO files (path, dir, mtime, size, readable) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (relpath, os.path.dirname(relpath), st.st_mtime_ns, st.st_size,
+             int(contents is not None)))
+
+        for groupname, data in (contents or {}).items():
+            self._insertGroup(relpath, groupname, data)
+        return True
+
+    def _insertGroup(self, relpath: str, groupname: str, data: DataDict):
+        shapes = {k: tuple(int(n) for n in data.meta_val('shape', k))
+                  for k, _ in data.data_items()}
+        nrecords = min([s[0] for s in shapes.values() if len(s) > 0],
+                       default=0)
+        meta = {k: str(v) for k, v in data.meta_items()}
+        self.conn.execute(
+            'INSERT INTO groups (path, groupname, name, nrecords, meta) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (relpath, groupname, meta.get('dataset.name'), nrecords,
+             json.dumps(meta)))
+
+        for k, v in data.data_items():
+            fieldMeta = {kk: str(vv) for kk, vv in data.meta_items(k)
+                         if kk != 'shape'}
+            self.conn.execute(
+                'INSERT INTO fields (path, groupname, field, axes, unit, '
+                'shape, meta) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (relpath, groupname, k, json.dumps(list(v.get('axes', []))),
+                 v.get('unit', ''), json.dumps(shapes[k]),
+                 json.dumps(fieldMeta)))
+
+    # Queries #
+
+    def files(self) -> List[str]:
+        """Absolute paths of all data files in the catalog."""
+        return [self._abspath(r[0]) for r in self.conn.execute(
+            'SELECT path FROM files ORDER BY path')]
+
+    def structure(self, path: str) -> Dict[str, DataDict]:
+        """Get the structure of the data in a file, from the catalog.
+
+        Like :func:`.all_datadicts_from_hdf5` with ``structure_only=True``:
+        values are empty, and the full shapes are in the meta data ``shape``
+        of the fields. Other meta data is given as strings.
+
+        :param path: path of the file.
+        :return: dictionary with group names as keys and DataDicts as values.
+            Empty if the file is not (or not readable) in the catalog.
+        """
+        relpath = self._relpath(path)
+        ret = {}
+        for groupname, meta in self.conn.execute(
+                'SELECT groupname, meta FROM groups WHERE path = ? '
+                'ORDER BY groupname', (relpath,)).fetchall():
+            data = DataDict()
+            for field, axes, unit, shape, fieldMeta in self.conn.execute(
+                    'SELECT field, axes, unit, shape, meta FROM fields '
+                    'WHERE path = ? AND groupname = ?', (relpath, groupname)):
+                shape = tuple(json.loads(shape))
+                data[field] = dict(axes=json.loads(axes), unit=unit,
+                                   values=np.empty((0,) + shape[1:]))
+                for k, v in json.loads(fieldMeta).items():
+                    data.add_meta(k, v, data=field)
+                data.add_meta('shape', shape, data=field)
+            for k, v in json.loads(meta).items():
+                data.add_meta(k, v)
+            ret[groupname] = data
+        return ret
+
+    def find(self, name: Optional[str] = None,
+             field: Optional[str] = None) -> List[Tuple[str, str]]:
+        """Find groups of data in the catalog.
+
+        :param name: pattern for the dataset name (``dataset.name`` meta
+            data), with shell-style wildcards (``*``, ``?``).
+        :param field: pattern for the name of a field the data must contain.
+        :return: absolute file paths and group names of the matching data.
+        """
+        query = 'SELECT DISTINCT g.path, g.groupname FROM groups g'
+        conditions: List[str] = []
+        args: List[Any] = []
+        if field is not None:
+            query += (' JOIN fields f ON f.path = g.path '
+                      'AND f.groupname = g.groupname')
+            conditions.append('f.field GLOB ?')
+            args.append(field)
+        if name is not None:
+            conditions.append('g.name GLOB ?')
+            args.append(name)
+        if len(conditions) > 0:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY g.path, g.groupname'
+        return [(self._abspath(p), g)
+                for p, g in self.conn.execute(query, args)]
@@ -3,19 +3,29 @@ qcodes_dataset.py
 
 Dealing with qcodes dataset (the database) data in plottr.
 """
+import io
 import os
+import sqlite3
+import time
+import threading
+from pathlib import Path
 from itertools import chain
 from operator import attrgetter
-from typing import Dict, List, Set, Union, TYPE_CHECKING
+from typing import Any, Callable, Dict, List, Set, Tuple, TypeVar, Union, \
+    Optional, Sequence, TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
 
 from qcodes.dataset.data_set import load_by_id
 from qcodes.dataset.experiment_container import experiments
-from qcodes.dataset.sqlite.database import initialise_or_create_database_at
+from qcodes.dataset.sqlite.connection import ConnectionPlus
+from qcodes.dataset.sqlite.database import (
+    connect, get_db_version_and_newest_available_version)
 
 from .datadict import DataDictBase, DataDict, combine_datadicts
 from ..node.node import Node, updateOption
+from ..utils import num
 
 __author__ = 'Wolfgang Pfaff'
 __license__ = 'MIT'
@@ -35,6 +45,133 @@ def _get_names_of_standalone_parameters(paramspecs: List['ParamSpec']
     return standalones
 
 
+# Connections to databases
+
+def connect_readonly(path: str) -> sqlite3.Connection:
+    """
+    Open a read-only connection to a database file.
+
+    :param path: path of the database file.
+    :returns: sqlite connection that cannot modify the database.
+    """
+    uri = Path(path).absolute().as_uri() + '?mode=ro'
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+def connect_qcodes_readonly(path: str) -> ConnectionPlus:
+    """
+    Open a read-only connection to a qcodes database that can be used with
+    the qcodes API (i.e., values are converted like by qcodes' ``connect``).
+
+    In contrast to qcodes' ``connect`` this does not create the database.
+    Databases of an old version are upgraded once (like qcodes would) before
+    opening the read-only connection. The version check connects to the
+    database through qcodes, which also registers the converters of qcodes'
+    column types.
+
+    :param path: path of the database file.
+    :returns: read-only connection.
+    :raises: ``sqlite3.OperationalError`` if the database does not exist;
+        ``RuntimeError`` if the database is newer than supported by qcodes.
+    """
+    uri = Path(path).absolute().as_uri() + '?mode=ro'
+    conn = ConnectionPlus(sqlite3.connect(
+        uri, uri=True, detect_types=sqlite3.PARSE_DECLTYPES,
+        check_same_thread=False))
+    try:
+        version, latest = get_db_version_and_newest_available_version(path)
+        if version > latest:
+            raise RuntimeError(f"Database {path} is version {version}, which "
+                               f"is not supported by this version of qcodes.")
+        if version < latest:
+            connect(path).close()
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+_ConnectionType = TypeVar('_ConnectionType',
+                           sqlite3.Connection, ConnectionPlus)
+
+
+class ConnectionPool:
+    """
+    Read-only connections to qcodes databases, shared by everything in
+    plottr that reads from the same database file.
+
+    Connections are kept open and are per database path and thread (sqlite
+    connections must not be used by several threads at the same time).
+    Because connections are read-only, databases can be written to by
+    running measurements at the same time (also in WAL mode).
+    Using the pool does not change the database location in the qcodes
+    config.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections: Dict[Tuple[str, int], ConnectionPlus] = {}
+        self._rawConnections: Dict[Tuple[str, int], sqlite3.Connection] = {}
+
+    def _get(self, connections: Dict[Tuple[str, int], _ConnectionType],
+             path: str, open: Callable[[str], _ConnectionType]) \
+            -> _ConnectionType:
+        key = (os.path.abspath(path), threading.get_ident())
+        with self._lock:
+            conn = connections.get(key)
+            if conn is None:
+                conn = open(path)
+                connections[key] = conn
+        return conn
+
+    def connection(self, path: str) -> ConnectionPlus:
+        """
+        Get a read-only connection to a database, for use with the qcodes API.
+
+        :param path: path of the database file.
+        :returns: the connection; it is owned by the pool and must not be
+            closed by the caller.
+        """
+        return self._get(self._connections, path, connect_qcodes_readonly)
+
+    def raw_connection(self, path: str) -> sqlite3.Connection:
+        """
+        Get a plain read-only sqlite connection to a database, which does not
+        convert values (faster for reading many rows).
+
+        :param path: path of the database file.
+        :returns: the connection; it is owned by the pool and must not be
+            closed by the caller.
+        """
+        return self._get(self._rawConnections, path, connect_readonly)
+
+    def release(self, path: Optional[str] = None, all_threads: bool = False):
+        """
+        Close connections of the pool.
+
+        :param path: only close connections to this database. If ``None``,
+            close connections to all databases.
+        :param all_threads: if ``False``, only close the connections of the
+            current thread.
+        """
+        if path is not None:
+            path = os.path.abspath(path)
+
+        def selected(key: Tuple[str, int]) -> bool:
+            return (path is None or key[0] == path) and \
+                (all_threads or key[1] == threading.get_ident())
+
+        with self._lock:
+            for key in [k for k in self._connections if selected(k)]:
+                self._connections.pop(key).close()
+            for key in [k for k in self._rawConnections if selected(k)]:
+                self._rawConnections.pop(key).close()
+
+
+#: connections used for reading qcodes databases
+connection_pool = ConnectionPool()
+
+
 # Tools for extracting information on runs in a database
 
 def get_ds_structure(ds: 'DataSet'):
@@ -115,11 +252,10 @@ def load_dataset_from(path: str, run_id: int) -> 'DataSet':
     Loads ``DataSet`` with the given ``run_id`` from a database file that
     is located in in the given ``path``.
 
-    Note that after the call to this function, the database location in the
-    qcodes config of the current python process is changed to ``path``.
+    The dataset is loaded through a read-only connection from
+    ``connection_pool``; the qcodes config is not changed.
     """
-    initialise_or_create_database_at(path)
-    return load_by_id(run_id=run_id)
+    return load_by_id(run_id=run_id, conn=connection_pool.connection(path))
 
 
 def get_runs_from_db(path: str, start: int = 0,
@@ -135,11 +271,13 @@ def get_runs_from_db(path: str, start: int = 0,
 
     If `get_structure` is True, include info on the run data structure
     in the return dict.
-    """
-    initialise_or_create_database_at(path)
 
+    The database is read through a read-only connection from
+    ``connection_pool``; the qcodes config is not changed.
+    """
+    conn = connection_pool.connection(path)
     datasets = sorted(
-        chain.from_iterable(exp.data_sets() for exp in experiments()),
+        chain.from_iterable(exp.data_sets() for exp in experiments(conn)),
         key=attrgetter('run_id')
     )
 
@@ -152,59 +290,339 @@ def get_runs_from_db(path: str, start: int = 0,
     return overview
 
 
+def _split_timestamp(raw: Optional[float]) -> Tuple[str, str]:
+    """Date and time of a raw timestamp, formatted like by qcodes."""
+    if raw is None:
+        return '', ''
+    ts = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(raw))
+    return ts[:10], ts[11:]
+
+
+def get_runs_overview(path: str, after_run_id: int = 0,
+                      run_ids: Sequence[int] = ()) \
+        -> Dict[int, Dict[str, Any]]:
+    """
+    Get an overview of the runs in a database, read directly from its
+    runs and experiments tables (without creating ``DataSet`` objects).
+
+    Only runs with a run id larger than ``after_run_id`` (and those in
+    ``run_ids``) are included, such that an overview can be updated with
+    new runs cheaply.
+
+    :param path: path of the database file.
+    :param after_run_id: only include runs with a larger run id.
+    :param run_ids: also include these runs (for instance, to update runs
+        that were not completed before).
+    :returns: dictionary mapping run ids to run information in the format of
+        ``get_ds_info`` (without structure), sorted by run id.
+    """
+    conn = connection_pool.raw_connection(path)
+    run_ids = [int(i) for i in run_ids if i <= after_run_id]
+    query = 'SELECT runs.run_id, experiments.name, experiments.sample_name, ' \
+            'runs.name, runs.run_timestamp, runs.completed_timestamp, ' \
+            'runs.guid, runs.result_table_name FROM runs ' \
+            'JOIN experiments ON runs.exp_id = experiments.exp_id ' \
+            'WHERE runs.run_id > ?'
+    if len(run_ids) > 0:
+        query += f' OR runs.run_id IN ({", ".join("?" * len(run_ids))})'
+    query += ' ORDER BY runs.run_id'
+    rows = conn.execute(query, [after_run_id] + run_ids).fetchall()
+
+    overview = {}
+    for run_id, exp, sample, name, started, completed, guid, table in rows:
+        # rows of the results tables are never deleted, so the last id is
+        # the number of records.
+        try:
+            nrecords = conn.execute(
+                f'SELECT MAX(id) FROM "{table}"').fetchone()[0] or 0
+        except sqlite3.OperationalError:
+            nrecords = 0
+        completed_date, completed_time = _split_timestamp(completed)
+        started_date, started_time = _split_timestamp(started)
+        overview[run_id] = {
+            'experiment': exp,
+            'sample': sample,
+            'name': name,
+            'completed date': completed_date,
+            'completed time': completed_time,
+            'started date': started_date,
+            'started time': started_time,
+            'records': nrecords,
+            'guid': guid,
+        }
+    return overview
+
+
 def get_runs_from_db_as_dataframe(path):
     """
-    Wrapper around `get_runs_from_db` that returns the overview
+    Get the overview of all runs in a database (see ``get_runs_overview``)
     as pandas dataframe.
     """
-    overview = get_runs_from_db(path)
+    overview = get_runs_overview(path)
     df = pd.DataFrame.from_dict(overview, orient='index')
     return df
 
 
+def update_runs_dataframe(path: str,
+                          df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Update a run overview dataframe (as returned by
+    ``get_runs_from_db_as_dataframe``) with the runs that are new in the
+    database or were not completed yet.
+
+    :param path: path of the database file.
+    :param df: previous overview of the database. If ``None`` or empty, get
+        the overview of all runs.
+    :returns: the updated overview (a new dataframe).
+    """
+    if df is None or df.size == 0:
+        return get_runs_from_db_as_dataframe(path)
+
+    incomplete = df.index[df['completed date'] == ''].tolist()
+    overview = get_runs_overview(path, after_run_id=int(df.index.max()),
+                                 run_ids=incomplete)
+    if len(overview) == 0:
+        return df
+    new = pd.DataFrame.from_dict(overview, orient='index')
+    return pd.concat([df.drop(index=new.index, errors='ignore'), new]) \
+        .sort_index()
+
+
 # Extracting data
 
-def ds_to_datadicts(ds: 'DataSet') -> Dict[str, DataDict]:
+def get_last_result_id(ds: 'DataSet',
+                       conn: Optional[sqlite3.Connection] = None) -> int:
+    """
+    Get the id of the last row in the results table of a run.
+
+    Rows are only ever appended to the results table, so this can be used to
+    check for new results without counting all rows.
+
+    :param ds: qcodes dataset
+    :param conn: connection to use. If ``None``, use that of the dataset.
+    :returns: id of the last row, ``0`` if the run has no results yet.
+    """
+    c: Union[sqlite3.Connection, ConnectionPlus] = \
+        ds.conn if conn is None else conn
+    row = c.execute(f'SELECT MAX(id) FROM "{ds.table_name}"').fetchone()
+    return 0 if row[0] is None else int(row[0])
+
+
+def get_parameter_data_bulk(ds: 'DataSet', *params: str,
+                            after_id: int = 0,
+                            max_id: Optional[int] = None,
+                            conn: Optional[sqlite3.Connection] = None) \
+        -> Optional[Dict[str, Dict[str, np.ndarray]]]:
+    """
+    Read the data of dependents of a run straight from its results table.
+
+    Unlike ``DataSet.get_parameter_data``, the results table is read with a
+    single query for all dependents, and columns are converted into arrays in
+    bulk. Dependents with the same axis values share the arrays of their
+    axes (i.e., each axis is returned only once).
+
+    Only runs with scalar (numeric, text, complex) parameters and without
+    declared shapes are supported. The run is read through a separate,
+    read-only connection to its database file.
+
+    With ``after_id`` and ``max_id`` only a range of rows is read, such that
+    runs that are still being written to can be loaded incrementally.
+
+    :param ds: qcodes dataset
+    :param params: names of the dependents to load.
+    :param after_id: only read rows with an id larger than this.
+    :param max_id: if not ``None``, only read rows up to (including) this id.
+    :param conn: read-only connection to the database of the run. If
+        ``None``, a raw connection from ``connection_pool`` is used.
+    :returns: data in the format of ``DataSet.get_parameter_data``, i.e.,
+        ``{dependent: {name: values}}`` with the dependent and its axes.
+        ``None`` if the run is not supported.
+    """
+    specs = ds.paramspecs
+    names = list(params)
+    for p in params:
+        names += [ax for ax in specs[p].depends_on_ if ax not in names]
+
+    path = ds.path_to_db
+    if any(specs[n].type == 'array' for n in names) \
+            or ds.description.shapes is not None \
+            or path is None or not os.path.isfile(path):
+        return None
+
+    # numeric columns first, such that we can convert them together.
+    numeric = [n for n in names if specs[n].type == 'numeric']
+    other = [n for n in names if n not in numeric]
+    selection = [f'"{n}"' for n in numeric + other]
+    notnull = [f'"{p}" IS NOT NULL' for p in params]
+    query = f'SELECT {", ".join(selection + notnull)} ' \
+            f'FROM "{ds.table_name}" ' \
+            f'WHERE ({" OR ".join(notnull)}) AND id > ?'
+    args = [after_id]
+    if max_id is not None:
+        query += ' AND id <= ?'
+        args.append(max_id)
+
+    if conn is None:
+        conn = connection_pool.raw_connection(path)
+    rows = conn.execute(query, args).fetchall()
+
+    # without text/complex columns we can convert the whole table at once.
+    table = np.array(rows, dtype=object if len(other) > 0 else float)
+    table = table.reshape(len(rows), len(selection) + len(notnull))
+    columns = {}
+    if len(numeric) > 0:
+        vals = table[:, :len(numeric)].astype(float)
+        columns.update({n: vals[:, i] for i, n in enumerate(numeric)})
+    for i, n in enumerate(other):
+        col = table[:, len(numeric) + i]
+        if specs[n].type == 'complex':
+            columns[n] = np.array(
+                [np.load(io.BytesIO(v))[0] if v is not None else np.nan
+                 for v in col], dtype=complex)
+        else:
+            columns[n] = np.array(col.tolist())
+    masks = table[:, len(names):].astype(bool)
+
+    # qcodes stores each dependent in rows of its own; axis values that are
+    # the same for several dependents are only kept once.
+    ret: Dict[str, Dict[str, np.ndarray]] = {}
+    axes: Dict[str, List[np.ndarray]] = {}
+    for i, p in enumerate(params):
+        ret[p] = {p: columns[p][masks[:, i]]}
+        for n in specs[p].depends_on_:
+            vals = columns[n][masks[:, i]]
+            for prev in axes.setdefault(n, []):
+                if np.array_equal(prev, vals):
+                    vals = prev
+                    break
+            else:
+                axes[n].append(vals)
+            ret[p][n] = vals
+    return ret
+
+
+def ds_to_datadicts(ds: 'DataSet',
+                    parameters: Optional[Sequence[str]] = None) \
+        -> Dict[str, DataDict]:
     """
     Make DataDicts from a qcodes DataSet.
 
     :param ds: qcodes dataset
+    :param parameters: names of the dependents to load. If ``None``, load all.
     :returns: dictionary with one item per dependent.
               key: name of the dependent
               value: DataDict containing that dependent and its
                      axes.
     """
-    ret = {}
-    pdata = ds.get_parameter_data()
-    for p, spec in ds.paramspecs.items():
-        if spec.depends_on != '':
-            axes = spec.depends_on_
-            data = dict()
-            data[p] = dict(unit=spec.unit, axes=axes, values=pdata[p][p])
-            for ax in axes:
-                axspec = ds.paramspecs[ax]
-                data[ax] = dict(unit=axspec.unit, values=pdata[p][ax])
-            ret[p] = DataDict(**data)
-            ret[p].validate()
+    ret: Dict[str, DataDict] = {}
+    deps = [p for p, spec in ds.paramspecs.items() if spec.depends_on != ''
+            and (parameters is None or p in parameters)]
+    if len(deps) == 0:
+        return ret
+
+    pdata = get_parameter_data_bulk(ds, *deps)
+    if pdata is None:
+        pdata = ds.get_parameter_data(*deps)
+    for p in deps:
+        ret[p] = _datadict_from_parameter_data(ds, p, pdata[p])
 
     return ret
 
 
-def ds_to_datadict(ds: 'DataSet') -> DataDictBase:
-    ddicts = ds_to_datadicts(ds)
-    ddict = combine_datadicts(*[v for k, v in ddicts.items()])
-    return ddict
+def _datadict_from_parameter_data(ds: 'DataSet', dependent: str,
+                                  values: Dict[str, np.ndarray]) -> DataDict:
+    """
+    Make the DataDict of a dependent from its values (and those of its axes)
+    as returned by ``DataSet.get_parameter_data``.
+    """
+    axes = ds.paramspecs[dependent].depends_on_
+    data = dict()
+    data[dependent] = dict(unit=ds.paramspecs[dependent].unit, axes=axes,
+                           values=values[dependent])
+    for ax in axes:
+        axspec = ds.paramspecs[ax]
+        data[ax] = dict(unit=axspec.unit, values=values[ax])
+    ret = DataDict(**data)
+    ret.validate()
+    return ret
+
+
+def _combine_dependents(ds: 'DataSet',
+                        ddicts: Dict[str, DataDict]) -> DataDictBase:
+    """
+    Combine the DataDicts of (some of) the dependents of a dataset.
+
+    Dependents that are not in ``ddicts`` are included without values, such
+    that the result always contains the full structure of the dataset.
+    In that case, the result is a DataDictBase.
+    """
+    if len(ddicts) > 0:
+        ret = combine_datadicts(*[v for k, v in ddicts.items()])
+    else:
+        ret = DataDictBase()
+
+    missing = [p for p, spec in ds.paramspecs.items()
+               if spec.depends_on != '' and p not in ddicts]
+    if len(missing) == 0:
+        return ret
+
+    ret = DataDictBase(**ret)
+    for p in missing:
+        spec = ds.paramspecs[p]
+        for ax in spec.depends_on_:
+            if ax not in ret:
+                ret[ax] = dict(unit=ds.paramspecs[ax].unit,
+                               values=np.array([]))
+        ret[p] = dict(unit=spec.unit, axes=list(spec.depends_on_),
+                      values=np.array([]))
+    ret.validate()
+    return ret
+
+
+def ds_to_datadict(ds: 'DataSet',
+                   parameters: Optional[Sequence[str]] = None) \
+        -> DataDictBase:
+    """
+    Make a DataDict from a qcodes DataSet.
+
+    :param ds: qcodes dataset
+    :param parameters: names of the dependents to load. If ``None``, load all.
+        Other dependents are included without values.
+    :returns: DataDict with all dependents and their axes. If not all
+              dependents are loaded, a DataDictBase.
+    """
+    ddicts = ds_to_datadicts(ds, parameters)
+    return _combine_dependents(ds, ddicts)
 
 
 ### qcodes dataset loader node
 
 class QCodesDSLoader(Node):
+    """Node that loads a DataDict from a qcodes dataset.
+
+    If ``projection`` is set to a list of dependents, only those (and their
+    axes) are loaded; all other dependents are included without values.
+    Changing the projection only loads the dependents that are newly
+    required.
+
+    The dataset is kept for as long as ``pathAndId`` does not change;
+    reading uses read-only connections from ``connection_pool``. On updates,
+    only rows of the results table that have been added since the last
+    update are read, and appended to the loaded data. ``nLoadedRecords`` is the id of the
+    last row of the results table that has been loaded.
+    Runs that cannot be read in bulk (see ``get_parameter_data_bulk``) are
+    reloaded completely when new results arrive.
+    """
     nodeName = 'QCodesDSLoader'
     uiClass = None
     useUi = False
 
     def __init__(self, *arg, **kw):
         self._pathAndId = (None, None)
+        self._projection = None
+        self._ds: Optional['DataSet'] = None
+        self._loaded: Dict[str, DataDict] = {}
+        self._buffers: Dict[str, Dict[str, np.ndarray]] = {}
         self.nLoadedRecords = 0
 
         super().__init__(*arg, **kw)
@@ -220,17 +638,80 @@ class QCodesDSLoader(Node):
     def pathAndId(self, val):
         if val != self.pathAndId:
             self._pathAndId = val
-            self.nLoadedRecords = 0
+            self.closeDataset()
+
+    @property
+    def projection(self):
+        return self._projection
+
+    @projection.setter
+    @updateOption('projection')
+    def projection(self, val):
+        if isinstance(val, str):
+            val = [val]
+        self._projection = val
 
     ### processing
 
+    def closeDataset(self):
+        """Forget the dataset and all loaded data."""
+        self._ds = None
+        self._loaded = {}
+        self._buffers = {}
+        self.nLoadedRecords = 0
+
+    def _loadRecords(self, ds: 'DataSet', params: List[str], after_id: int,
+                     max_id: int) -> bool:
+        """
+        Load the rows with ids in ``(after_id, max_id]`` of the given
+        dependents of ``ds``, and append them to the loaded data.
+        If ``after_id`` is 0, previously loaded data is replaced.
+
+        :returns: ``False`` if the run cannot be read in bulk.
+        """
+        pdata = get_parameter_data_bulk(ds, *params, after_id=after_id,
+                                        max_id=max_id)
+        if pdata is None:
+            return False
+
+        for p, values in pdata.items():
+            if after_id == 0 or p not in self._loaded:
+                self._buffers[p] = {}
+                nrows = 0
+            else:
+                nrows = np.shape(self._loaded[p].data_vals(p))[0]
+            buffers = self._buffers[p]
+            for n, vals in values.items():
+                buffers[n] = num.append_rows(buffers.get(n), nrows, vals)
+                values[n] = buffers[n][:nrows + vals.shape[0]]
+            self._loaded[p] = _datadict_from_parameter_data(ds, p, values)
+        return True
+
     def process(self, **kw):
         if None not in self._pathAndId:
             path, runId = self._pathAndId
 
-            ds = load_dataset_from(path, runId)
-
-            if ds.number_of_results > self.nLoadedRecords:
+            if self._ds is None:
+                self._ds = load_dataset_from(path, runId)
+            ds = self._ds
+
+            lastId = get_last_result_id(ds)
+            deps = [p for p, spec in ds.paramspecs.items()
+                    if spec.depends_on != '']
+            if self._projection is not None:
+                deps = [p for p in deps if p in self._projection]
+            missing = [p for p in deps if p not in self._loaded]
+
+            if lastId > self.nLoadedRecords or \
+                    (lastId > 0 and len(missing) > 0):
+                if lastId > self.nLoadedRecords and len(self._loaded) > 0:
+                    if not self._loadRecords(ds, list(self._loaded),
+                                             self.nLoadedRecords, lastId):
+                        self._loaded = {}
+                        missing = deps
+                if len(missing) > 0 and \
+                        not self._loadRecords(ds, missing, 0, lastId):
+                    self._loaded.update(ds_to_datadicts(ds, missing))
 
                 guid = ds.guid
                 title = f"{os.path.split(path)[-1]} | " \
@@ -241,7 +722,7 @@ GUID: {}
 DB-File [ID]: {} [{}]""".format(ds.run_timestamp(), ds.completed_timestamp(),
                                 guid, path, runId)
 
-                data = ds_to_datadict(ds)
+                data = _combine_dependents(ds, self._loaded)
                 data.add_meta('title', title)
                 data.add_meta('info', info)
                 data.add_meta('qcodes_guid', guid)
@@ -249,5 +730,5 @@ DB-File [ID]: {} [{}]""".format(ds.run_timestamp(), ds.completed_timestamp(),
                 data.add_meta('qcodes_runId', runId)
                 data.add_meta('qcodes_completedTS', ds.completed_timestamp())
                 data.add_meta('qcodes_runTS', ds.run_timestamp())
-                self.nLoadedRecords = ds.number_of_results
+                self.nLoadedRecords = lastId
                 return dict(dataOut=data)
@@ -5,8 +5,9 @@ A node and widget for subselecting from a dataset.
 """
 from typing import List, Tuple, Dict, Any
 
+from .. import Signal
 from .node import Node, NodeWidget, updateOption
-from ..data.datadict import DataDictBase, DataDict
+from ..data.datadict import DataDictBase, DataDict, VALUE_META_KEYS
 from ..gui.data_display import DataSelectionWidget
 from plottr.icons import dataColumnsIcon
 from ..utils import num
@@ -69,6 +70,10 @@ class DataSelector(Node):
 
     Properties of this node:
     :selectedData: list of strings with compatible dependents.
+
+    Changes of the selection are announced through ``selectedDataChanged``
+    before the node is updated; loader nodes can use that to load only the
+    selected data (see ``projection`` of the loaders).
     """
 
     # TODO: allow the user to control dtypes.
@@ -78,6 +83,10 @@ class DataSelector(Node):
 
     force_numerical_data = True
 
+    #: signal emitted when the selection changes.
+    #: emits the list of selected data fields.
+    selectedDataChanged = Signal(list)
+
     def __init__(self, *arg, **kw):
         super().__init__(*arg, **kw)
 
@@ -96,6 +105,7 @@ class DataSelector(Node):
         if isinstance(val, str):
             val = [val]
         self._selectedData = val
+        self.selectedDataChanged.emit(list(val))
 
     # Data processing
 
@@ -136,15 +146,19 @@ class DataSelector(Node):
         if len(self.selectedData) == 0:
             return None
 
-        ret = data.extract(dnames)
+        # only the extracted fields are read if the data is loaded lazily.
+        ret = data.extract(dnames, sanitize=False).materialize().sanitize()
         if self.force_numerical_data:
-            for d, _ in ret.data_items():
+            for d, v in ret.data_items():
                 dt = num.largest_numtype(ret.data_vals(d),
                                          include_integers=False)
-                if dt is not None:
-                    ret[d]['values'] = ret[d]['values'].astype(dt)
-                else:
+                if dt is None:
                     return None
+                vals = v['values']
+                if vals.dtype != dt:
+                    # casting does not change the limits of the values.
+                    v.update(values=vals.astype(dt, copy=False),
+                             **{m: v[m] for m in VALUE_META_KEYS if m in v})
 
         return ret
 
@@ -451,8 +451,52 @@ class DimensionReducer(Node):
 
     # Data processing
 
-    def _applyDimReductions(self, data):
+    def _selectElements(self, data):
+        """
+        Apply element selections on grid data by selecting the sub-grid
+        (this only creates views of the data, see
+        :meth:`MeshgridDataDict.isel`).
+
+        :returns: the data, and the reductions that remain to be applied.
+        """
+        reductions = dict(self._reductions)
+        if not isinstance(data, MeshgridDataDict) or \
+                (self._targetNames is not None and
+                 set(data.dependents()) - set(self._targetNames)):
+            return data, reductions
+
+        indexers = {}
+        axes = data.axes()
+        shape = data.shape()
+        remaining = list(axes)
+        for ax, reduction in self._reductions.items():
+            if reduction is None or ax not in axes:
+                continue
+            fun, arg, kw = reduction
+            if fun is ReductionMethod.elementSelection:
+                index = kw.get('index', arg[0] if len(arg) > 0 else None)
+                # indices outside the grid (e.g., of a grid that is still
+                # growing) are left to _applyDimReductions.
+                size = shape[axes.index(ax)] \
+                    if shape is not None and len(shape) == len(axes) else 0
+                if isinstance(index, (int, np.integer)) \
+                        and -size <= index < size:
+                    # the options report the axis like _applyDimReductions
+                    # does: counted after removing the axes reduced before.
+                    kw['axis'] = remaining.index(ax)
+                    indexers[ax] = int(index)
+                    del reductions[ax]
+            remaining.remove(ax)
+
+        if len(indexers) > 0:
+            data = data.isel(**indexers)
+        return data, reductions
+
+    def _applyDimReductions(self, data, reductions=None):
         """Apply the reductions"""
+        if reductions is None:
+            reductions = self._reductions
+
         if self._targetNames is not None:
             dnames = self._targetNames
         else:
@@ -464,7 +508,7 @@ class DimensionReducer(Node):
                                 f"axes will simply be removed.")
 
         for n in dnames:
-            for ax, reduction in self._reductions.items():
+            for ax, reduction in reductions.items():
                 if reduction is not None:
                     fun, arg, kw = reduction
                 else:
@@ -510,7 +554,8 @@ class DimensionReducer(Node):
                             newaxvals = funCall(data[ax]['values'], *arg, **kw)
                             data[ax]['values'] = newaxvals
 
-                del data[n]['axes'][idx]
+                data[n]['axes'] = [a for i, a in enumerate(data[n]['axes'])
+                                   if i != idx]
 
         data = data.sanitize()
         data.validate()
@@ -585,9 +630,10 @@ class DimensionReducer(Node):
         if data is None:
             return None
 
-        data = data['dataOut'].copy()
+        data = data['dataOut'].copy(shared=True)
+        data, reductions = self._selectElements(data)
         data = data.mask_invalid()
-        data = self._applyDimReductions(data)
+        data = self._applyDimReductions(data, reductions)
 
         return dict(dataOut=data)
 
@@ -783,7 +829,7 @@ class XYSelector(DimensionReducer):
         data = super().process(dataIn=data)
         if data is None:
             return None
-        data = data['dataOut'].copy()
+        data = data['dataOut'].copy(shared=True)
 
         if self._xyAxes[0] is not None and self._xyAxes[1] is not None:
             _kw = {self._xyAxes[0]: 0, self._xyAxes[1]: 1}
@@ -99,13 +99,14 @@ class SubtractAverage(Node):
         if super().process(dataIn=dataIn) is None:
             return None
 
-        data = dataIn.copy()
+        data = dataIn.copy(shared=True)
         if self._averagingAxis in self.dataAxes and \
                 self.dataType == MeshgridDataDict:
             axidx = self.dataAxes.index(self._averagingAxis)
             for dep in dataIn.dependents():
-                avg = data.data_vals(dep).mean(axis=axidx, keepdims=True)
-                data[dep]['values'] -= avg
+                vals = data.data_vals(dep)
+                data[dep]['values'] = vals - vals.mean(axis=axidx,
+                                                       keepdims=True)
 
         return dict(dataOut=data)
 
@@ -445,7 +445,7 @@ class DataGridder(Node):
         data = super().process(dataIn=dataIn)
         if data is None:
             return None
-        data = data['dataOut'].copy()
+        data = data['dataOut'].copy(shared=True)
         self.axesList.emit(data.axes())
 
         dout = None
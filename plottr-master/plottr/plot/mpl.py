@@ -749,8 +749,23 @@ class AutoPlot(_MPLPlotWidget):
     If the input data is complex, the user has the option to plot real/imaginary
     parts, or magnitude and phase. Real/Imaginary are plotted in the same panel,
     whereas magnitude and phase are separated into two panels.
+
+    **View limits:**
+
+    When the user zooms or pans, :attr:`viewLimitsChanged` is emitted with the
+    visible range of the axes. The view is kept when new data with the same
+    structure is plotted (for instance, data at a different resolution).
     """
 
+    #: Signal(dict) -- emitted when the user changes the visible range of the
+    #: plot. Argument: ``{name: (min, max)}`` for each axis that is not shown
+    #: completely (empty if all data is visible).
+    viewLimitsChanged = Signal(dict)
+
+    #: delay (in ms) after the last change of the view before
+    #: :attr:`viewLimitsChanged` is emitted.
+    viewLimitsDelay = 250
+
     def __init__(self, parent=None):
         super().__init__(parent=parent)
 
@@ -764,6 +779,18 @@ class AutoPlot(_MPLPlotWidget):
         self.dataShapes = None
         self.dataLimits = None
 
+        # axes of the current plot, and the data axes shown on them (x, y).
+        self._plotAxes: List[Axes] = []
+        self._axesNames: List[str] = []
+        self._plotting = False
+        self._viewLimits: Dict[str, Tuple[float, float]] = {}
+        self._viewRegion: Dict[str, Tuple[float, float]] = {}
+
+        self._viewTimer = QtCore.QTimer(self)
+        self._viewTimer.setSingleShot(True)
+        self._viewTimer.setInterval(self.viewLimitsDelay)
+        self._viewTimer.timeout.connect(self._emitViewLimits)
+
         # A toolbar for configuring the plot
         self.plotOptionsToolBar = _AutoPlotToolBar('Plot options', self)
         self.layout.insertWidget(1, self.plotOptionsToolBar)
@@ -792,8 +819,14 @@ class AutoPlot(_MPLPlotWidget):
             dataShapes = data.shapes()
             dataLimits = {}
             for n in data.axes() + data.dependents():
-                vals = data.data_vals(n)
-                dataLimits[n] = vals.min(), vals.max()
+                # use the limits from the meta data, if the source gives them
+                # (they are removed when the values are changed).
+                meta = dict(data.meta_items(n))
+                if 'limits' in meta:
+                    dataLimits[n] = tuple(meta['limits'])
+                else:
+                    vals = data.data_vals(n)
+                    dataLimits[n] = (vals.min(), vals.max())
 
         result = {
             'dataTypeChanged': dataType != self.dataType,
@@ -836,6 +869,10 @@ class AutoPlot(_MPLPlotWidget):
 
         changes = self._analyzeData(data)
         self.plotDataType = determinePlotDataType(data)
+        if changes['dataStructureChanged']:
+            self._viewLimits = {}
+            if len(self._viewRegion) > 0:
+                self._viewTimer.start()
 
         self._processPlotTypeOptions()
         self._plotData(adjustSize=True)
@@ -883,8 +920,43 @@ class AutoPlot(_MPLPlotWidget):
         nrows = int(nAxes ** .5 + .5)
         ncols = np.ceil(nAxes / nrows)
         axes = self.plot.clearFig(nrows, ncols, nAxes)
+
+        self._plotAxes = list(axes)
+        for ax in self._plotAxes:
+            ax.callbacks.connect('xlim_changed', self._viewChanged)
+            ax.callbacks.connect('ylim_changed', self._viewChanged)
         return axes
 
+    def _viewChanged(self, ax: Axes):
+        if not self._plotting:
+            self._viewTimer.start()
+
+    def _emitViewLimits(self):
+        """Record the view limits set by the user, and emit
+        :attr:`viewLimitsChanged` if the visible region has changed."""
+        if len(self._plotAxes) == 0:
+            return
+
+        ax = self._plotAxes[0]
+        limits = dict(zip(self._axesNames, [ax.get_xlim(), ax.get_ylim()]))
+        region = {}
+        for name, (lo, hi) in limits.items():
+            dmin, dmax = (self.dataLimits or {}).get(name, (None, None))
+            if dmin is None or not min(lo, hi) <= dmin <= dmax <= max(lo, hi):
+                region[name] = (min(lo, hi), max(lo, hi))
+
+        self._viewLimits = limits if len(region) > 0 else {}
+        if region != self._viewRegion:
+            self._viewRegion = region
+            self.viewLimitsChanged.emit(region)
+
+    def _restoreViewLimits(self):
+        for ax in self._plotAxes:
+            for name, setLim in zip(self._axesNames,
+                                    [ax.set_xlim, ax.set_ylim]):
+                if name in self._viewLimits:
+                    setLim(self._viewLimits[name])
+
     def _plotData(self, adjustSize: bool = False):
         """Plot the data using previously determined data and plot types."""
 
@@ -900,23 +972,32 @@ class AutoPlot(_MPLPlotWidget):
         else:
             self.complexRepresentation = self.complexPreference
 
-        if self.plotType is PlotType.multitraces:
-            logger.debug(f"Plotting lines in a single panel")
-            self._plot1dSinglepanel()
+        self._plotting = True
+        try:
+            if self.plotType is PlotType.multitraces:
+                logger.debug(f"Plotting lines in a single panel")
+                self._plot1dSinglepanel()
+                self._axesNames = self.data.axes()[:1]
+
+            elif self.plotType is PlotType.singletraces:
+                logger.debug(f"Plotting one line per panel")
+                self._plot1dSeparatePanels()
+                self._axesNames = self.data.axes()[:1]
+
+            elif self.plotType in [PlotType.image,
+                                   PlotType.colormesh,
+                                   PlotType.scatter2d]:
+                logger.debug(f"Plot 2D data.")
+                self._colorplot2d()
+                self._axesNames = self.data.axes()[:2]
 
-        elif self.plotType is PlotType.singletraces:
-            logger.debug(f"Plotting one line per panel")
-            self._plot1dSeparatePanels()
-
-        elif self.plotType in [PlotType.image,
-                               PlotType.colormesh,
-                               PlotType.scatter2d]:
-            logger.debug(f"Plot 2D data.")
-            self._colorplot2d()
+            else:
+                logger.info(f"No plot routine defined for {self.plotType}")
+                return
 
-        else:
-            logger.info(f"No plot routine defined for {self.plotType}")
-            return
+            self._restoreViewLimits()
+        finally:
+            self._plotting = False
 
         self.setMeta(self.data)
         if adjustSize:
@@ -2,14 +2,15 @@
 
 Tools for numerical operations.
 """
-from typing import Sequence, Tuple, Union, List
+import weakref
+from typing import Dict, Sequence, Tuple, Union, List
 
 import numpy as np
 import pandas as pd
 
-INTTYPES = [int, np.int, np.int16, np.int32, np.int64]
-FLOATTYPES = [float, np.float, np.float16, np.float32, np.float64,
-              complex, np.complex, np.complex64, np.complex128]
+INTTYPES = [int, np.int8, np.int16, np.int32, np.int64]
+FLOATTYPES = [float, np.float16, np.float32, np.float64,
+              complex, np.complex64, np.complex128]
 NUMTYPES = INTTYPES + FLOATTYPES
 
 
@@ -52,13 +53,36 @@ def _are_equal(a, b):
     return a == b
 
 
-def is_invalid(a):
-    isnone = a == None
-    if a.dtype in FLOATTYPES:
-        isnan = np.isnan(a)
+def _is_inexact(dtype: np.dtype) -> bool:
+    return np.issubdtype(dtype, np.inexact)
+
+
+def _invalid_entries(a: np.ndarray) -> np.ndarray:
+    if _is_inexact(a.dtype):
+        return np.isnan(a)
+    elif a.dtype.kind in 'Mm':
+        return np.isnat(a)
+    elif a.dtype.kind == 'O':
+        return a == None
     else:
-        isnan = np.zeros(a.shape, dtype=bool)
-    return isnone | isnan
+        return np.zeros(a.shape, dtype=bool)
+
+
+def is_invalid(a: Union[Sequence, np.ndarray]) -> np.ndarray:
+    """
+    Get the invalid entries of an array.
+
+    Invalid are ``nan`` for float and complex dtypes, ``NaT`` for datetimes,
+    ``None`` for object arrays, and masked entries of masked arrays; integer
+    arrays have no invalid entries.
+
+    :param a: input array
+    :return: boolean array of the same shape, ``True`` where ``a`` is invalid.
+    """
+    if isinstance(a, np.ma.MaskedArray):
+        return np.ma.getmaskarray(a) | _invalid_entries(np.ma.getdata(a))
+
+    return _invalid_entries(np.asarray(a))
 
 
 def _are_invalid(a, b):
@@ -95,7 +119,7 @@ def arrays_equal(a: np.ndarray, b: np.ndarray,
             return False
 
     close = np.zeros(a.shape, dtype=bool)
-    if a.dtype in FLOATTYPES and b.dtype in FLOATTYPES:
+    if _is_inexact(a.dtype) and _is_inexact(b.dtype):
         close = _are_close(a, b, rtol=rtol)
 
     equal = _are_equal(a, b)
@@ -104,6 +128,94 @@ def arrays_equal(a: np.ndarray, b: np.ndarray,
     return np.all(equal | close | invalid)
 
 
+def append_rows(buf: Union[None, np.ndarray], nrows: int, new: np.ndarray,
+                growth: float = 2.) -> np.ndarray:
+    """
+    Append rows to a buffer array that may have spare capacity.
+
+    The first ``nrows`` rows of ``buf`` are considered filled, ``new`` is
+    written behind them. If the capacity of ``buf`` is not sufficient, a new
+    buffer with a capacity larger by ``growth`` is allocated, such that adding
+    data row by row has amortized constant cost per row.
+
+    :param buf: the buffer. If ``None``, a new buffer is allocated.
+    :param nrows: number of filled rows in ``buf``.
+    :param new: rows to append; inner shape must match that of the buffer.
+    :param growth: factor by which the capacity grows if required.
+    :return: the buffer holding all rows (can be a new array). Only the first
+             ``nrows + len(new)`` rows are valid.
+    :raises: ``ValueError`` if the inner shapes don't match.
+    """
+    new = np.asarray(new)
+    if buf is None:
+        buf = np.empty((0,) + new.shape[1:], dtype=new.dtype)
+        nrows = 0
+
+    if buf.shape[1:] != new.shape[1:]:
+        raise ValueError(f'Inner shapes do not match: '
+                         f'{buf.shape[1:]} and {new.shape[1:]}.')
+
+    nnew = nrows + new.shape[0]
+    dtype = np.result_type(buf, new)
+    if nnew > buf.shape[0] or dtype != buf.dtype:
+        cap = max(nnew, int(buf.shape[0] * growth))
+        newbuf = np.empty((cap,) + buf.shape[1:], dtype=dtype)
+        newbuf[:nrows] = buf[:nrows]
+        buf = newbuf
+
+    buf[nrows:nnew] = new
+    return buf
+
+
+#: number of filled rows of the buffers allocated by ``append_amortized``,
+#: by id of the buffer. Entries are removed when the buffer is freed.
+_filled_rows: Dict[int, int] = {}
+
+
+def append_amortized(vals: Union[Sequence, np.ndarray],
+                     new: Union[Sequence, np.ndarray],
+                     growth: float = 2.) -> np.ndarray:
+    """
+    Append rows to an array, with amortized constant cost per row.
+
+    Like ``np.append(vals, new, axis=0)``, but the result is a view of the
+    filled rows of a buffer with spare capacity (see ``append_rows``). If
+    ``vals`` is such a view, and no rows have been appended to it yet, the
+    new rows are written into the spare capacity of its buffer instead of
+    copying all data. ``vals`` itself is never changed, i.e., appending
+    repeatedly to the same array (instead of the returned one) is safe,
+    but copies the data. Read-only views are always copied.
+
+    :param vals: array to append to.
+    :param new: rows to append; inner shape must match that of ``vals``.
+    :param growth: factor by which the capacity grows if required.
+    :return: array with the rows of ``vals`` and ``new``.
+    :raises: ``ValueError`` if the inner shapes don't match.
+    """
+    if isinstance(vals, np.ma.MaskedArray) or \
+            isinstance(new, np.ma.MaskedArray):
+        return np.append(vals, new, axis=0)
+
+    arr = np.asarray(vals)
+    rows = np.asarray(new)
+    nrows = arr.shape[0]
+    buf = arr.base
+    owned = isinstance(buf, np.ndarray) and arr.flags.writeable \
+        and _filled_rows.get(id(buf)) == nrows \
+        and buf.shape[1:] == arr.shape[1:] \
+        and arr.ctypes.data == buf.ctypes.data
+    if not owned:
+        buf = arr
+
+    newbuf = append_rows(buf, nrows, rows, growth=growth)
+    if newbuf is arr:
+        return arr.copy()
+    if newbuf is not buf:
+        weakref.finalize(newbuf, _filled_rows.pop, id(newbuf), None)
+    _filled_rows[id(newbuf)] = nrows + rows.shape[0]
+    return newbuf[:nrows + rows.shape[0]]
+
+
 def array1d_to_meshgrid(arr: Sequence, target_shape: Tuple[int, ...],
                         copy: bool = True) -> np.ndarray:
     """
@@ -128,7 +240,7 @@ def array1d_to_meshgrid(arr: Sequence, target_shape: Tuple[int, ...],
     if newsize < arr.size:
         arr = arr[:newsize]
     elif newsize > arr.size:
-        if arr.dtype in FLOATTYPES:
+        if _is_inexact(arr.dtype):
             fill = np.zeros(newsize - arr.size) * np.nan
         else:
             fill = np.array((newsize - arr.size) * [None])
@@ -138,10 +250,11 @@ def array1d_to_meshgrid(arr: Sequence, target_shape: Tuple[int, ...],
 
 
 def _find_switches(arr, rth=25, ztol=1e-15):
-    arr_ = np.ma.MaskedArray(arr, is_invalid(arr))
+    invalid = is_invalid(arr)
+    arr_ = np.ma.MaskedArray(arr, invalid)
     deltas = arr_[1:] - arr_[:-1]
-    hi = np.percentile(arr[~is_invalid(arr)], 100.-rth)
-    lo = np.percentile(arr[~is_invalid(arr)], rth)
+    hi = np.percentile(arr[~invalid], 100.-rth)
+    lo = np.percentile(arr[~invalid], rth)
     diff = np.abs(hi-lo)
 
     if not diff > ztol:
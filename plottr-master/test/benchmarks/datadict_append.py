@@ -0,0 +1,44 @@
+"""Benchmark of accumulating data in a DataDict.
+
+Adds data in chunks of ``CHUNK`` records with ``DataDict.add_data`` and
+reports the time per record when reaching the given totals. With appending
+into buffers with spare capacity, the time per record stays constant; with
+``np.append`` (copying all data on every call) it grows linearly.
+
+Usage: ``python datadict_append.py``
+"""
+import time
+
+import numpy as np
+
+from plottr.data.datadict import DataDict
+
+
+#: number of records at which the time is reported
+TOTALS = [10 ** 5, 10 ** 6, 3 * 10 ** 6, 10 ** 7]
+
+#: records per call of ``add_data``
+CHUNK = 100
+
+
+def accumulate(totals, chunk):
+    data = DataDict(x=dict(), y=dict(), z=dict(axes=['x', 'y']))
+    data.validate()
+    x = np.arange(chunk, dtype=float)
+    nrecords = 0
+    t0 = time.perf_counter()
+    for total in totals:
+        while nrecords < total:
+            data.add_data(x=x, y=x, z=x)
+            nrecords += chunk
+        t = time.perf_counter() - t0
+        print(f"{nrecords:10d} records {t:8.2f} s "
+              f"{t / nrecords * 1e9:8.1f} ns per record")
+
+
+def main():
+    accumulate(TOTALS, CHUNK)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark of chunking and compression options for DDH5 data.
+
+Writes a 1D sweep (scalar rows) and a 2D sweep (one trace per row) in blocks
+of rows, as a measurement would, and reports write time, file size, and the
+time for reading all data and for reading the last percent of rows.
+
+Note that compressed chunks are re-written (and the file grows) every time
+rows are appended to them, so compression only pays off when rows are written
+in large blocks (see the flush options of ``DDH5Writer``).
+
+Usage: ``python ddh5_chunking.py``
+"""
+import os
+import time
+from functools import partial
+import tempfile
+
+import numpy as np
+import h5py
+
+from plottr.data.datadict import DataDict
+from plottr.data.datadict_storage import datadict_to_hdf5, AppendMode
+
+
+CONFIGS = [
+    ('h5py default chunks', dict(chunks=None)),
+    ('auto chunks', dict(chunks='auto')),
+    ('auto chunks (16 kB)', dict(chunks=16 * 1024)),
+    ('auto chunks, lzf', dict(chunks='auto', compression='lzf')),
+    ('auto chunks, lzf + shuffle',
+     dict(chunks='auto', compression='lzf', shuffle=True)),
+    ('auto chunks, gzip(4) + shuffle',
+     dict(chunks='auto', compression='gzip', compression_opts=4,
+          shuffle=True)),
+]
+
+
+def sweep_1d(nrows=100000, block=100):
+    x = np.linspace(0, 1, nrows)
+    y = np.sin(2 * np.pi * 5 * x) + 0.01 * np.random.randn(nrows)
+    for i in range(0, nrows, block):
+        yield DataDict(x=dict(values=x[i:i+block]),
+                       y=dict(values=y[i:i+block], axes=['x']))
+
+
+def sweep_2d(nrows=1000, npts=1000, block=10):
+    x = np.linspace(0, 1, nrows)
+    f = np.linspace(0, 1, npts)
+    for i in range(0, nrows, block):
+        xx = x[i:i+block]
+        ff = np.repeat(f.reshape(1, -1), len(xx), 0)
+        z = np.cos(2 * np.pi * (xx.reshape(-1, 1) + ff)) \
+            + 0.01 * np.random.randn(*ff.shape)
+        yield DataDict(x=dict(values=xx), f=dict(values=ff),
+                       z=dict(values=z, axes=['x', 'f']))
+
+
+def run(sweep, options, folder):
+    path = os.path.join(folder, 'bench.ddh5')
+    if os.path.exists(path):
+        os.remove(path)
+
+    t0 = time.perf_counter()
+    for i, data in enumerate(sweep()):
+        datadict_to_hdf5(data, path,
+                         append_mode=AppendMode.none if i == 0
+                         else AppendMode.all,
+                         **options)
+    twrite = time.perf_counter() - t0
+    size = os.path.getsize(path)
+
+    with h5py.File(path, 'r') as f:
+        t0 = time.perf_counter()
+        for k in f['data']:
+            f['data'][k][:]
+        tread = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for k in f['data']:
+            ds = f['data'][k]
+            ds[-ds.shape[0] // 100:]
+        ttail = time.perf_counter() - t0
+
+    return twrite, size, tread, ttail
+
+
+def main():
+    sweeps = [('1D sweep, 1e5 rows, blocks of 100 rows', sweep_1d),
+              ('1D sweep, 1e5 rows, blocks of 10000 rows',
+               partial(sweep_1d, block=10000)),
+              ('2D sweep, 1000 rows x 1000 points', sweep_2d)]
+    with tempfile.TemporaryDirectory() as folder:
+        for sweep_label, sweep in sweeps:
+            print(sweep_label)
+            print(f"  {'options':32s} {'write (s)':>10s} {'size (MB)':>10s} "
+                  f"{'read (ms)':>10s} {'tail (ms)':>10s}")
+            for label, options in CONFIGS:
+                twrite, size, tread, ttail = run(sweep, options, folder)
+                print(f"  {label:32s} {twrite:10.3f} {size / 1e6:10.2f} "
+                      f"{tread * 1e3:10.2f} {ttail * 1e3:10.2f}")
+
+
+if __name__ == '__main__':
+    main()
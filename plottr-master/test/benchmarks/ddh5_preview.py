@@ -0,0 +1,63 @@
+"""Benchmark of decimated preview loading of large DDH5 files.
+
+Writes flattened 1D and 2D sweeps with a few million rows and compares the
+time for loading all data with the time for loading a decimated preview with
+at most a given number of points (``max_points`` of ``datadict_from_hdf5``).
+
+Usage: ``python ddh5_preview.py``
+"""
+import os
+import time
+import tempfile
+
+import numpy as np
+
+from plottr.data.datadict import DataDict
+from plottr.data.datadict_storage import datadict_from_hdf5, \
+    datadict_to_hdf5, AppendMode
+
+
+SWEEPS = [
+    ('1D sweep, 1e7 rows', (10000000,)),
+    ('2D sweep, 1e4 x 1e3', (10000, 1000)),
+    ('2D sweep, 1e6 x 10', (1000000, 10)),
+    ('3D sweep, 100 x 100 x 1000', (100, 100, 1000)),
+]
+
+MAX_POINTS = [10000, 100000, 1000000]
+
+
+def write_sweep(path, shape):
+    names = ['x', 'y', 'z'][:len(shape)]
+    axes = np.meshgrid(*[np.arange(n, dtype=float) for n in shape],
+                       indexing='ij')
+    data = DataDict(**{n: dict(values=a.reshape(-1))
+                       for n, a in zip(names, axes)})
+    data['signal'] = dict(values=np.random.rand(int(np.prod(shape))),
+                          axes=names)
+    datadict_to_hdf5(data, path, append_mode=AppendMode.none)
+
+
+def timed(func, *arg, **kw):
+    t0 = time.perf_counter()
+    ret = func(*arg, **kw)
+    return ret, time.perf_counter() - t0
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'bench.ddh5')
+        for label, shape in SWEEPS:
+            write_sweep(path, shape)
+            print(label)
+            _, tfull = timed(datadict_from_hdf5, path)
+            print(f"  {'full data':24s} {tfull * 1e3:10.1f} ms")
+            for n in MAX_POINTS:
+                data, t = timed(datadict_from_hdf5, path, max_points=n)
+                strides = data.meta_val('preview_strides')
+                print(f"  {f'max. {n} points':24s} {t * 1e3:10.1f} ms "
+                      f"  strides {strides}, {data.nrecords()} points")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Micro-benchmark for the per-point overhead of DDH5Writer.add_data.
+
+Usage: ``python ddh5_writer.py [npoints]``
+"""
+import sys
+import time
+import tempfile
+
+import numpy as np
+
+from plottr.data.datadict import DataDict
+from plottr.data.datadict_storage import DDH5Writer
+
+
+def make_data():
+    return DataDict(
+        x=dict(unit='V'),
+        y=dict(unit='V'),
+        z=dict(unit='A', axes=['x', 'y']),
+    )
+
+
+def per_point_time(npoints, **writer_kwargs):
+    with tempfile.TemporaryDirectory() as basedir:
+        with DDH5Writer(basedir, make_data(), name='bench',
+                        **writer_kwargs) as writer:
+            t0 = time.perf_counter()
+            for i in range(npoints):
+                writer.add_data(x=i, y=2 * i, z=np.random.rand())
+            writer.flush()
+            t1 = time.perf_counter()
+    return (t1 - t0) / npoints
+
+
+def main(npoints=5000):
+    configs = [
+        ('flush every point', dict()),
+        ('flush every 1000 points', dict(flush_rows=1000)),
+        ('flush every 1000 points, streaming',
+         dict(flush_rows=1000, keep_in_memory=False)),
+        ('flush every 0.5 s', dict(flush_rows=None, flush_interval=0.5)),
+        ('pre-allocated, flush every 1000 points',
+         dict(flush_rows=1000, grid_shape=(npoints, 1))),
+        ('flush every 10 points, background thread',
+         dict(flush_rows=10, background=True)),
+    ]
+    for label, kwargs in configs:
+        t = per_point_time(npoints, **kwargs)
+        print(f"{label:45s}: {t * 1e6:8.1f} us/point")
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
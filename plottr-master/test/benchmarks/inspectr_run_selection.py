@@ -0,0 +1,71 @@
+"""Benchmark of selecting a run in the inspectr.
+
+Creates a database with a number of small runs in a temporary folder, and
+measures the time it takes to load a run and its structure (what the inspectr
+does on every click on a run), with the database location set in the qcodes
+config on every call (as plottr did before), and with pooled read-only
+connections.
+
+Usage: ``python inspectr_run_selection.py``
+"""
+import os
+import time
+import tempfile
+
+import numpy as np
+import qcodes as qc
+from qcodes.dataset.data_set import load_by_id
+from qcodes.dataset.sqlite.database import initialise_or_create_database_at
+
+from plottr.data.qcodes_dataset import (load_dataset_from, get_ds_structure,
+                                        connection_pool)
+
+
+NRUNS = 200
+
+#: number of simulated clicks
+NCLICKS = 200
+
+
+def make_runs(exp, nruns):
+    for _ in range(nruns):
+        m = qc.Measurement(exp=exp)
+        m.register_custom_parameter('x')
+        m.register_custom_parameter('y', setpoints=['x'])
+        with m.run() as datasaver:
+            datasaver.add_result(('x', np.arange(10)),
+                                 ('y', np.random.rand(10)))
+
+
+def load_with_config(path, run_id):
+    initialise_or_create_database_at(path)
+    return load_by_id(run_id=run_id)
+
+
+def click(load, path, run_id):
+    ds = load(path, run_id)
+    get_ds_structure(ds)
+    return ds.snapshot
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'bench.db')
+        initialise_or_create_database_at(path)
+        exp = qc.load_or_create_experiment('benchmark', sample_name='none')
+        make_runs(exp, NRUNS)
+        exp.conn.close()
+
+        run_ids = np.random.randint(1, NRUNS + 1, NCLICKS)
+        for label, load in [('qcodes config', load_with_config),
+                            ('connection pool', load_dataset_from)]:
+            t0 = time.perf_counter()
+            for run_id in run_ids:
+                click(load, path, int(run_id))
+            t = (time.perf_counter() - t0) / NCLICKS
+            print(f"{label:16s} {t * 1e3:8.2f} ms per click")
+        connection_pool.release(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark of reading qcodes runs with a single bulk query.
+
+Creates runs with two dependents on a shared 2D sweep (each dependent with
+the given number of rows) in a temporary database, and compares the time for
+``DataSet.get_parameter_data`` with ``get_parameter_data_bulk``, as well as
+the memory taken by the returned arrays.
+
+Usage: ``python qcodes_bulk_read.py``
+"""
+import os
+import time
+import tempfile
+
+import numpy as np
+import qcodes as qc
+
+from plottr.data.qcodes_dataset import get_parameter_data_bulk
+
+
+ROWS = [100000, 1000000, 3000000]
+
+#: rows per call of ``add_result`` when creating the runs
+BATCH = 100000
+
+
+def make_run(exp, nrows):
+    m = qc.Measurement(exp=exp)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('y')
+    m.register_custom_parameter('z_0', setpoints=['x', 'y'])
+    m.register_custom_parameter('z_1', setpoints=['x', 'y'])
+    with m.run() as datasaver:
+        for start in range(0, nrows, BATCH):
+            idx = np.arange(start, min(start + BATCH, nrows))
+            x, y = idx // 1000, idx % 1000
+            datasaver.add_result(('x', x), ('y', y),
+                                 ('z_0', np.random.rand(idx.size)),
+                                 ('z_1', np.random.rand(idx.size)))
+        ds = datasaver.dataset
+    return ds
+
+
+def timed(func, *arg, **kw):
+    t0 = time.perf_counter()
+    ret = func(*arg, **kw)
+    return ret, time.perf_counter() - t0
+
+
+def nbytes(data):
+    arrays = {id(a): a for d in data.values() for a in d.values()}
+    return sum(a.nbytes for a in arrays.values())
+
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        qc.initialise_or_create_database_at(os.path.join(folder, 'bench.db'))
+        exp = qc.load_or_create_experiment('benchmark', sample_name='none')
+        for nrows in ROWS:
+            ds = make_run(exp, nrows)
+            print(f'{nrows} rows per dependent')
+            for label, func in [
+                    ('get_parameter_data', ds.get_parameter_data),
+                    ('get_parameter_data_bulk',
+                     lambda *p: get_parameter_data_bulk(ds, *p))]:
+                data, t = timed(func, 'z_0', 'z_1')
+                print(f"  {label:24s} {t * 1e3:10.1f} ms "
+                      f"{nbytes(data) / 2**20:10.1f} MiB")
+        exp.conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -41,3 +41,4 @@ def test_average_subtraction(qtbot):
         zz_ref_avg_y,
         fc.outputValues()['dataOut'].data_vals('z'),
     )
+    assert num.arrays_equal(zz, data.data_vals('z'))
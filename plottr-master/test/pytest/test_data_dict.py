@@ -79,6 +79,27 @@ def test_add_data():
     )
 
 
+def test_add_data_in_place():
+    """Appended records are written into spare capacity, but the values
+    of other datadicts are never changed."""
+    dd = DataDict(
+        x=dict(values=np.array([0.])),
+        y=dict(values=np.array([0.]), axes=['x']),
+    )
+    for i in range(1, 100):
+        dd.add_data(x=[i], y=[i ** 2])
+    x = dd.data_vals('x')
+    assert num.arrays_equal(x, np.arange(100.))
+    assert x.base is not None and x.base.shape[0] < 200
+
+    dd2 = dd + dd
+    dd.add_data(x=[-1], y=[-1])
+    assert num.arrays_equal(dd2.data_vals('x'),
+                            np.append(np.arange(100.), np.arange(100.)))
+    assert num.arrays_equal(dd.data_vals('x'), np.append(x, -1))
+    assert x.size == 100
+
+
 def test_expansion_simple():
     """Test whether simple expansion of nested parameters works."""
 
@@ -128,6 +128,105 @@ def test_validation():
     assert dd.validate()
 
 
+def test_structure_cache():
+    """Test that cached structure information follows changes."""
+    dd = DataDict(
+        x=dict(values=[0, 1]),
+        y=dict(values=[0, 1], axes=['x']),
+    )
+    assert dd.validate()
+    assert dd.dependents() == ['y'] and dd.axes() == ['x']
+
+    # returned lists can be changed without affecting the cache
+    dd.axes().append('z')
+    assert dd.axes() == ['x']
+
+    dd['y']['values'] = np.arange(3)
+    with pytest.raises(ValueError):
+        dd.validate()
+    dd['x']['values'] = np.arange(3)
+    assert dd.validate()
+    assert dd.shapes()['x'] == (3,)
+
+    dd['z'] = dict(values=np.zeros(3))
+    dd['y']['axes'] = ['x', 'z']
+    assert dd.axes('y') == ['x', 'z']
+    dd['y']['axes'] = ['x']
+    del dd['z']
+    assert dd.axes() == ['x']
+    assert dd.validate()
+
+    # copies are independent of the original
+    dd2 = dd.copy()
+    dd2['y']['axes'] = []
+    assert dd.dependents() == ['y'] and dd2.dependents() == []
+
+    # fields shared by datadicts invalidate both
+    dd3 = dd.extract('y', copy=False, sanitize=False)
+    assert dd3['y'] is dd['y']
+    dd['y']['values'] = np.arange(2)
+    with pytest.raises(ValueError):
+        dd3.validate()
+
+
+def test_copy():
+    """Test that copies are independent of the original."""
+    x = np.arange(3.)
+    dd = DataDict(
+        x=dict(values=x),
+        y=dict(values=x ** 2, axes=['x']),
+    )
+    dd.add_meta('info', ['a'])
+    dd2 = dd.copy()
+    assert not np.shares_memory(dd2.data_vals('y'), dd.data_vals('y'))
+    assert dd2.meta_val('info') is not dd.meta_val('info')
+
+    dd2.data_vals('y')[0] = -1
+    dd.data_vals('y')[1] = 5
+    assert arrays_equal(dd.data_vals('y'), np.array([0., 5., 4.]))
+    assert arrays_equal(dd2.data_vals('y'), np.array([-1., 1., 4.]))
+
+    # also copies of shared copies are independent and writeable
+    dd3 = dd.copy(shared=True).copy()
+    dd3.data_vals('y')[0] = 3
+    assert dd.data_vals('y')[0] == 0
+
+
+def test_copy_on_write():
+    """Test that shared copies share values until they are changed."""
+    x = np.arange(3.)
+    dd = DataDict(
+        x=dict(values=x),
+        y=dict(values=x ** 2, axes=['x']),
+    )
+    dd.add_meta('info', ['a'])
+    dd2 = dd.copy(shared=True)
+    assert np.shares_memory(dd2.data_vals('y'), dd.data_vals('y'))
+    assert dd2.meta_val('info') is not dd.meta_val('info')
+
+    with pytest.raises(ValueError):
+        dd2.data_vals('y')[0] = -1
+    dd2.writeable_vals('y')[0] = -1
+    assert dd2.data_vals('y')[0] == -1 and dd.data_vals('y')[0] == 0
+    assert not np.shares_memory(dd2.data_vals('y'), dd.data_vals('y'))
+
+    # the original stays writeable; writeable_vals copies shared values
+    dd3 = dd.copy(shared=True)
+    dd.data_vals('y')[1] = 5
+    assert dd3.data_vals('y')[1] == 5
+    dd.writeable_vals('y')[1] = 7
+    assert dd.data_vals('y')[1] == 7 and dd3.data_vals('y')[1] == 5
+    vals = dd.writeable_vals('y')
+    assert dd.writeable_vals('y') is vals
+
+    # the arrays the datadict was made from stay writeable
+    x[0] = 10
+    assert dd.data_vals('x')[0] == 10 and dd2.data_vals('x')[0] == 10
+
+    dd.add_data(x=[3.], y=[9.])
+    assert dd.nrecords() == 4 and dd2.nrecords() == 3
+
+
 def test_sanitizing():
     """Test cleaning up of datasets."""
     dd = DataDictBase(
@@ -1,10 +1,20 @@
 """Test for datadict hdf5 serialization"""
 
+import os
+import sys
+import time
+import subprocess
+import h5py
+import pytest
 import numpy as np
 
 from plottr.data import datadict as dd
 from plottr.data import datadict_storage as dds
 from plottr.node.tools import linearFlowchart
+from plottr.node.data_selector import DataSelector
+from plottr.node.grid import DataGridder, GridOption
+from plottr.node.dim_reducer import XYSelector
+from plottr.plot.base import PlotNode
 
 FN = './test_ddh5_data.ddh5'
 
@@ -123,3 +133,786 @@ def test_loader_node(qtbot):
     out = fc.outputValues()['dataOut'].copy()
     out.pop('__title__')
     assert _clean_from_file(out) == data
+
+
+def test_loader_node_incremental(qtbot, tmp_path, monkeypatch):
+    dds.DDH5Loader.useUi = False
+
+    data = dd.DataDict(
+        x=dict(unit='A'),
+        y=dict(unit='B', axes=['x']),
+    )
+    with dds.DDH5Writer(str(tmp_path), data, name='incremental') as writer:
+        for x in range(5):
+            writer.add_data(x=[x], y=[x ** 2])
+
+    fc = linearFlowchart(('loader', dds.DDH5Loader))
+    node = fc.nodes()['loader']
+    node.filepath = writer.file_path
+    assert node.nLoadedRecords == 5
+
+    # track which rows are read from the file on each update
+    reads = []
+    getitem = h5py.Dataset.__getitem__
+
+    def tracked_getitem(ds, args, *a, **kw):
+        reads.append((ds.name, args))
+        return getitem(ds, args, *a, **kw)
+
+    monkeypatch.setattr(h5py.Dataset, '__getitem__', tracked_getitem)
+
+    # nothing has changed in the file, nothing should be read.
+    node.update()
+    assert reads == []
+    assert node.nLoadedRecords == 5
+
+    # append to the file; only the new rows should be read.
+    new = dd.DataDict(
+        x=dict(unit='A', values=np.array([5, 6])),
+        y=dict(unit='B', axes=['x'], values=np.array([25, 36])),
+    )
+    dds.datadict_to_hdf5(new, writer.file_path, append_mode=dds.AppendMode.all)
+    node.update()
+    assert sorted(reads) == [('/data/x', slice(5, 7)),
+                             ('/data/y', slice(5, 7))]
+    assert node.nLoadedRecords == 7
+
+    out = fc.outputValues()['dataOut']
+    assert np.all(out.data_vals('x') == np.arange(7))
+    assert np.all(out.data_vals('y') == np.arange(7) ** 2)
+
+
+def test_structure_only_reads_no_values(tmp_path, monkeypatch):
+    fn = str(tmp_path / 'structure.ddh5')
+    x = np.arange(100)
+    y = np.repeat(np.linspace(0, 1, 5).reshape(1, -1), 100, 0)
+    z = np.arange(y.size).reshape(y.shape)
+    data = dd.DataDict(
+        x=dict(values=x, unit='A'),
+        y=dict(values=y, unit='B'),
+        z=dict(values=z, axes=['x', 'y'], unit='C'),
+    )
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none)
+
+    def no_reading(*arg, **kw):
+        raise AssertionError('Data values have been read.')
+
+    for method in ['__getitem__', '__array__', '__iter__', 'read_direct']:
+        monkeypatch.setattr(h5py.Dataset, method, no_reading)
+
+    structure = dds.datadict_from_hdf5(fn, structure_only=True)
+    assert structure.dependents() == ['z']
+    assert structure.axes() == ['x', 'y']
+    assert structure.label('z') == 'z (C)'
+    assert structure.meta_val('shape', 'z') == (100, 5)
+    assert structure.meta_val('shape', 'x') == (100,)
+    assert structure.data_vals('z').shape == (0, 5)
+    assert structure.data_vals('z').dtype == z.dtype
+
+    groups = dds.all_datadicts_from_hdf5(fn, structure_only=True)
+    assert list(groups.keys()) == ['data']
+    assert groups['data'].meta_val('shape', 'y') == (100, 5)
+
+
+def test_writer_streaming_mode(tmp_path):
+    data = dd.DataDict(
+        x=dict(unit='A'),
+        y=dict(unit='B', axes=['x']),
+    )
+    with dds.DDH5Writer(str(tmp_path), data, name='streaming',
+                        keep_in_memory=False) as writer:
+        for i in range(10):
+            writer.add_data(x=[i], y=[i ** 2])
+            assert writer.datadict.nrecords() == 0
+        writer.add_data(x=np.arange(10, 15), y=np.arange(10, 15) ** 2)
+        assert writer.inserted_rows == 15
+        assert writer.datadict.axes('y') == ['x']
+
+    loaded = dds.datadict_from_hdf5(writer.file_path)
+    assert np.array_equal(loaded.data_vals('x'), np.arange(15))
+    assert np.array_equal(loaded.data_vals('y'), np.arange(15) ** 2)
+    assert loaded.axes('y') == ['x']
+    assert loaded.meta_val('dataset.name') == 'streaming'
+
+
+def test_writer_preallocated_grid(tmp_path):
+    data = dd.DataDict(
+        x=dict(unit='A'),
+        y=dict(unit='B'),
+        z=dict(unit='C', axes=['x', 'y']),
+    )
+    xx, yy = np.meshgrid(np.arange(3), np.arange(4), indexing='ij')
+    zz = xx * 10 + yy
+    with dds.DDH5Writer(str(tmp_path), data, name='grid',
+                        grid_shape=(3, 4)) as writer:
+        for x, y, z in zip(xx.flat, yy.flat, zz.flat):
+            if writer.inserted_rows == 10:
+                break
+            writer.add_data(x=[x], y=[y], z=[z])
+
+    with h5py.File(writer.file_path, 'r') as f:
+        assert f['data/z'].shape == (12,)
+        assert f['data/z'].attrs['filled_rows'] == 10
+
+    loaded = dds.datadict_from_hdf5(writer.file_path)
+    assert loaded.nrecords() == 10
+    assert dd.declared_grid(loaded) == (['x', 'y'], (3, 4))
+
+    grid = dd.datadict_to_meshgrid(loaded)
+    assert grid.shape() == (3, 4)
+    assert np.array_equal(grid.data_vals('z')[:2], zz[:2])
+    assert np.all(np.isnan(grid.data_vals('z').flat[10:]))
+
+    with pytest.raises(ValueError, match='pre-allocated grid'):
+        with dds.DDH5Writer(str(tmp_path), data,
+                            grid_shape=(1, 1)) as writer:
+            writer.add_data(x=[0, 1], y=[0, 1], z=[0, 1])
+
+    # integer fields are stored as float, since unfilled rows are nan.
+    data = dd.DataDict(
+        x=dict(values=np.array([0], dtype=np.int32)),
+        z=dict(values=np.array([1.], dtype=np.float32), axes=['x']),
+    )
+    with dds.DDH5Writer(str(tmp_path), data, grid_shape=(2,)) as writer:
+        pass
+    with h5py.File(writer.file_path, 'r') as f:
+        assert f['data/x'].dtype == np.float64
+        assert f['data/z'].dtype == np.float32
+
+
+def test_writer_limits(tmp_path):
+    data = dd.DataDict(
+        x=dict(unit='A'),
+        y=dict(unit='B', axes=['x']),
+    )
+    with dds.DDH5Writer(str(tmp_path), data, name='limits') as writer:
+        writer.add_data(x=[0, 1], y=[np.nan, -3.])
+        writer.add_data(x=[5, 2], y=[4., np.inf])
+
+    loaded = dds.datadict_from_hdf5(writer.file_path)
+    assert loaded.meta_val('limits', 'x') == (0., 5.)
+    assert loaded.meta_val('limits', 'y') == (-3., 4.)
+    assert loaded.meta_val('limits_count', 'y') == 2
+
+    # limits remain through gridding, but not when values are replaced.
+    grid = dd.datadict_to_meshgrid(loaded, target_shape=(4,))
+    assert grid.meta_val('limits', 'y') == (-3., 4.)
+    changed = loaded.copy()
+    changed['y']['values'] = changed.data_vals('y') * 2
+    assert '__limits__' not in changed['y'] and '__limits__' in loaded['y']
+
+    partial = dds.datadict_from_hdf5(writer.file_path, stopidx=2)
+    assert not partial.has_meta('limits') and '__limits__' not in partial['y']
+
+    # limits are not used once the data was changed by another writer.
+    dds.datadict_to_hdf5(dd.DataDict(x=dict(values=np.array([-1.])),
+                                     y=dict(values=np.array([9.]),
+                                            axes=['x'])),
+                         writer.file_path, append_mode=dds.AppendMode.all)
+    loaded = dds.datadict_from_hdf5(writer.file_path)
+    assert '__limits__' not in loaded['y']
+
+    with dds.DDH5Writer(str(tmp_path), data.structure(same_type=True),
+                        grid_shape=(4,)) as writer:
+        writer.add_data(x=[0, 1, 2], y=[2., 1., 7.])
+    loaded = dds.datadict_from_hdf5(writer.file_path)
+    assert loaded.meta_val('limits', 'y') == (1., 7.)
+
+
+def test_limits_in_plot_pipeline(qtbot, tmp_path):
+    """The limits written by the writer reach the plot node of the autoplot
+    chain."""
+    nodes = [('loader', dds.DDH5Loader), ('selector', DataSelector),
+             ('gridder', DataGridder), ('xysel', XYSelector),
+             ('plot', PlotNode)]
+    for _, cls in nodes:
+        cls.useUi = False
+        cls.uiClass = None
+
+    data = dd.DataDict(x=dict(), y=dict(), z=dict(axes=['x', 'y']))
+    with dds.DDH5Writer(str(tmp_path), data, name='limits') as writer:
+        for x in range(3):
+            for y in range(4):
+                writer.add_data(x=x, y=y, z=x * y)
+
+    fc = linearFlowchart(*nodes)
+    fc.nodes()['loader'].filepath = writer.file_path
+    fc.nodes()['selector'].selectedData = ['z']
+    fc.nodes()['gridder'].grid = GridOption.guessShape, {}
+    fc.nodes()['xysel'].xyAxes = ('y', 'x')
+
+    for name, _ in nodes:
+        out = fc.nodes()[name].outputValues()['dataOut']
+        assert out.meta_val('limits', 'z') == (0., 6.)
+        assert out.meta_val('limits', 'y') == (0., 3.)
+    assert isinstance(out, dd.MeshgridDataDict)
+    assert out.axes('z') == ['y', 'x']
+
+
+def test_writer_flush_policy(tmp_path):
+    data = dd.DataDict(
+        x=dict(unit='A'),
+        y=dict(unit='B', axes=['x']),
+    )
+    with dds.DDH5Writer(str(tmp_path), data, name='batched',
+                        flush_rows=4) as writer:
+        for i in range(10):
+            writer.add_data(x=i, y=i ** 2)
+            assert writer.inserted_rows == 4 * ((i + 1) // 4)
+        assert writer.pending_rows == 2
+        assert writer.datadict.nrecords() == 8
+
+        with pytest.raises(ValueError):
+            writer.add_data(x=[1, 2], y=[1])
+        with pytest.raises(ValueError):
+            writer.add_data(x=[1])
+
+        # rows that do not fit are rejected before they are queued.
+        with pytest.raises(ValueError, match='inner shape'):
+            writer.add_data(x=[[1, 2]], y=[[1, 4]])
+        with pytest.raises(ValueError, match='dtype'):
+            writer.add_data(x=['a'], y=[1])
+        assert writer.pending_rows == 2
+        writer.add_data(x=np.array(10), y=np.array(100))
+        writer.flush()
+        assert writer.inserted_rows == 11
+
+    assert writer.inserted_rows == 11
+    assert writer.datadict.nrecords() == 11
+    loaded = dds.datadict_from_hdf5(writer.file_path)
+    assert np.array_equal(loaded.data_vals('y'), np.arange(11) ** 2)
+
+    with dds.DDH5Writer(str(tmp_path), data.structure(same_type=True),
+                        flush_rows=None, flush_interval=0.) as writer:
+        writer.add_data(x=0, y=0)
+        assert writer.inserted_rows == 1
+
+
+def test_auto_chunk_shape():
+    assert dds.auto_chunk_shape((10,), np.float64, nbytes=800) == (100,)
+    assert dds.auto_chunk_shape((1, 50), np.float64, nbytes=800) == (2, 50)
+    assert dds.auto_chunk_shape((1, 400), np.float64, nbytes=800) == (1, 100)
+    assert dds.auto_chunk_shape((1, 3, 1000), np.complex128) == (5, 3, 1000)
+
+
+def test_chunking_and_compression(tmp_path):
+    fn = str(tmp_path / 'chunked.ddh5')
+    x = np.arange(1000.)
+    y = np.random.rand(1000, 20)
+    data = dd.DataDict(
+        x=dict(values=x),
+        y=dict(values=y, axes=['x']),
+    )
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none,
+                         chunks=dict(x=(100,)), compression='gzip',
+                         compression_opts=4, shuffle=True)
+    with h5py.File(fn, 'r') as f:
+        assert f['data/x'].chunks == (100,)
+        assert f['data/y'].chunks == dds.auto_chunk_shape(y.shape, y.dtype)
+        assert f['data/y'].compression == 'gzip'
+        assert f['data/y'].compression_opts == 4
+        assert f['data/y'].shuffle
+
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.all)
+    loaded = dds.datadict_from_hdf5(fn)
+    assert np.array_equal(loaded.data_vals('y'), np.concatenate([y, y]))
+
+    structure = dd.DataDict(x=dict(), y=dict(axes=['x']))
+    with dds.DDH5Writer(str(tmp_path), structure, compression='lzf',
+                        chunks=4096, flush_rows=10) as writer:
+        for i in range(25):
+            writer.add_data(x=i, y=i ** 2)
+    with h5py.File(writer.file_path, 'r') as f:
+        assert f['data/y'].compression == 'lzf'
+        assert f['data/y'].chunks == (512,)
+        assert f['data/y'][:].tolist() == [i ** 2 for i in range(25)]
+
+
+def test_writer_background(tmp_path, monkeypatch):
+    data = dd.DataDict(
+        x=dict(unit='A'),
+        y=dict(unit='B', axes=['x']),
+    )
+    write_rows = dds.DDH5Writer._write_rows
+
+    def slow_write_rows(self, rows):
+        time.sleep(0.05)
+        write_rows(self, rows)
+
+    monkeypatch.setattr(dds.DDH5Writer, '_write_rows', slow_write_rows)
+    with dds.DDH5Writer(str(tmp_path), data, name='background',
+                        background=True, queue_size=100) as writer:
+        t0 = time.perf_counter()
+        for i in range(20):
+            writer.add_data(x=i, y=i ** 2)
+        assert time.perf_counter() - t0 < 0.5
+        assert writer.inserted_rows < 20
+    assert writer.inserted_rows == 20
+    loaded = dds.datadict_from_hdf5(writer.file_path)
+    assert np.array_equal(loaded.data_vals('y'), np.arange(20) ** 2)
+
+    # a full queue blocks until the thread has caught up
+    with dds.DDH5Writer(str(tmp_path), data.structure(same_type=True),
+                        background=True, queue_size=1) as writer:
+        t0 = time.perf_counter()
+        for i in range(5):
+            writer.add_data(x=i, y=i ** 2)
+        assert time.perf_counter() - t0 > 0.1
+    assert dds.datadict_from_hdf5(writer.file_path).nrecords() == 5
+
+    def failing_write_rows(self, rows):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(dds.DDH5Writer, '_write_rows', failing_write_rows)
+    with pytest.raises(RuntimeError):
+        with dds.DDH5Writer(str(tmp_path), data.structure(same_type=True),
+                            background=True) as writer:
+            writer.add_data(x=0, y=0)
+            time.sleep(0.1)
+            writer.add_data(x=1, y=1)
+
+    with pytest.raises(RuntimeError):
+        with dds.DDH5Writer(str(tmp_path), data.structure(same_type=True),
+                            background=True) as writer:
+            writer.add_data(x=0, y=0)
+
+
+WRITER_SCRIPT = """
+import sys
+from plottr.data.datadict import DataDict
+from plottr.data.datadict_storage import DDH5Writer
+
+initial = len(sys.argv) > 2 and sys.argv[2] == 'initial'
+data = DataDict(x=dict(), y=dict(axes=['x']))
+if initial:
+    data.add_data(x=[0, 1, 2], y=[0, 1, 4])
+with DDH5Writer(sys.argv[1], data, name='swmr') as writer:
+    if not initial:
+        writer.add_data(x=[0, 1, 2], y=[0, 1, 4])
+    print('written', writer.file_path, flush=True)
+    sys.stdin.readline()
+    writer.add_data(x=[3, 4], y=[9, 16])
+    print('written', flush=True)
+    sys.stdin.readline()
+"""
+
+
+@pytest.mark.parametrize('initial', ['', 'initial'])
+def test_reader_session(tmp_path, initial):
+    """Read the file of a writer in another process while it is open, also
+    if the writer starts from data that already contains records."""
+    rootdir = os.path.dirname(os.path.dirname(os.path.dirname(dds.__file__)))
+    writer = subprocess.Popen(
+        [sys.executable, '-c', WRITER_SCRIPT, str(tmp_path), initial],
+        cwd=rootdir,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+
+    def wait_for_writer():
+        line = writer.stdout.readline()
+        while not line.startswith('written'):
+            assert line != ''
+            line = writer.stdout.readline()
+        return line.split()[1:]
+
+    try:
+        path, = wait_for_writer()
+        reader = dds.DDH5Reader(path)
+        grp = reader.group('data')
+        f = reader.file
+        assert grp['y'].shape == (3,)
+
+        writer.stdin.write('\n')
+        writer.stdin.flush()
+        wait_for_writer()
+
+        grp = reader.group('data')
+        assert reader.file is f
+        assert grp['y'][:].tolist() == [0, 1, 4, 9, 16]
+        data = dds.datadict_from_hdf5(path)
+        assert data.data_vals('y').tolist() == [0, 1, 4, 9, 16]
+
+        writer.stdin.write('\n')
+        writer.stdin.flush()
+        assert writer.wait(timeout=10) == 0
+        reader.close()
+        assert not reader.is_open
+        assert reader.group('data')['x'].shape == (5,)
+        reader.close()
+    finally:
+        if writer.poll() is None:
+            writer.kill()
+
+
+def test_load_all_groups(tmp_path, monkeypatch):
+    fn = str(tmp_path / 'groups.ddh5')
+    for i in range(6):
+        data = dd.DataDict(
+            x=dict(values=np.arange(10) + i),
+            y=dict(values=np.arange(10) * i, axes=['x']),
+        )
+        dds.datadict_to_hdf5(data, fn, groupname=f'step_{i}',
+                             append_mode=dds.AppendMode.none)
+
+    opened = []
+    h5file = dds.h5py.File
+
+    def tracked_file(*args, **kwargs):
+        opened.append(args[0])
+        return h5file(*args, **kwargs)
+
+    monkeypatch.setattr(dds.h5py, 'File', tracked_file)
+
+    groups = dds.all_datadicts_from_hdf5(fn)
+    assert len(opened) == 1
+    assert sorted(groups.keys()) == [f'step_{i}' for i in range(6)]
+    assert np.array_equal(groups['step_3'].data_vals('y'), np.arange(10) * 3)
+
+    groups = dds.all_datadicts_from_hdf5(fn, groups=['step_1', 'step_7'])
+    assert list(groups.keys()) == ['step_1']
+
+    groups = dds.all_datadicts_from_hdf5(
+        fn, groups=lambda name: name.endswith(('2', '4')),
+        structure_only=True)
+    assert sorted(groups.keys()) == ['step_2', 'step_4']
+    assert groups['step_2'].nrecords() == 0
+
+    threaded = dds.all_datadicts_from_hdf5(fn, max_workers=4)
+    serial = dds.all_datadicts_from_hdf5(fn)
+    assert list(threaded.keys()) == list(serial.keys())
+    for k in serial:
+        assert np.array_equal(threaded[k].data_vals('x'),
+                              serial[k].data_vals('x'))
+
+
+def test_memmap_reading(tmp_path):
+    fn = str(tmp_path / 'contiguous.ddh5')
+    x = np.arange(1000.)
+    y = np.random.rand(1000, 10).astype(np.float32)
+    data = dd.DataDict(
+        x=dict(values=x),
+        y=dict(values=y, axes=['x']),
+    )
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none,
+                         chunks=dict(x=False, y='auto'))
+
+    loaded = dds.datadict_from_hdf5(fn, memmap=True, startidx=100)
+    assert isinstance(loaded.data_vals('x'), np.memmap)
+    assert not isinstance(loaded.data_vals('y'), np.memmap)
+    assert np.array_equal(loaded.data_vals('x'), x[100:])
+    assert np.array_equal(loaded.data_vals('y'), y[100:])
+    assert not loaded.data_vals('x').flags.writeable
+
+    with pytest.raises(ValueError):
+        dds.datadict_to_hdf5(data, str(tmp_path / 'invalid.ddh5'),
+                             append_mode=dds.AppendMode.none,
+                             chunks=False, compression='gzip')
+
+
+def test_lazy_loading(tmp_path, monkeypatch):
+    fn = str(tmp_path / 'lazy.ddh5')
+    x = np.arange(20.)
+    y = np.arange(40.).reshape(20, 2)
+    data = dd.DataDict(
+        x=dict(values=x, unit='V'),
+        y=dict(values=y, axes=['x']),
+        z=dict(values=x ** 2, axes=['x']),
+    )
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none)
+
+    reads = []
+    getitem = h5py.Dataset.__getitem__
+
+    def counting_getitem(ds, key):
+        reads.append(ds.name.split('/')[-1])
+        return getitem(ds, key)
+
+    monkeypatch.setattr(h5py.Dataset, '__getitem__', counting_getitem)
+
+    loaded = dds.datadict_from_hdf5(fn, startidx=5, lazy=True)
+    assert reads == []
+    assert loaded.is_lazy()
+    assert loaded.axes('y') == ['x']
+    assert loaded.shapes() == {'x': (15,), 'y': (15, 2), 'z': (15,)}
+
+    assert np.array_equal(loaded['y']['values'][2:10:3, 1], y[5:][2:10:3, 1])
+    assert np.array_equal(loaded['x']['values'][-1], x[-1])
+    assert np.array_equal(loaded['x']['values'][x[5:] > 10], x[x > 10])
+    assert set(reads) == {'x', 'y'}
+
+    reads.clear()
+    selected = loaded.extract('z').materialize()
+    assert not selected.is_lazy()
+    assert set(reads) == {'x', 'z'}
+    assert np.array_equal(selected.data_vals('z'), x[5:] ** 2)
+    assert loaded.is_lazy()
+
+    # arithmetic reads the values; data_vals replaces them in the field.
+    assert np.array_equal(loaded['x']['values'] * 2 - 1, x[5:] * 2 - 1)
+    assert np.array_equal(np.sqrt(loaded['z']['values']), x[5:])
+    assert isinstance(loaded['y']['values'], dds.HDF5Values)
+    assert np.array_equal(loaded.data_vals('y'), y[5:])
+    assert isinstance(loaded['y']['values'], np.ndarray)
+
+    with pytest.raises(TypeError):
+        dd.LazyArray((1,), float)
+
+
+def test_lazy_loader_with_selector(qtbot, tmp_path, monkeypatch):
+    from plottr.node.data_selector import DataSelector
+    dds.DDH5Loader.useUi = False
+    DataSelector.useUi = False
+
+    data = dd.DataDict(
+        x=dict(values=np.arange(10.)),
+        y=dict(values=np.arange(10.), axes=['x']),
+        z=dict(values=np.arange(10.) ** 2, axes=['x']),
+    )
+    fn = str(tmp_path / 'lazy.ddh5')
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none)
+
+    reads = []
+    getitem = h5py.Dataset.__getitem__
+
+    def counting_getitem(ds, key):
+        reads.append(ds.name.split('/')[-1])
+        return getitem(ds, key)
+
+    monkeypatch.setattr(h5py.Dataset, '__getitem__', counting_getitem)
+
+    fc = linearFlowchart(('loader', dds.DDH5Loader),
+                         ('selector', DataSelector))
+    loader = fc.nodes()['loader']
+    loader.lazy = True
+    loader.filepath = fn
+    assert reads == []
+
+    fc.nodes()['selector'].selectedData = ['z']
+    out = fc.outputValues()['dataOut']
+    assert sorted(reads) == ['x', 'z']
+    assert not out.is_lazy()
+    assert np.array_equal(out.data_vals('z'), np.arange(10.) ** 2)
+
+
+def test_loader_projection(qtbot, tmp_path, monkeypatch):
+    from plottr.node.data_selector import DataSelector
+    dds.DDH5Loader.useUi = False
+    DataSelector.useUi = False
+
+    data = dd.DataDict(
+        x=dict(values=np.arange(10.)),
+        y=dict(values=np.arange(10.), axes=['x']),
+        z=dict(values=np.arange(10.) ** 2, axes=['x']),
+    )
+    fn = str(tmp_path / 'projection.ddh5')
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none)
+
+    fc = linearFlowchart(('loader', dds.DDH5Loader),
+                         ('selector', DataSelector))
+    loader = fc.nodes()['loader']
+    selector = fc.nodes()['selector']
+    selector.selectedDataChanged.connect(
+        lambda val: setattr(loader, 'projection', val))
+    loader.projection = []
+    loader.filepath = fn
+
+    reads = []
+    getitem = h5py.Dataset.__getitem__
+
+    def counting_getitem(ds, key):
+        reads.append((ds.name.split('/')[-1], key))
+        return getitem(ds, key)
+
+    monkeypatch.setattr(h5py.Dataset, '__getitem__', counting_getitem)
+
+    # only the selected field and its axes are loaded by the loader
+    selector.selectedData = ['z']
+    assert sorted(reads) == [('x', slice(0, 10)), ('z', slice(0, 10))]
+    assert isinstance(loader.outputValues()['dataOut']['y']['values'],
+                      dds.HDF5Values)
+
+    # on a new selection, only the newly required field is read
+    reads.clear()
+    selector.selectedData = ['y', 'z']
+    assert reads == [('y', slice(0, 10))]
+    out = fc.outputValues()['dataOut']
+    assert np.array_equal(out.data_vals('y'), np.arange(10.))
+    assert np.array_equal(out.data_vals('z'), np.arange(10.) ** 2)
+
+
+def test_preview_loading(tmp_path):
+    fn = str(tmp_path / 'preview.ddh5')
+    x, y = np.meshgrid(np.arange(50.), np.arange(30.), indexing='ij')
+    data = dd.DataDict(
+        x=dict(values=x.reshape(-1)),
+        y=dict(values=y.reshape(-1)),
+        z=dict(values=(x - y).reshape(-1), axes=['x', 'y']),
+    )
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none)
+
+    # the grid is guessed from the axes; the preview is a regular sub-grid
+    preview = dds.datadict_from_hdf5(fn, max_points=200)
+    assert preview.nrecords() <= 200
+    strides = preview.meta_val('preview_strides')
+    assert preview.meta_val('grid_order') == ['x', 'y']
+    mesh = dd.datadict_to_meshgrid(preview)
+    assert np.array_equal(mesh.data_vals('x'), x[::strides[0], ::strides[1]])
+    assert np.array_equal(mesh.data_vals('y'), y[::strides[0], ::strides[1]])
+    assert np.array_equal(mesh.data_vals('z'),
+                          (x - y)[::strides[0], ::strides[1]])
+
+    # explicit strides, and incomplete grids
+    preview = dds.datadict_from_hdf5(fn, stride=(3, 7), stopidx=9 * 30 + 8)
+    assert preview.meta_val('grid_shape') == (4, 5)
+    assert np.array_equal(preview.data_vals('x'),
+                          np.repeat([0, 3, 6, 9], [5, 5, 5, 2]))
+    assert np.array_equal(preview.data_vals('y')[-2:], [0, 7])
+
+    # without a grid, we simply take every n-th row
+    dds.datadict_to_hdf5(dd.DataDict(x=dict(values=np.random.rand(100)),
+                                     z=dict(values=np.arange(200).reshape(-1, 2),
+                                            axes=['x'])),
+                         fn, append_mode=dds.AppendMode.none)
+    preview = dds.datadict_from_hdf5(fn, stride=9, startidx=4)
+    assert np.array_equal(preview.data_vals('z')[:, 1],
+                          2 * np.arange(9, 100, 9) + 1)
+    assert not preview.has_meta('grid_shape')
+
+    with pytest.raises(ValueError):
+        dds.datadict_from_hdf5(fn, stride=(2, 2))
+
+
+def test_grid_hyperslabs():
+    for shape, strides in [((1000, 10), (8, 1)), ((20, 30), (3, 4)),
+                           ((4, 5, 6), (1, 2, 1)), ((100,), (7,))]:
+        grid = np.arange(int(np.prod(shape))).reshape(shape)
+        expected = grid[tuple(slice(None, None, s) for s in strides)]
+        expected = expected.reshape(-1)
+        slabs = dds.grid_hyperslabs(shape, strides, 5, 90)
+        assert np.array_equal(dds.hyperslab_rows(slabs),
+                              expected[(expected >= 5) & (expected < 90)])
+
+    # regular patterns result in a single hyperslab
+    assert dds.grid_hyperslabs((1000, 10), (8, 1)) == [(0, 125, 80, 10)]
+    assert dds.grid_hyperslabs((100, 10), (1, 2)) == [(0, 500, 2, 1)]
+
+
+def test_loader_preview(qtbot, tmp_path):
+    dds.DDH5Loader.useUi = False
+
+    fn = str(tmp_path / 'preview.ddh5')
+    data = dd.DataDict(
+        x=dict(values=np.arange(1000.)),
+        y=dict(values=np.arange(1000.) ** 2, axes=['x']),
+    )
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none)
+
+    fc = linearFlowchart(('loader', dds.DDH5Loader))
+    loader = fc.nodes()['loader']
+    loader.previewPoints = 100
+    loader.filepath = fn
+    out = fc.outputValues()['dataOut']
+    assert out.nrecords() <= 100
+    assert loader.nLoadedRecords == 1000
+
+    loader.previewPoints = None
+    out = fc.outputValues()['dataOut']
+    assert out.nrecords() == 1000
+    assert np.array_equal(out.data_vals('y'), np.arange(1000.) ** 2)
+
+    # previews only read the projected fields, others are lazy
+    data.add_data(x=[1000.], y=[1000. ** 2])
+    data['z'] = dict(values=-data.data_vals('x'), axes=['x'])
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none)
+    loader.previewPoints = 100
+    loader.projection = ['z']
+    out = fc.outputValues()['dataOut']
+    assert out.nrecords() <= 100
+    assert isinstance(out['y']['values'], dds.HDF5Values)
+    assert not isinstance(out['z']['values'], dds.HDF5Values)
+    assert np.array_equal(out.data_vals('y'), out.data_vals('x') ** 2)
+
+
+def _grid_data(nx, ny):
+    x, y = np.meshgrid(np.arange(nx, dtype=float), np.arange(ny, dtype=float),
+                       indexing='ij')
+    data = dd.DataDict(
+        x=dict(values=x.reshape(-1)),
+        y=dict(values=y.reshape(-1)),
+        z=dict(values=(x * y).reshape(-1), axes=['x', 'y']),
+    )
+    data.add_meta('grid_shape', (nx, ny))
+    data.add_meta('grid_order', ['x', 'y'])
+    return data
+
+
+def test_pyramid(tmp_path):
+    fn = str(tmp_path / 'pyramid.ddh5')
+    dds.datadict_to_hdf5(_grid_data(40, 11), fn,
+                         append_mode=dds.AppendMode.none)
+
+    shapes = dds.write_pyramid(fn, min_points=5)
+    assert shapes == [(20, 6), (10, 6), (5, 6)]
+
+    # the full data is not affected by the pyramid.
+    data = dds.datadict_from_hdf5(fn)
+    assert data.shapes() == {'x': (440,), 'y': (440,), 'z': (440,)}
+
+    level = dds.datadict_from_hdf5(fn, groupname='data/__pyramid__/1')
+    assert tuple(level.meta_val('pyramid_blocks')) == (2, 2)
+    x = level.data_vals('x').reshape(20, 6)
+    y = level.data_vals('y').reshape(20, 6)
+    assert np.allclose(x[:, 0], np.arange(0.5, 40, 2))
+    # the last block along y only contains one point.
+    assert np.allclose(y[0], [0.5, 2.5, 4.5, 6.5, 8.5, 10])
+    z = data.data_vals('z').reshape(40, 11)
+    assert np.isclose(level.data_vals('z')[0], z[:2, :2].mean())
+
+    with h5py.File(fn, 'r') as f:
+        grp = f['data']
+        assert dds.select_pyramid_level(grp, 5).name.endswith('/3')
+        assert dds.select_pyramid_level(grp, 6).name.endswith('/2')
+        assert dds.select_pyramid_level(grp, 5, {'x': (0, 13)}).name \
+            .endswith('/1')
+        assert dds.select_pyramid_level(grp, 30) is None
+
+
+def test_pyramid_outdated(tmp_path):
+    fn = str(tmp_path / 'pyramid.ddh5')
+    data = dd.DataDict(
+        x=dict(values=np.arange(100.)),
+        y=dict(values=np.arange(100.) ** 2, axes=['x']),
+    )
+    dds.datadict_to_hdf5(data, fn, append_mode=dds.AppendMode.none)
+    assert dds.write_pyramid(fn, min_points=10) == [(50,), (25,), (13,)]
+
+    data.add_data(x=[100.], y=[1e4])
+    dds.datadict_to_hdf5(data, fn)
+    with h5py.File(fn, 'r') as f:
+        assert dds.pyramid_levels(f['data']) == []
+        assert dds.select_pyramid_level(f['data'], 10) is None
+
+
+def test_loader_pyramid(qtbot, tmp_path):
+    dds.DDH5Loader.useUi = False
+
+    fn = str(tmp_path / 'pyramid.ddh5')
+    dds.datadict_to_hdf5(_grid_data(40, 11), fn,
+                         append_mode=dds.AppendMode.none)
+    dds.write_pyramid(fn, min_points=5)
+
+    fc = linearFlowchart(('loader', dds.DDH5Loader))
+    loader = fc.nodes()['loader']
+    loader.resolution = 6
+    loader.filepath = fn
+    out = fc.outputValues()['dataOut']
+    assert out.nrecords() == 60
+    assert tuple(out.meta_val('grid_shape')) == (10, 6)
+
+    loader.region = {'x': (0, 13)}
+    out = fc.outputValues()['dataOut']
+    assert out.nrecords() == 120
+
+    loader.region = {'x': (0, 5)}
+    out = fc.outputValues()['dataOut']
+    assert out.nrecords() == 440
+    assert not out.has_meta('pyramid_blocks')
@@ -0,0 +1,137 @@
+"""Tests for the catalog of DDH5 files."""
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from plottr.data import datadict as dd
+from plottr.data import datadict_storage as dds
+from plottr.data import ddh5_catalog
+from plottr.data.ddh5_catalog import DDH5Catalog
+
+
+@pytest.fixture(autouse=True)
+def catalog_dir(tmp_path_factory, monkeypatch):
+    """Keep the catalog databases of the tests out of the user's cache."""
+    path = str(tmp_path_factory.mktemp('catalogs'))
+    monkeypatch.setattr(ddh5_catalog, 'CATALOG_DIR', path)
+    return path
+
+
+def _write(path, name, nrows=3):
+    data = dd.DataDict(
+        x=dict(values=np.arange(nrows, dtype=float), unit='V'),
+        y=dict(values=np.arange(nrows, dtype=float) ** 2, axes=['x']),
+    )
+    data.add_meta('dataset.name', name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    dds.datadict_to_hdf5(data, path, append_mode=dds.AppendMode.none)
+    return data
+
+
+def test_catalog_update(tmp_path):
+    root = str(tmp_path)
+    a = os.path.join(root, 'day1', 'a.ddh5')
+    b = os.path.join(root, 'day1', 'sub', 'b.ddh5')
+    _write(a, 'first')
+    _write(b, 'second', nrows=5)
+
+    with DDH5Catalog(root) as catalog:
+        new, removed = catalog.update()
+        assert new == [a, b] and removed == []
+        assert catalog.files() == [a, b]
+
+        structure = catalog.structure(b)
+        data = structure['data']
+        assert data.axes('y') == ['x']
+        assert data['x']['unit'] == 'V'
+        assert tuple(data.meta_val('shape', 'y')) == (5,)
+        assert data.meta_val('dataset.name') == 'second'
+
+        assert catalog.find(name='sec*') == [(b, 'data')]
+        assert catalog.find(field='y') == [(a, 'data'), (b, 'data')]
+        assert catalog.find(name='first', field='z') == []
+
+        assert catalog.update() == ([], [])
+
+        c = os.path.join(root, 'day2', 'c.ddh5')
+        _write(c, 'third')
+        shutil.rmtree(os.path.join(root, 'day1', 'sub'))
+        new, removed = catalog.update(check_files=False)
+        assert new == [c] and removed == [b]
+        assert catalog.files() == [a, c]
+        assert catalog.structure(b) == {}
+
+
+def test_catalog_is_persistent(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    a = os.path.join(root, 'a.ddh5')
+    _write(a, 'first')
+    with DDH5Catalog(root) as catalog:
+        catalog.update()
+        assert catalog.dbpath == ddh5_catalog.default_dbpath(root)
+    assert os.path.exists(ddh5_catalog.default_dbpath(root))
+    assert os.listdir(root) == ['a.ddh5']
+
+    # files that have not changed are not opened again.
+    def fail(*args, **kwargs):
+        raise AssertionError('file was read')
+    monkeypatch.setattr(ddh5_catalog, 'all_datadicts_from_hdf5', fail)
+    with DDH5Catalog(root) as catalog:
+        assert catalog.update() == ([], [])
+        assert catalog.files() == [a]
+        assert tuple(catalog.structure(a)['data'].meta_val('shape', 'x')) \
+            == (3,)
+
+
+def test_catalog_refresh_file(tmp_path):
+    root = str(tmp_path)
+    a = os.path.join(root, 'a.ddh5')
+    data = _write(a, 'first')
+
+    with DDH5Catalog(root) as catalog:
+        catalog.update()
+        assert not catalog.refresh_file(a)
+
+        data.add_data(x=[3.], y=[9.])
+        dds.datadict_to_hdf5(data, a)
+        assert catalog.refresh_file(a)
+        assert tuple(catalog.structure(a)['data'].meta_val('shape', 'x')) \
+            == (4,)
+
+        # files that cannot be read are kept, and tried again later.
+        broken = os.path.join(root, 'broken.ddh5')
+        with open(broken, 'w') as f:
+            f.write('no hdf5')
+        new, _ = catalog.update()
+        assert new == [broken]
+        assert catalog.structure(broken) == {}
+
+        # ... but only once they have changed (or are refreshed explicitly).
+        def fail(*args, **kwargs):
+            raise AssertionError('file was read')
+        with pytest.MonkeyPatch.context() as m:
+            m.setattr(ddh5_catalog, 'all_datadicts_from_hdf5', fail)
+            assert catalog.update(check_files=False) == ([], [])
+        assert catalog.refresh_file(broken)
+
+        os.remove(broken)
+        _write(broken, 'fixed')
+        catalog.update(check_files=False)
+        assert catalog.find(name='fixed') == [(broken, 'data')]
+
+
+def test_catalog_does_not_change_root(tmp_path):
+    """Updating the catalog does not change the modification time of the
+    root, such that it is not listed again by the next update."""
+    root = str(tmp_path)
+    _write(os.path.join(root, 'a.ddh5'), 'first')
+    with DDH5Catalog(root) as catalog:
+        catalog.update()
+        _write(os.path.join(root, 'sub', 'b.ddh5'), 'second')
+        mtime = os.stat(root).st_mtime_ns
+        new, _ = catalog.update()
+        assert new == [os.path.join(root, 'sub', 'b.ddh5')]
+        assert os.stat(root).st_mtime_ns == mtime
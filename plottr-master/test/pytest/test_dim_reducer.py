@@ -53,6 +53,14 @@ def test_reduction(qtbot):
     )
     assert out.axes('vals') == ['x']
 
+    # an index outside the grid does not give data, but no error either
+    node.reductions = {
+        'y': (ReductionMethod.elementSelection, [], {'index': 5}),
+        'z': (ReductionMethod.average,)
+    }
+    assert fc.outputValues()['dataOut'] is None
+    assert node.process(dataIn=data) == dict(dataOut=None)
+
 
 def test_xy_selector(qtbot):
     """Basic XY selector node test."""
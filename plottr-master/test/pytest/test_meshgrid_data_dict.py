@@ -54,3 +54,38 @@ def test_reorder():
     assert num.arrays_equal(dd.data_vals('b'), bb.transpose([2, 0, 1]))
     assert num.arrays_equal(dd.data_vals('c'), cc.transpose([2, 0, 1]))
     assert num.arrays_equal(dd.data_vals('z'), zz.transpose([2, 0, 1]))
+
+
+def test_isel_sel():
+    """Test selecting parts of the grid by index and by value."""
+
+    a = np.arange(3)
+    b = np.linspace(0, 1, 5)
+    aa, bb = np.meshgrid(a, b, indexing='ij')
+    zz = aa + bb
+
+    dd = MeshgridDataDict(
+        a=dict(values=aa),
+        b=dict(values=bb),
+        z=dict(values=zz, axes=['a', 'b'])
+    )
+    assert dd.validate()
+
+    sub = dd.isel(a=1, b=slice(1, 4))
+    assert sub.axes('z') == ['b']
+    assert 'a' not in sub
+    assert num.arrays_equal(sub.data_vals('z'), zz[1, 1:4])
+    assert np.shares_memory(sub.data_vals('z'), dd.data_vals('z'))
+
+    sub = dd.sel(a=1.8, b=slice(0.25, 0.75))
+    assert sub.axes('z') == ['b']
+    assert num.arrays_equal(sub.data_vals('b'), b[1:4])
+    assert num.arrays_equal(sub.data_vals('z'), zz[2, 1:4])
+
+    sub = dd.sel(b=slice(None, 0.5))
+    assert sub.shape() == (3, 3)
+
+    with pytest.raises(ValueError):
+        dd.isel(c=0)
+    with pytest.raises(ValueError):
+        dd.sel(c=0.)
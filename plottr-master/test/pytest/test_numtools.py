@@ -1,6 +1,7 @@
 from collections import OrderedDict
 
 import numpy as np
+import pytest
 
 from plottr.utils import num
 
@@ -150,3 +151,49 @@ def test_cropping2d():
     assert num.arrays_equal(x, arr[:2, :2])
     assert num.arrays_equal(y, arr.T[:2, :2])
     assert num.arrays_equal(z, data[:2, :2])
+
+
+def test_append_amortized():
+    """Test appending to arrays with spare capacity"""
+    a = num.append_amortized(np.arange(3.), [3.])
+    b = num.append_amortized(a, [4., 5.])
+    assert num.arrays_equal(b, np.arange(6.))
+    assert b.base is a.base
+
+    # appending to an array that has been appended to already copies.
+    c = num.append_amortized(a, [-1.])
+    assert num.arrays_equal(a, np.arange(4.))
+    assert num.arrays_equal(b, np.arange(6.))
+    assert num.arrays_equal(c, np.array([0., 1., 2., 3., -1.]))
+    assert c.base is not a.base
+
+    d = num.append_amortized(np.zeros((2, 3)), np.ones((1, 3)))
+    assert d.shape == (3, 3)
+    with pytest.raises(ValueError):
+        num.append_amortized(d, np.ones((1, 2)))
+
+
+def test_is_invalid():
+    """Test detection of invalid entries for different dtypes."""
+
+    for dtype in [np.float32, np.float64, np.complex64, np.complex128]:
+        a = np.arange(4).astype(dtype)
+        a[1] = np.nan
+        assert num.is_invalid(a).tolist() == [False, True, False, False]
+
+    a = np.arange(4)
+    assert not np.any(num.is_invalid(a))
+
+    a = np.array([1, None, 2., np.nan], dtype=object)
+    assert num.is_invalid(a).tolist() == [False, True, False, False]
+
+    a = np.ma.masked_where([False, False, True], np.array([1., np.nan, 3.]))
+    assert num.is_invalid(a).tolist() == [False, True, True]
+
+    # read-only views reflect changes made through their base.
+    x = np.array([1., 2., 3.])
+    v = x.view()
+    v.flags.writeable = False
+    assert not np.any(num.is_invalid(v))
+    x[0] = np.nan
+    assert num.is_invalid(v).tolist() == [True, False, False]
@@ -1,3 +1,5 @@
+import sqlite3
+
 import numpy as np
 import pytest
 
@@ -7,6 +9,7 @@ from qcodes import load_or_create_experiment, initialise_or_create_database_at
 from plottr.data.datadict import DataDict
 from plottr.utils import testdata
 from plottr.node.tools import linearFlowchart
+from plottr.data import qcodes_dataset
 from plottr.data.qcodes_dataset import (
     QCodesDSLoader,
     get_ds_structure,
@@ -212,6 +215,71 @@ def test_get_runs_from_db(database_with_three_datasets):
     assert overview_with_structure == expected_overview_with_structure
 
 
+def test_get_runs_overview(database_with_three_datasets):
+    db_path, datasets = database_with_three_datasets
+    expected = {ds.run_id: get_ds_info(ds, get_structure=False)
+                for ds in datasets}
+    assert qcodes_dataset.get_runs_overview(db_path) == expected
+    assert qcodes_dataset.get_runs_overview(db_path, after_run_id=2) \
+        == {3: expected[3]}
+    assert list(qcodes_dataset.get_runs_overview(
+        db_path, after_run_id=2, run_ids=[1])) == [1, 3]
+
+
+def test_update_runs_dataframe(experiment):
+    m = qc.Measurement(exp=experiment)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('y', setpoints=['x'])
+    with m.run() as datasaver:
+        datasaver.add_result(('x', 0), ('y', 0))
+    path = datasaver.dataset.path_to_db
+
+    df = qcodes_dataset.get_runs_from_db_as_dataframe(path)
+    assert list(df.index) == [1]
+    with m.run() as datasaver:
+        datasaver.add_result(('x', 0), ('y', 0))
+        datasaver.flush_data_to_database()
+        df = qcodes_dataset.update_runs_dataframe(path, df)
+        assert list(df.index) == [1, 2]
+        assert df.loc[2, 'completed date'] == ''
+
+        datasaver.add_result(('x', 1), ('y', 1))
+    df = qcodes_dataset.update_runs_dataframe(path, df)
+    assert list(df.index) == [1, 2]
+    assert df.loc[2, 'records'] == 2
+    assert df.loc[2, 'completed date'] != ''
+
+    full = qcodes_dataset.get_runs_from_db_as_dataframe(path)
+    assert df.equals(full)
+
+
+def test_connection_pool(database_with_three_datasets, tmp_path):
+    db_path, datasets = database_with_three_datasets
+    other_path = str(tmp_path / 'other.db')
+    initialise_or_create_database_at(other_path)
+    assert qc.config['core']['db_location'] == other_path
+
+    # reading from the pool does not change the configured database
+    ds = qcodes_dataset.load_dataset_from(db_path, datasets[1].run_id)
+    assert ds.guid == datasets[1].guid
+    assert list(get_runs_from_db(db_path)) == [d.run_id for d in datasets]
+    assert qc.config['core']['db_location'] == other_path
+
+    pool = qcodes_dataset.connection_pool
+    conn = pool.connection(db_path)
+    assert ds.conn is conn
+    raw = pool.raw_connection(db_path)
+    assert raw is not conn
+    assert pool.raw_connection(db_path) is raw
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute('CREATE TABLE foo (bar INTEGER)')
+
+    pool.release(db_path)
+    assert pool.connection(db_path) is not conn
+    assert pool.raw_connection(db_path) is not raw
+    pool.release(db_path)
+
+
 def test_update_qcloader(qtbot, empty_db_path):
     db_path = empty_db_path
 
@@ -267,3 +335,123 @@ def test_update_qcloader(qtbot, empty_db_path):
     #         break
     #     check()
     # check()
+
+
+def test_qcloader_projection(qtbot, experiment, monkeypatch):
+    m = qc.Measurement(exp=experiment)
+    m.register_custom_parameter('x')
+    for n in range(3):
+        m.register_custom_parameter(f'z_{n}', setpoints=['x'])
+    with m.run() as datasaver:
+        for x in range(4):
+            datasaver.add_result(('x', x), ('z_0', x), ('z_1', 2 * x),
+                                 ('z_2', 3 * x))
+        ds = datasaver.dataset
+
+    loaded = []
+    get_parameter_data = qcodes_dataset.get_parameter_data_bulk
+
+    def tracked(ds, *params, **kw):
+        loaded.append(params)
+        return get_parameter_data(ds, *params, **kw)
+
+    monkeypatch.setattr(qcodes_dataset, 'get_parameter_data_bulk', tracked)
+
+    fc = linearFlowchart(('loader', QCodesDSLoader))
+    loader = fc.nodes()['loader']
+    loader.projection = ['z_1']
+    loader.pathAndId = ds.path_to_db, ds.run_id
+    ddict = fc.output()['dataOut']
+    assert loaded == [('z_1',)]
+    assert ddict.dependents() == ['z_1', 'z_0', 'z_2']
+    assert np.array_equal(ddict.data_vals('z_1'), 2 * np.arange(4))
+    assert ddict.data_vals('z_0').size == 0
+
+    # only the newly needed dependent is loaded
+    loader.projection = ['z_1', 'z_2']
+    ddict = fc.output()['dataOut']
+    assert loaded == [('z_1',), ('z_2',)]
+    assert np.array_equal(ddict.data_vals('z_2'), 3 * np.arange(4))
+
+    loader.projection = None
+    ddict = fc.output()['dataOut']
+    assert loaded[-1] == ('z_0',)
+    assert np.array_equal(ddict.data_vals('z_0'), np.arange(4))
+    assert isinstance(ddict, DataDict)
+
+
+def test_qcloader_incremental(qtbot, experiment, monkeypatch):
+    m = qc.Measurement(exp=experiment)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('z_0', setpoints=['x'])
+    m.register_custom_parameter('z_1', setpoints=['x'])
+
+    loaded = []
+    get_parameter_data = qcodes_dataset.get_parameter_data_bulk
+
+    def tracked(ds, *params, **kw):
+        loaded.append((params, kw['after_id'], kw['max_id']))
+        return get_parameter_data(ds, *params, **kw)
+
+    monkeypatch.setattr(qcodes_dataset, 'get_parameter_data_bulk', tracked)
+
+    fc = linearFlowchart(('loader', QCodesDSLoader))
+    loader = fc.nodes()['loader']
+    with m.run() as datasaver:
+        ds = datasaver.dataset
+        loader.pathAndId = ds.path_to_db, ds.run_id
+        for x in range(3):
+            datasaver.add_result(('x', x), ('z_0', x), ('z_1', -x))
+        datasaver.flush_data_to_database()
+        loader.update()
+        # each dependent is stored in rows of its own
+        assert loaded == [(('z_0', 'z_1'), 0, 6)]
+
+        for x in range(3, 5):
+            datasaver.add_result(('x', x), ('z_0', x), ('z_1', -x))
+        datasaver.flush_data_to_database()
+        loader.update()
+        assert loaded[-1] == (('z_0', 'z_1'), 6, 10)
+        ddict = fc.output()['dataOut']
+        assert np.array_equal(ddict.data_vals('x'), np.arange(5))
+        assert np.array_equal(ddict.data_vals('z_1'), -np.arange(5))
+        assert loader.nLoadedRecords == 10
+
+        # nothing is read if there are no new results
+        loader.update()
+        assert len(loaded) == 2
+
+
+def test_bulk_parameter_data(experiment):
+    m = qc.Measurement(exp=experiment)
+    m.register_custom_parameter('x')
+    m.register_custom_parameter('y')
+    m.register_custom_parameter('z', setpoints=['x', 'y'])
+    m.register_custom_parameter('w', setpoints=['x', 'y'])
+    m.register_custom_parameter('v', setpoints=['x'])
+    m.register_custom_parameter('s', paramtype='text', setpoints=['x'])
+    m.register_custom_parameter('c', paramtype='complex', setpoints=['x'])
+    with m.run() as datasaver:
+        for x in range(3):
+            for y in range(2):
+                datasaver.add_result(('x', x), ('y', y), ('z', x * y),
+                                     ('w', x + y))
+            datasaver.add_result(('x', x), ('v', -x), ('s', f'{x}'),
+                                 ('c', x + 1j))
+        ds = datasaver.dataset
+
+    params = ['z', 'w', 'v', 's', 'c']
+    bulk = qcodes_dataset.get_parameter_data_bulk(ds, *params)
+    reference = ds.get_parameter_data(*params)
+    for p in params:
+        assert set(bulk[p]) == set(reference[p])
+        for n, vals in reference[p].items():
+            if vals.dtype.kind in 'fc':
+                assert np.allclose(bulk[p][n], vals, equal_nan=True)
+            else:
+                assert np.array_equal(bulk[p][n], vals)
+
+    # axes of dependents stored together are returned only once.
+    assert bulk['z']['x'] is bulk['w']['x']
+    assert bulk['z']['x'] is not bulk['v']['x']
+    assert bulk['v']['x'] is bulk['c']['x']